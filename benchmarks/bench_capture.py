@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Notification記録ファイルのベンチマーク
+
+M5形式（244バイト分割）の合成Notificationを記録し、
+    - CaptureWriter（事前確保バッファ + まとめ書き）
+    - 1件ごとに write + flush する素朴な実装
+の書き込み速度と、CaptureReader（メモリマップ・コピーなし）/
+iter_capture（bytes にコピー）の読み出し速度を比較します。
+
+使用方法:
+    python3 benchmarks/bench_capture.py [--samples N]
+"""
+
+import argparse
+import gc
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sensor_ble.capture import MAGIC, RECORD_HEADER, CaptureReader, CaptureWriter, iter_capture  # noqa: E402
+from sensor_ble.synthetic import encode_json, make_sample, split_chunks  # noqa: E402
+
+
+def measure(label: str, count: int, func):
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+    finally:
+        gc.enable()
+    print(f"{label:<28}: {elapsed:.3f} s, {count / elapsed:>12,.0f} notifications/s, "
+          f"{elapsed / count * 1e6:.2f} µs/notification")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    notifications = []
+    for i in range(args.samples):
+        for chunk in split_chunks(encode_json(make_sample(i, rng))):
+            notifications.append((i * 0.01, bytearray(chunk)))
+    count = len(notifications)
+    workdir = tempfile.mkdtemp(prefix='bench_capture_')
+    print(f"Notification数: {count}")
+    try:
+        path = os.path.join(workdir, 'buffered.blecap')
+
+        def buffered():
+            writer = CaptureWriter(path)
+            writer.open()
+            for received_at, data in notifications:
+                writer.write(received_at, data)
+            writer.close()
+
+        def naive():
+            with open(os.path.join(workdir, 'naive.blecap'), 'wb') as f:
+                f.write(MAGIC)
+                for received_at, data in notifications:
+                    f.write(RECORD_HEADER.pack(received_at, len(data)))
+                    f.write(data)
+                    f.flush()
+
+        measure("書き込み: CaptureWriter", count, buffered)
+        measure("書き込み: 1件ごとに flush", count, naive)
+
+        def read_mmap():
+            with CaptureReader(path) as reader:
+                for _, data in reader:
+                    len(data)
+                data = None  # noqa: F841  メモリマップを閉じる前に手放す
+
+        def read_copy():
+            for _, data in iter_capture(path):
+                len(data)
+
+        measure("読み出し: CaptureReader", count, read_mmap)
+        measure("読み出し: iter_capture", count, read_copy)
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+記録済みCSVの索引と範囲の読み込みのベンチマーク
+
+合成した sensor_data_ble_*.csv（100 Hz、光・近接はときどき）について
+    - 索引の作成 (build_index)
+    - 追記後の索引の更新（追記分だけを読む）
+    - 狭い時間範囲・少数の列の読み込み (Catalog.query)
+    - 比較: ファイル全体を読んでから絞り込む (read_csv_chunks)
+の時間を計測します。
+
+使用方法:
+    python3 benchmarks/bench_catalog.py [--rows 1000000] [--window 180] [--dir /tmp/bench_catalog]
+"""
+
+import argparse
+import csv
+import gc
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sensor_ble.catalog import INDEX_SUFFIX, Catalog, build_index  # noqa: E402
+from sensor_ble.convert import read_csv_chunks  # noqa: E402
+from sensor_ble.csv_sink import CSV_HEADER, record_to_row  # noqa: E402
+from sensor_ble.synthetic import make_sample  # noqa: E402
+
+_COLUMNS = ['gyro_x', 'gyro_y', 'gyro_z']
+
+
+def timed(func):
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        result = func()
+        return time.perf_counter() - start, result
+    finally:
+        gc.enable()
+
+
+def write_rows(path: str, first: int, count: int, header: bool):
+    rng = random.Random(first)
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        if header:
+            writer.writerow(CSV_HEADER)
+        for i in range(first, first + count):
+            record = make_sample(i, rng, rate_hz=100.0)
+            if rng.random() >= 0.1:
+                record.pop('light', None)
+            if rng.random() >= 0.05:
+                record.pop('proximity', None)
+            writer.writerow(record_to_row(record))
+
+
+def full_scan(path: str, start: int, end: int):
+    parts = []
+    for chunk in read_csv_chunks(path):
+        keep = (chunk['timestamp'] >= start) & (chunk['timestamp'] <= end)
+        parts.append({name: chunk[name][keep] for name in ['timestamp'] + _COLUMNS})
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--append-rows', type=int, default=10_000)
+    parser.add_argument('--window', type=float, default=180.0, help="読み込む範囲の秒数 (既定: 180)")
+    parser.add_argument('--dir', default='/tmp/bench_catalog', help="合成データの出力先")
+    args = parser.parse_args()
+
+    os.makedirs(args.dir, exist_ok=True)
+    path = os.path.join(args.dir, 'sensor_data_ble_bench.csv')
+    for name in (path, path + INDEX_SUFFIX):
+        if os.path.exists(name):
+            os.remove(name)
+    write_rows(path, 0, args.rows, header=True)
+    size_mb = os.path.getsize(path) / 1e6
+    print(f"ファイル: {path} ({args.rows:,} 行, {size_mb:.0f} MB)")
+
+    elapsed, (index, _) = timed(lambda: build_index(path))
+    print(f"索引の作成:     {elapsed:7.3f} s  ({size_mb / elapsed:,.0f} MB/s, {len(index.blocks)} ブロック)")
+
+    write_rows(path, args.rows, args.append_rows, header=False)
+    elapsed, (index, status) = timed(lambda: build_index(path))
+    print(f"追記後の更新:   {elapsed:7.3f} s  (+{args.append_rows:,} 行, {status})")
+
+    catalog = Catalog([path])
+    catalog.update()
+    middle = (index.ts_min + index.ts_max) // 2
+    start, end = middle, middle + int(args.window * 1000)
+    elapsed, result = timed(lambda: catalog.query(start, end, _COLUMNS))
+    print(f"範囲の読み込み: {elapsed:7.3f} s  ({len(result['timestamp']):,} 行, "
+          f"{args.window:.0f} 秒, {','.join(_COLUMNS)})")
+
+    scan_elapsed, scanned = timed(lambda: full_scan(path, start, end))
+    same = all(np.array_equal(result[name], scanned[name]) for name in scanned)
+    print(f"全体を読む場合: {scan_elapsed:7.3f} s  ({len(scanned['timestamp']):,} 行) "
+          f"-> {scan_elapsed / elapsed:,.0f} 倍 {'✓ 結果一致' if same else '✗ 結果不一致'}")
+
+
+if __name__ == "__main__":
+    main()
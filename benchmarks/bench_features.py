@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+特徴量計算のベンチマーク
+
+ウィンドウサイズ 64〜1024 と複数の hop について、
+    - ストリーミング (FeatureEngine: レコードを1件ずつ投入)
+    - 一括計算 (compute_windows: 記録済みの列配列から全ウィンドウ)
+の処理速度（特徴量の行/秒、サンプル/秒）を計測します。
+
+使用方法:
+    python3 benchmarks/bench_features.py [--samples N] [--windows 64,128,...] [--hops 0.125,0.5,...]
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sensor_ble.columnar import ColumnBuffer  # noqa: E402
+from sensor_ble.features import FeatureEngine, compute_windows  # noqa: E402
+from sensor_ble.synthetic import make_sample  # noqa: E402
+
+
+def timed(func):
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        result = func()
+        return time.perf_counter() - start, result
+    finally:
+        gc.enable()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=50000)
+    parser.add_argument('--windows', default='64,128,256,512,1024')
+    parser.add_argument('--hops', default='0.125,0.5,1.0',
+                        help="hop をウィンドウサイズに対する比で指定 (既定: 0.125,0.5,1.0)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    records = [make_sample(i, rng, rate_hz=100.0) for i in range(args.samples)]
+    buffer = ColumnBuffer(args.samples)
+    for record in records:
+        buffer.append(record)
+    columns = buffer.view()
+
+    print(f"サンプル数: {args.samples} (100 Hz)")
+    print(f"{'window':>7} {'hop':>5} | {'ストリーミング 行/s':>18} {'サンプル/s':>12} | {'一括 行/s':>12}")
+    for window in (int(w) for w in args.windows.split(',')):
+        for ratio in (float(h) for h in args.hops.split(',')):
+            hop = max(1, int(window * ratio))
+            engine = FeatureEngine(window, hop)
+            stream_elapsed, _ = timed(lambda: [engine.write(r) for r in records])
+            batch_elapsed, features = timed(lambda: compute_windows(columns, window, hop))
+            rows = len(features['timestamp'])
+            print(f"{window:>7} {hop:>5} | {engine.row_count / stream_elapsed:>18,.0f} "
+                  f"{args.samples / stream_elapsed:>12,.0f} | {rows / batch_elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+姿勢推定のベンチマーク
+
+Madgwick / Mahony について、1 kHz の合成データで
+    - ストリーミング (FusionStage: レコードを1件ずつ投入、出力の行も作成)
+    - フィルタ単体 (OrientationFilter.update)
+    - 一括計算 (fuse_columns: 記録済みの列配列から全サンプル)
+の処理速度（サンプル/秒）と1サンプルあたりの時間を計測し、
+1デバイスあたり 1 kHz の受信に1コアで追いつけるかを判定します。
+
+使用方法:
+    python3 benchmarks/bench_fusion.py [--samples N] [--target-hz 1000]
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sensor_ble.columnar import ColumnBuffer  # noqa: E402
+from sensor_ble.fusion import ALGORITHMS, FusionStage, OrientationFilter, fuse_columns  # noqa: E402
+from sensor_ble.synthetic import make_sample  # noqa: E402
+
+
+def timed(func):
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        result = func()
+        return time.perf_counter() - start, result
+    finally:
+        gc.enable()
+
+
+def run_filter(algorithm, records):
+    fusion_filter = OrientationFilter(algorithm)
+    update = fusion_filter.update
+    for r in records:
+        a, g, m = r['accelerometer'], r['gyroscope'], r['magnetometer']
+        update(r['timestamp'], g['x'], g['y'], g['z'], a['x'], a['y'], a['z'], m['x'], m['y'], m['z'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=100000)
+    parser.add_argument('--target-hz', type=float, default=1000.0,
+                        help="1デバイスあたりの目標レート (既定: 1000 Hz)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    records = [make_sample(i, rng, rate_hz=args.target_hz) for i in range(args.samples)]
+    buffer = ColumnBuffer(args.samples)
+    for record in records:
+        buffer.append(record)
+    columns = buffer.view()
+
+    print(f"サンプル数: {args.samples} ({args.target_hz:.0f} Hz)")
+    print(f"{'アルゴリズム':<10} {'方式':<14} {'サンプル/s':>12} {'µs/サンプル':>12} {'CPU使用率':>10}")
+    for algorithm in ALGORITHMS:
+        stage = FusionStage(algorithm, outputs=[lambda row: None])
+        cases = (
+            ('ストリーミング', lambda: [stage.write(r) for r in records]),
+            ('フィルタ単体', lambda: run_filter(algorithm, records)),
+            ('一括計算', lambda: fuse_columns(columns, algorithm)),
+        )
+        for label, func in cases:
+            elapsed, _ = timed(func)
+            rate = args.samples / elapsed
+            # 目標レートで受信したときに1コアのうち姿勢推定が占める割合
+            load = args.target_hz / rate
+            mark = '✓' if rate >= args.target_hz else '✗'
+            print(f"{algorithm:<12} {label:<12} {rate:>12,.0f} {elapsed / args.samples * 1e6:>12.2f} "
+                  f"{load:>9.1%} {mark}")
+
+
+if __name__ == "__main__":
+    main()
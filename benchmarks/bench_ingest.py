@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+受信パイプラインの最大持続レートの計測
+
+FakeBackend の疑似デバイスから合成データを段階的に高いレートで送信し、
+デコード → シンク（一時ディレクトリへの出力）まで通したときに
+ドロップなしで処理できた最大のサンプル/秒を報告します。
+
+使用方法:
+    python3 benchmarks/bench_ingest.py [--mode json|m5|binary] [--sink csv|npy|parquet]
+                                       [--duration SEC] [--rates 500,1000,...]
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sensor_ble.ble import CHARACTERISTIC_UUID  # noqa: E402
+from sensor_ble.decoders import ChunkedJsonDecoder, JsonDecoder  # noqa: E402
+from sensor_ble.fake_ble import FakeBackend  # noqa: E402
+from sensor_ble.pipeline import IngestPipeline  # noqa: E402
+from sensor_ble.sinks import create_sink  # noqa: E402
+
+DEFAULT_RATES = '250,500,1000,2000,4000,8000,16000'
+
+
+async def run_rate(rate: float, duration: float, mode: str, sink_kind: str, workdir: str):
+    """1つのレートで duration 秒分のサンプルを送信し、結果を返す"""
+    samples = int(rate * duration)
+    backend = FakeBackend(rate_hz=rate, samples=samples,
+                          chunked=mode == 'm5', binary=mode == 'binary')
+    sink = create_sink(sink_kind, os.path.join(workdir, f"rate_{int(rate)}"))
+    sink.open()
+    # 受信スクリプトと同じく SensorSample を流す
+    decoder = ChunkedJsonDecoder(samples=True) if mode == 'm5' else JsonDecoder(samples=True)
+    pipeline = IngestPipeline(decoder, sinks=[sink.write])
+    pipeline.start()
+
+    device = await backend.find_device()
+    disconnected = asyncio.Event()
+    client = backend.client(device, disconnected_callback=lambda _: disconnected.set())
+    await client.connect()
+    start = time.perf_counter()
+    await client.start_notify(CHARACTERISTIC_UUID, lambda _, data: pipeline.submit(data))
+    await disconnected.wait()
+    sent_elapsed = time.perf_counter() - start
+
+    pipeline.stop(timeout=None)
+    total_elapsed = time.perf_counter() - start
+    sink.close()
+    stats = pipeline.stats()
+    return {
+        'samples': samples,
+        'offered_rate': samples / sent_elapsed,
+        'processed_rate': decoder.decoded_count / total_elapsed,
+        'decoded': decoder.decoded_count,
+        'dropped': stats['dropped_raw'],
+        'backlog_s': total_elapsed - sent_elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=('json', 'm5', 'binary'), default='m5')
+    parser.add_argument('--sink', choices=('csv', 'npy', 'parquet'), default='csv')
+    parser.add_argument('--duration', type=float, default=3.0)
+    parser.add_argument('--rates', default=DEFAULT_RATES)
+    args = parser.parse_args()
+
+    rates = [float(r) for r in args.rates.split(',')]
+    workdir = tempfile.mkdtemp(prefix='bench_ingest_')
+    best = 0.0
+    print(f"形式: {args.mode}, 出力: {args.sink}, 各 {args.duration:.0f} 秒")
+    try:
+        for rate in rates:
+            result = asyncio.run(run_rate(rate, args.duration, args.mode, args.sink, workdir))
+            # 送信側が目標レートを出せ、ドロップも滞留もなければ持続可能とみなす
+            sustained = (result['dropped'] == 0 and
+                         result['offered_rate'] >= rate * 0.95 and
+                         result['backlog_s'] < 0.5)
+            print(f"{rate:>8.0f} Hz: 送信 {result['offered_rate']:>8,.0f}/s, "
+                  f"処理 {result['processed_rate']:>8,.0f}/s, "
+                  f"ドロップ {result['dropped']:>6}, 滞留 {result['backlog_s']:.2f} s"
+                  f"{'' if sustained else '  ✗'}")
+            if sustained:
+                best = rate
+            else:
+                break
+    finally:
+        shutil.rmtree(workdir)
+    print(f"ドロップなしで持続できた最大レート: {best:,.0f} samples/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+計測（sensor_ble.metrics）の負荷のベンチマーク
+
+M5形式（244バイト分割）の合成Notificationをまとめて IngestPipeline に投入し、
+CSVシンクまで処理しきるまでの時間を、計測なし / 計測ありで比較します。
+あわせてヒストグラムへの1回の記録にかかる時間を計測します。
+
+使用方法:
+    python3 benchmarks/bench_metrics.py [--samples N] [--repeat N]
+"""
+
+import argparse
+import gc
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sensor_ble.csv_sink import CsvSink  # noqa: E402
+from sensor_ble.decoders import ChunkedJsonDecoder  # noqa: E402
+from sensor_ble.metrics import LatencyHistogram, Metrics  # noqa: E402
+from sensor_ble.pipeline import BLOCK, IngestPipeline  # noqa: E402
+from sensor_ble.synthetic import encode_json, make_sample, split_chunks  # noqa: E402
+
+
+def run_pipeline(notifications, path: str, metrics):
+    sink = CsvSink(path)
+    sink.open()
+    pipeline = IngestPipeline(ChunkedJsonDecoder(), sinks=[sink.write], policy=BLOCK,
+                              queue_size=len(notifications) + 1, metrics=metrics)
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        pipeline.start()
+        for data in notifications:
+            pipeline.submit(data)
+        pipeline.stop(timeout=None)
+        elapsed = time.perf_counter() - start
+    finally:
+        gc.enable()
+    sink.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    notifications = [bytearray(chunk) for i in range(args.samples)
+                     for chunk in split_chunks(encode_json(make_sample(i, rng)))]
+    workdir = tempfile.mkdtemp(prefix='bench_metrics_')
+    print(f"サンプル数: {args.samples} (Notification {len(notifications)})")
+    try:
+        results = {}
+        for label, factory in (("計測なし", lambda: None), ("計測あり", Metrics)):
+            best = min(run_pipeline(notifications, os.path.join(workdir, 'out.csv'), factory())
+                       for _ in range(args.repeat))
+            results[label] = best
+            print(f"{label}: {best:.3f} s, {args.samples / best:,.0f} samples/s")
+        overhead = results["計測あり"] / results["計測なし"] - 1
+        print(f"計測による増加: {overhead * 100:+.1f} %")
+    finally:
+        shutil.rmtree(workdir)
+
+    histogram = LatencyHistogram()
+    count = 1000000
+    start = time.perf_counter()
+    for i in range(count):
+        histogram.record(i * 1e-7)
+    elapsed = time.perf_counter() - start
+    print(f"ヒストグラムへの記録: {elapsed / count * 1e9:.0f} ns/回")
+
+
+if __name__ == "__main__":
+    main()
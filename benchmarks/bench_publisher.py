@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+ローカル配信 (Publisher) の負荷試験
+
+Publisher を起動し、別プロセスから数十の購読者を接続した状態で、
+受信パイプラインと同じように write() を一定レートで呼び続けます。
+    - write() の1レコードあたりの時間（受信パイプラインへの負荷）
+    - 通常の購読者が受け取った件数（欠けた割合）と遅延（timestamp → 受信）
+    - 間引きを指定した購読者の受信件数
+    - 読まない購読者（遅い購読者）のドロップ数と切断数
+を表示します。
+
+使用方法:
+    python3 benchmarks/bench_publisher.py [--transport tcp] [--subscribers 48] [--slow 4]
+        [--rate 1000] [--duration 5] [--processes 4]
+"""
+
+import argparse
+import asyncio
+import gc
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sensor_ble.publisher import TRANSPORTS, Publisher, iter_batches, parse_endpoint  # noqa: E402
+from sensor_ble.synthetic import make_sample  # noqa: E402
+
+_EVERY = 10  # 間引きを指定する購読者の N
+
+
+def timed(func):
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        result = func()
+        return time.perf_counter() - start, result
+    finally:
+        gc.enable()
+
+
+async def _subscribe(endpoint: str, every: int, result: dict):
+    async for batch in iter_batches(endpoint, every):
+        lines = batch.splitlines()
+        result['count'] += len(lines)
+        # バッチの最後の行で遅延を測る（行の timestamp は write() 直前の時刻）
+        timestamp = int(lines[-1][13:lines[-1].index(b',')])
+        result['latency'].append(time.time() * 1000 - timestamp)
+
+
+async def _stall(endpoint: str):
+    """接続するだけで読まない購読者（受信バッファを小さくしてすぐに詰まらせる）"""
+    transport, host, port = parse_endpoint(endpoint)
+    sock = socket.socket(socket.AF_UNIX if transport == 'unix' else socket.AF_INET)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.connect(host if transport == 'unix' else (host, port))
+    if transport == 'ws':
+        sock.sendall(b'GET / HTTP/1.1\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                     b'Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\nSec-WebSocket-Version: 13\r\n\r\n')
+    try:
+        await asyncio.sleep(3600)
+    finally:
+        sock.close()
+
+
+def subscriber_process(endpoint: str, subscribers: int, thinned: int, slow: int, stop, results):
+    async def run():
+        collected = [{'count': 0, 'latency': [], 'every': _EVERY if i < thinned else 1}
+                     for i in range(subscribers)]
+        tasks = [asyncio.ensure_future(_subscribe(endpoint, c['every'], c)) for c in collected]
+        tasks += [asyncio.ensure_future(_stall(endpoint)) for _ in range(slow)]
+        await asyncio.get_running_loop().run_in_executor(None, stop.wait)
+        await asyncio.sleep(0.5)  # 最後のバッチを受け取る
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return collected
+
+    results.put(asyncio.run(run()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transport', choices=TRANSPORTS, default='tcp')
+    parser.add_argument('--subscribers', type=int, default=48, help="通常の購読者の数 (既定: 48)")
+    parser.add_argument('--thinned', type=int, default=8,
+                        help=f"そのうち {_EVERY} 件に1件に間引く購読者の数 (既定: 8)")
+    parser.add_argument('--slow', type=int, default=4, help="読まない購読者の数 (udp では無効, 既定: 4)")
+    parser.add_argument('--rate', type=float, default=1000.0, help="write() のレート Hz (既定: 1000)")
+    parser.add_argument('--duration', type=float, default=5.0, help="秒 (既定: 5)")
+    parser.add_argument('--processes', type=int, default=4, help="購読者を動かすプロセス数 (既定: 4)")
+    parser.add_argument('--queue-size', type=int, default=1024)
+    parser.add_argument('--slow-timeout', type=float, default=1.0)
+    args = parser.parse_args()
+
+    endpoint = {'unix': 'unix:///tmp/bench_publisher.sock'}.get(args.transport,
+                                                               f"{args.transport}://127.0.0.1:0")
+    publisher = Publisher(endpoint, queue_size=args.queue_size, slow_timeout=args.slow_timeout)
+    publisher.start()
+    slow = 0 if args.transport == 'udp' else args.slow
+
+    stop = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = []
+    for i in range(args.processes):
+        share = lambda n: n // args.processes + (1 if i < n % args.processes else 0)  # noqa: E731
+        process = multiprocessing.Process(
+            target=subscriber_process,
+            args=(publisher.address, share(args.subscribers), share(args.thinned), share(slow), stop, results))
+        process.start()
+        processes.append(process)
+    deadline = time.monotonic() + 10
+    while len(publisher.subscribers) < args.subscribers + slow and time.monotonic() < deadline:
+        time.sleep(0.05)
+    print(f"エンドポイント: {publisher.address}  購読者: {len(publisher.subscribers)} "
+          f"(間引き {args.thinned}, 読まない {slow})")
+
+    rng = random.Random(0)
+    records = [make_sample(i, rng, rate_hz=args.rate) for i in range(int(args.rate * args.duration))]
+    write_time = 0.0
+    started = time.monotonic()
+    for i, record in enumerate(records):
+        delay = started + i / args.rate - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        record['timestamp'] = int(time.time() * 1000)
+        elapsed, _ = timed(lambda: publisher.write(record))
+        write_time += elapsed
+    publisher.close()
+    stats = publisher.stats()
+    stop.set()
+    collected = []
+    for _ in processes:
+        collected.extend(results.get())
+    for process in processes:
+        process.join()
+
+    sent = len(records)
+    print(f"write(): {sent:,} 件 {args.rate:.0f} Hz, {write_time / sent * 1e6:.1f} µs/件 "
+          f"(1コアの {write_time / args.duration:.1%})")
+    for every in (1, _EVERY):
+        group = [c for c in collected if c['every'] == every]
+        if not group:
+            continue
+        counts = [c['count'] for c in group]
+        latency = sorted(value for c in group for value in c['latency'])
+        expected = -(-sent // every)
+        print(f"  {'通常' if every == 1 else f'{every}件に1件':<8} {len(group):>3} 購読者: "
+              f"受信 最小 {min(counts):,} / 平均 {sum(counts) / len(counts):,.0f} 件 "
+              f"(期待値 {expected:,}, 欠け {1 - min(counts) / expected:.2%}), "
+              f"遅延 p50 {latency[len(latency) // 2]:.1f} ms / p99 {latency[int(len(latency) * 0.99)]:.1f} ms")
+    print(f"  全体: 送信 {stats['sent']:,} 行, ドロップ {stats['dropped']:,} 行, "
+          f"遅い購読者の切断 {publisher.slow_disconnects}")
+
+
+if __name__ == "__main__":
+    main()
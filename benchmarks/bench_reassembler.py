@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+分割JSONフレーム再構築のベンチマーク
+
+app_for_m5 と同じく244バイト単位に分割した合成チャンクを再生し、
+従来の1文字ずつの文字列連結ループと FrameReassembler の
+フレーム/秒を比較します。
+
+使用方法:
+    python3 benchmarks/bench_reassembler.py [--samples N] [--chunk-size BYTES]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sensor_ble.reassembler import FrameReassembler  # noqa: E402
+
+
+def make_chunks(samples: int, chunk_size: int):
+    """合成センサーデータをJSON化し、チャンクに分割"""
+    rng = random.Random(0)
+    chunks = []
+    for i in range(samples):
+        data = {
+            'timestamp': 1678886400000 + i * 10,
+            'accelerometer': {'x': rng.uniform(-10, 10), 'y': rng.uniform(-10, 10), 'z': rng.uniform(-10, 10)},
+            'gyroscope': {'x': rng.uniform(-1, 1), 'y': rng.uniform(-1, 1), 'z': rng.uniform(-1, 1)},
+            'light': {'lux': rng.uniform(0, 1000)},
+            'gps': {'latitude': 35.6895, 'longitude': 139.6917, 'altitude': 50.0,
+                    'accuracy': 10.0, 'speed': 0.5},
+            'magnetometer': {'x': rng.uniform(-50, 50), 'y': rng.uniform(-50, 50), 'z': rng.uniform(-50, 50)},
+            'proximity': {'distance': 5.0},
+            'gravity': {'x': 0.12, 'y': 0.34, 'z': 9.78},
+        }
+        payload = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        for offset in range(0, len(payload), chunk_size):
+            chunks.append(payload[offset:offset + chunk_size])
+    return chunks
+
+
+class LegacyLoop:
+    """receive_ble_sensor_data_m5.py の従来の文字単位ループ"""
+
+    def __init__(self):
+        self.json_buffer = ""
+        self.brace_count = 0
+        self.in_string = False
+        self.frames = 0
+
+    def feed(self, data: bytes):
+        actual_data = data
+        for i, byte in enumerate(data):
+            if byte == 0:
+                actual_data = data[:i]
+                break
+        for c in actual_data.decode('utf-8'):
+            if c == '\n' or c == '\r':
+                continue
+            if len(self.json_buffer) == 0 and c != '{':
+                continue
+            self.json_buffer += c
+            if c == '"':
+                if len(self.json_buffer) < 2 or self.json_buffer[-2] != '\\':
+                    self.in_string = not self.in_string
+            if not self.in_string:
+                if c == '{':
+                    self.brace_count += 1
+                elif c == '}':
+                    self.brace_count -= 1
+                    if (self.brace_count == 0 and
+                            len(self.json_buffer) > 10 and
+                            self.json_buffer[0] == '{'):
+                        self.frames += 1
+                        self.json_buffer = ""
+                        self.brace_count = 0
+                        self.in_string = False
+
+
+def bench_legacy(chunks):
+    loop = LegacyLoop()
+    start = time.perf_counter()
+    for chunk in chunks:
+        loop.feed(chunk)
+    return loop.frames, time.perf_counter() - start
+
+
+def bench_reassembler(chunks):
+    reassembler = FrameReassembler()
+    frames = 0
+    start = time.perf_counter()
+    for chunk in chunks:
+        frames += len(reassembler.feed(chunk))
+    return frames, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=20000)
+    parser.add_argument('--chunk-size', type=int, default=244)
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.samples, args.chunk_size)
+    print(f"サンプル数: {args.samples}, チャンク数: {len(chunks)} ({args.chunk_size} bytes)")
+
+    for name, func in (('従来ループ', bench_legacy), ('FrameReassembler', bench_reassembler)):
+        frames, elapsed = func(chunks)
+        print(f"{name:>18}: {frames} frames, {elapsed:.3f} s, {frames / elapsed:,.0f} frames/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+dict のレコードと SensorSample（sensor_ble.schema）の比較ベンチマーク
+
+合成センサーデータを JSON とバイナリ形式にエンコードし、デコーダが
+dict を返す場合（samples=False）と SensorSample を返す場合（samples=True）で、
+デコードと各出力の処理時間 (µs/sample) を比較します。
+    - デコード (JSON / バイナリ)
+    - CSVの行 (record_to_row)
+    - 列バッファ (ColumnBuffer.append、numpy が必要)
+    - ダッシュボードの集計 (Dashboard.update)
+    - 配信の行 (JSON への変換)
+また tracemalloc で、デコード済みのレコードを（受信キューや出力の
+バッファのように）貯めたときの1件あたりのバイト数と割り当てブロック数を測ります。
+
+使用方法:
+    python3 benchmarks/bench_records.py [--samples 50000]
+"""
+
+import argparse
+import gc
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sensor_ble.binary_protocol import encode_frame  # noqa: E402
+from sensor_ble.csv_sink import record_to_row  # noqa: E402
+from sensor_ble.dashboard import Dashboard  # noqa: E402
+from sensor_ble.decoders import JsonDecoder  # noqa: E402
+from sensor_ble.pipeline import RawNotification  # noqa: E402
+from sensor_ble.schema import SensorSample  # noqa: E402
+from sensor_ble.synthetic import encode_json, make_sample  # noqa: E402
+
+_PATHS = (('dict', False), ('SensorSample', True))
+
+
+def timed(func):
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        result = func()
+        return time.perf_counter() - start, result
+    finally:
+        gc.enable()
+
+
+def to_line(record) -> bytes:
+    """Publisher.write と同じ変換"""
+    if type(record) is SensorSample:
+        return record.to_json().encode('utf-8')
+    return json.dumps(record, separators=(',', ':')).encode('utf-8')
+
+
+def make_outputs():
+    """(名前, 1件を処理する関数) のリスト"""
+    outputs = [('CSVの行', record_to_row)]
+    try:
+        from sensor_ble.columnar import ColumnBuffer
+    except ImportError:
+        print("numpy がないため列バッファの計測をスキップします")
+    else:
+        buffer = ColumnBuffer()
+
+        def append(record):
+            if buffer.full:
+                buffer.clear()
+            buffer.append(record)
+        outputs.append(('列バッファ', append))
+    outputs.append(('ダッシュボード', Dashboard(stream=io.StringIO()).update))
+    outputs.append(('配信の行', to_line))
+    return outputs
+
+
+def measure_retained(decoder, notifications):
+    """デコード済みのレコードを貯めたときの1件あたりの (バイト数, ブロック数)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    records = [record for raw in notifications for record in decoder(raw)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    size = sum(stat.size_diff for stat in stats)
+    blocks = sum(stat.count_diff for stat in stats)
+    return size / len(records), blocks / len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=50000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    records = [make_sample(i, rng, rate_hz=100) for i in range(args.samples)]
+    formats = [
+        ('JSON', [RawNotification(0.0, encode_json(r)) for r in records]),
+        ('バイナリ', [RawNotification(0.0, encode_frame(r)) for r in records]),
+    ]
+    print(f"サンプル数: {args.samples:,}（GPS は100件に1件）")
+
+    for format_name, notifications in formats:
+        print(f"\n{format_name}:")
+        results = {}
+        for path, samples in _PATHS:
+            decoder = JsonDecoder(samples=samples)
+            elapsed, decoded = timed(lambda: [r for raw in notifications for r in decoder(raw)])
+            times = [('デコード', elapsed)]
+            for name, output in make_outputs():
+                elapsed, _ = timed(lambda: [output(record) for record in decoded])
+                times.append((name, elapsed))
+            times.append(('合計', sum(elapsed for _, elapsed in times)))
+            del decoded
+            results[path] = (times, measure_retained(decoder, notifications))
+
+        # 表示幅がそろうよう、項目名は行末に置く
+        print(''.join(f"{path:>17}" for path, _ in _PATHS))
+        for i, (name, _) in enumerate(results['dict'][0]):
+            print(''.join(f"{results[path][0][i][1] / args.samples * 1e6:>11.2f} µs/件"
+                          for path, _ in _PATHS) + f"  {name}")
+        print(''.join(f"{results[path][1][0]:>12,.0f} B/件" for path, _ in _PATHS) + "  保持するメモリ")
+        print(''.join(f"{results[path][1][1]:>11.1f} 個/件" for path, _ in _PATHS) + "  保持する割り当てブロック")
+
+
+if __name__ == "__main__":
+    main()
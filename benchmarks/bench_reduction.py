@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+データ削減（sensor_ble.reduction）のベンチマーク
+
+合成センサーデータ（止まっている端末・動いている端末）を、削減の設定ごとに
+Reducer に通し、次を表示します。
+    - 削減の処理時間 (µs/sample) と、削減してからCSVに書くまでの時間
+      （削減しないでCSVに書く時間との比較）
+    - 行数・値の数・CSVファイルのサイズの削減率
+    - 最大誤差: Reducer が処理中に求めた値（sdt は上限）と、削減したデータを
+      復元して元のデータと比べた実測値（reconstruction_errors、numpy が必要）
+確認の列は、実測の誤差が deadband / sdt ではしきい値以下、decimate では
+処理中に求めた値と一致することです。
+
+使用方法:
+    python3 benchmarks/bench_reduction.py [--samples 30000] [--rate 100]
+"""
+
+import argparse
+import gc
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sensor_ble.reduction import (Reducer, parse_policy, reconstruction_errors,  # noqa: E402
+                                  samples_to_columns)
+from sensor_ble.schema import SENSOR_SCHEMA, as_sample  # noqa: E402
+from sensor_ble.sinks import create_sink  # noqa: E402
+from sensor_ble.synthetic import make_sample  # noqa: E402
+
+POLICIES = (
+    ('既定', 'default'),
+    ('間引き', 'default,accelerometer=decimate:4,gyroscope=decimate:4,magnetometer=decimate:4'),
+    ('スウィングドア', 'default,accelerometer=sdt:0.05,gyroscope=sdt:0.01,magnetometer=sdt:0.5'),
+)
+
+
+def timed(func):
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        result = func()
+        return time.perf_counter() - start, result
+    finally:
+        gc.enable()
+
+
+def make_samples(count, rate_hz, moving, seed=0):
+    """合成サンプル（止まっている端末はノイズだけ、動いている端末は GPS も移動する）"""
+    rng = random.Random(seed)
+    samples = []
+    for i in range(count):
+        data = make_sample(i, rng, rate_hz=rate_hz)
+        t = i / rate_hz
+        if not moving:
+            data['accelerometer'] = {'x': 0.12 + rng.gauss(0, 0.01), 'y': 0.34 + rng.gauss(0, 0.01),
+                                     'z': 9.78 + rng.gauss(0, 0.01)}
+            data['gyroscope'] = {'x': rng.gauss(0, 0.002), 'y': rng.gauss(0, 0.002), 'z': rng.gauss(0, 0.002)}
+            data['light']['lux'] = 150.0 + 20 * math.sin(t / 600)
+        elif 'gps' in data:
+            data['gps'].update(latitude=35.6895 + t * 1e-5, longitude=139.6917 + 5e-6 * math.sin(t / 30),
+                               speed=1.2 + 0.1 * math.sin(t))
+        samples.append(as_sample(data))
+    return samples
+
+
+def value_count(samples):
+    """値（フィールド）の数"""
+    sizes = [(bit, len(fields)) for bit, (_, fields) in enumerate(SENSOR_SCHEMA)]
+    return sum(size for sample in samples for bit, size in sizes if sample.present >> bit & 1)
+
+
+def write_csv(samples, stem):
+    """CSVに書き、そのバイト数を返す"""
+    sink = create_sink('csv', stem)
+    sink.open()
+    for sample in samples:
+        sink.write(sample)
+    sink.close()
+    return os.path.getsize(sink.segments[0])
+
+
+def check(policy, online, measured):
+    """実測の誤差が想定どおりか（問題があればその説明）"""
+    for key, fields in SENSOR_SCHEMA:
+        group = policy.get(key)
+        for i, (_, column, _) in enumerate(fields):
+            error = measured.get(column, 0.0)
+            if group is None or group.method == 'raw':
+                limit = 0.0
+            elif group.method == 'decimate':
+                if not math.isclose(error, online[column], rel_tol=1e-9, abs_tol=1e-12):
+                    return f"{column}: 実測 {error:.4g} / 処理中 {online[column]:.4g}"
+                continue
+            else:
+                limit = group.params[i]
+            if not error <= limit * (1 + 1e-9) + 1e-12:
+                return f"{column}: 実測 {error:.4g} > しきい値 {limit:.4g}"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=30000)
+    parser.add_argument('--rate', type=float, default=100.0, help="サンプリングレート Hz (既定: 100)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_reduction_')
+    try:
+        for scene, moving in (('止まっている端末', False), ('動いている端末', True)):
+            samples = make_samples(args.samples, args.rate, moving)
+            original = samples_to_columns(samples)
+            raw_time, raw_bytes = timed(lambda: write_csv(samples, os.path.join(workdir, 'raw')))
+            print(f"\n{scene}: {args.samples:,} サンプル ({args.rate:.0f} Hz), "
+                  f"削減しないCSV {raw_bytes:,} バイト / {raw_time / args.samples * 1e6:.2f} µs/件")
+            print(f"{'':<16}{'削減':>11}{'削減+CSV':>12}{'行':>7}{'値':>7}{'CSV':>7}  確認  最大誤差 (処理中 / 実測)")
+            for label, spec in POLICIES:
+                policy = parse_policy(spec)
+                outputs = []
+                reducer = Reducer(policy, outputs=[outputs.append])
+
+                def reduce():
+                    for sample in samples:
+                        reducer.write(sample)
+                    reducer.close()
+                elapsed, _ = timed(reduce)
+                write_time, reduced_bytes = timed(lambda: write_csv(outputs, os.path.join(workdir, 'reduced')))
+                online = reducer.max_errors()
+                measured = reconstruction_errors(original, samples_to_columns(outputs), policy)
+                problem = check(policy, online, measured)
+                # 処理中の値に対して実測が最も大きい列
+                worst = max(measured, key=lambda column: measured[column] / (online[column] or 1.0))
+                print(f"{label:<14}{elapsed / args.samples * 1e6:>8.2f} µs{(elapsed + write_time) / args.samples * 1e6:>9.2f} µs"
+                      f"{len(samples) / len(outputs):>6.1f}x{value_count(samples) / value_count(outputs):>6.1f}x"
+                      f"{raw_bytes / reduced_bytes:>6.1f}x  {'✗ ' + problem if problem else '✓'}  "
+                      f"{worst}: {online[worst]:.3g} / {measured[worst]:.3g}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
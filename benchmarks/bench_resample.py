@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+リサンプリングのベンチマーク
+
+不規則な間隔（平均 約100 Hz、ゆらぎ・時計の戻り・途切れあり）で
+GPS・光・近接がときどきしか含まれない記録を合成し、
+    - 一括計算 (resample_columns: 数百万行の列配列)
+    - ストリーミング (Resampler: レコードを1件ずつ投入)
+の処理速度（入力の行/秒）と出力の行数を計測します。
+
+使用方法:
+    python3 benchmarks/bench_resample.py [--rows 5000000] [--stream-rows 200000] [--rate 50]
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sensor_ble.columnar import COLUMNS  # noqa: E402
+from sensor_ble.resample import Resampler, resample_columns  # noqa: E402
+from sensor_ble.synthetic import make_sample  # noqa: E402
+
+# 各グループが含まれる割合（それ以外は毎回含まれる）
+_PRESENCE = {'light': 0.1, 'gps': 0.01, 'proximity': 0.05}
+_PREFIXES = {'light': 'light_', 'gps': 'gps_', 'proximity': 'proximity_'}
+
+
+def timed(func):
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        result = func()
+        return time.perf_counter() - start, result
+    finally:
+        gc.enable()
+
+
+def make_columns(rows: int, seed: int = 0):
+    """記録済みの列配列を合成（欠けているグループは NaN）"""
+    rng = np.random.default_rng(seed)
+    step = rng.choice([5, 8, 10, 12, 15], size=rows).astype(np.int64)
+    # まれに時計が戻る・途切れる
+    jumps = rng.random(rows)
+    step[jumps < 1e-5] = -60000
+    step[(jumps >= 1e-5) & (jumps < 2e-5)] = 30000
+    columns = {'timestamp': 1_700_000_000_000 + np.cumsum(step)}
+    for name, dtype in COLUMNS[1:]:
+        columns[name] = rng.standard_normal(rows).astype(dtype)
+    for key, ratio in _PRESENCE.items():
+        missing = rng.random(rows) >= ratio
+        for name, _ in COLUMNS[1:]:
+            if name.startswith(_PREFIXES[key]):
+                columns[name][missing] = np.nan
+    return columns
+
+
+def make_records(rows: int):
+    rng = random.Random(0)
+    records = []
+    for i in range(rows):
+        record = make_sample(i, rng, rate_hz=100.0)
+        for key, ratio in _PRESENCE.items():
+            if rng.random() >= ratio:
+                record.pop(key, None)
+        records.append(record)
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--stream-rows', type=int, default=200_000)
+    parser.add_argument('--rate', type=float, default=50.0, help="出力の頻度 Hz (既定: 50)")
+    args = parser.parse_args()
+
+    columns = make_columns(args.rows)
+    elapsed, out = timed(lambda: resample_columns(columns, args.rate))
+    print(f"一括計算:       {args.rows:>10,} 行 -> {len(out['timestamp']):>10,} 行  "
+          f"{elapsed:6.2f} s  ({args.rows / elapsed:,.0f} 行/s)")
+
+    records = make_records(args.stream_rows)
+    resampler = Resampler(args.rate, outputs=[lambda row: None])
+
+    def stream():
+        for record in records:
+            resampler.write(record)
+        resampler.close()
+
+    elapsed, _ = timed(stream)
+    print(f"ストリーミング: {args.stream_rows:>10,} 行 -> {resampler.row_count:>10,} 行  "
+          f"{elapsed:6.2f} s  ({args.stream_rows / elapsed:,.0f} 行/s, "
+          f"{elapsed / args.stream_rows * 1e6:.1f} µs/行)")
+
+
+if __name__ == "__main__":
+    main()
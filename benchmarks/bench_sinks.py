@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+出力シンクのベンチマーク
+
+合成センサーデータを CSV / .npy / Parquet の各シンクに書き込み、
+書き込み速度 (records/s) と出力サイズを比較します。
+Parquet は pyarrow がインストールされている場合のみ計測します。
+
+使用方法:
+    python3 benchmarks/bench_sinks.py [--records N]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sensor_ble.sinks import SINK_TYPES, create_sink  # noqa: E402
+
+
+def make_records(count: int):
+    rng = random.Random(0)
+    records = []
+    for i in range(count):
+        records.append({
+            'timestamp': 1678886400000 + i * 10,
+            'accelerometer': {'x': rng.uniform(-10, 10), 'y': rng.uniform(-10, 10), 'z': rng.uniform(-10, 10)},
+            'gyroscope': {'x': rng.uniform(-1, 1), 'y': rng.uniform(-1, 1), 'z': rng.uniform(-1, 1)},
+            'light': {'lux': rng.uniform(0, 1000)},
+            'gps': {'latitude': 35.6895, 'longitude': 139.6917, 'altitude': 50.0,
+                    'accuracy': 10.0, 'speed': 0.5} if i % 100 == 0 else None,
+            'magnetometer': {'x': rng.uniform(-50, 50), 'y': rng.uniform(-50, 50), 'z': rng.uniform(-50, 50)},
+            'proximity': {'distance': 5.0},
+            'gravity': {'x': 0.12, 'y': 0.34, 'z': 9.78},
+        })
+    return records
+
+
+def output_size(path: str) -> int:
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=200000)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    workdir = tempfile.mkdtemp(prefix='bench_sinks_')
+    print(f"レコード数: {args.records}")
+    try:
+        for kind in SINK_TYPES:
+            sink = create_sink(kind, os.path.join(workdir, f"bench_{kind}"))
+            try:
+                sink.open()
+            except RuntimeError as e:
+                print(f"{kind:>8}: スキップ ({e})")
+                continue
+            start = time.perf_counter()
+            for record in records:
+                sink.write(record)
+            sink.close()
+            elapsed = time.perf_counter() - start
+            size = sum(output_size(path) for path in sink.segments)
+            print(f"{kind:>8}: {elapsed:.2f} s, {args.records / elapsed:,.0f} records/s, "
+                  f"{size / 1024 / 1024:.1f} MB ({size / args.records:.1f} bytes/record)")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
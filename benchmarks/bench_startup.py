@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+受信コマンドの起動時間
+
+別プロセスで次の時間を複数回測り、中央値を表示します。
+    - import sensor_ble
+    - python3 -m sensor_ble --help
+    - python3 -m sensor_ble [オプション] を起動してから、最初の出力
+      （「BLEデバイスをスキャンしています」）が出るまで（その後 SIGINT で終了）
+参考として bleak / numpy / pyarrow それぞれの import 時間も表示します。
+受信に使わない依存ライブラリが起動時に読み込まれていないかの確認に使います。
+
+使用方法:
+    python3 benchmarks/bench_startup.py [--repeat 5]
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+_READY = 'BLEデバイスをスキャンしています'
+
+# 起動を測るオプション（実機の代わりに合成データを使う）
+_OPTION_SETS = [
+    ('既定 (csv)', []),
+    ('--framing m5', ['--framing', 'm5']),
+    ('--sink parquet', ['--sink', 'parquet']),
+    ('--features', ['--features']),
+    ('--publish', ['--publish', 'tcp://127.0.0.1:0']),
+]
+
+
+def _env():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.path.abspath(ROOT) + os.pathsep + env.get('PYTHONPATH', '')
+    return env
+
+
+def time_command(args, cwd) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=cwd, env=_env(),
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def time_until_ready(args, cwd) -> float:
+    """最初のスキャン表示が出るまでの時間（出なければ例外）"""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-u', '-m', 'sensor_ble'] + args, cwd=cwd, env=_env(),
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        for line in process.stdout:
+            if _READY in line:
+                return time.perf_counter() - start
+        raise RuntimeError(f"{' '.join(args)}: 受信を開始できませんでした")
+    finally:
+        process.send_signal(signal.SIGINT)
+        process.communicate(timeout=10)
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help="各項目の試行回数 (既定: 5)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"Python {sys.version.split()[0]} / 試行 {args.repeat} 回の中央値")
+        baseline = median([time_command(['-c', 'pass'], workdir) for _ in range(args.repeat)])
+        print(f"  {'python3 -c pass':<34} {baseline * 1000:7.1f} ms")
+        for label, command in [('import sensor_ble', ['-c', 'import sensor_ble']),
+                               ('python3 -m sensor_ble --help', ['-m', 'sensor_ble', '--help'])]:
+            elapsed = median([time_command(command, workdir) for _ in range(args.repeat)])
+            print(f"  {label:<34} {elapsed * 1000:7.1f} ms (+{(elapsed - baseline) * 1000:.1f})")
+
+        print("受信開始まで (--synthetic-rate 100):")
+        for label, options in _OPTION_SETS:
+            try:
+                elapsed = median([time_until_ready(options + ['--synthetic-rate', '100'], workdir)
+                                  for _ in range(args.repeat)])
+            except (RuntimeError, subprocess.SubprocessError) as e:
+                print(f"  {label:<34} ✗ {e}")
+                continue
+            print(f"  {label:<34} {elapsed * 1000:7.1f} ms")
+
+        print("参考: 依存ライブラリの import:")
+        for module in ('bleak', 'numpy', 'pyarrow'):
+            try:
+                elapsed = median([time_command(['-c', f'import {module}'], workdir)
+                                  for _ in range(args.repeat)])
+            except subprocess.CalledProcessError:
+                print(f"  {module:<34} (未インストール)")
+                continue
+            print(f"  {module:<34} {elapsed * 1000:7.1f} ms (+{(elapsed - baseline) * 1000:.1f})")
+
+
+if __name__ == "__main__":
+    main()
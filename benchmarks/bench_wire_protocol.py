@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+JSON とバイナリ形式の比較ベンチマーク
+
+合成センサーデータを両方の形式にエンコードし、1サンプルあたりの
+バイト数とデコード時間 (µs/sample) を比較します。バイナリ形式は
+struct による1フレームずつのデコードと、numpy.frombuffer による
+一括デコード（numpy がインストールされている場合）を計測します。
+
+使用方法:
+    python3 benchmarks/bench_wire_protocol.py [--samples N]
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sensor_ble.binary_protocol import (  # noqa: E402
+    ALL_SENSORS, decode_frame, encode_frame, frame_dtype,
+)
+
+
+def make_records(count: int):
+    rng = random.Random(0)
+    return [{
+        'timestamp': 1678886400000 + i * 10,
+        'accelerometer': {'x': rng.uniform(-10, 10), 'y': rng.uniform(-10, 10), 'z': rng.uniform(-10, 10)},
+        'gyroscope': {'x': rng.uniform(-1, 1), 'y': rng.uniform(-1, 1), 'z': rng.uniform(-1, 1)},
+        'light': {'lux': rng.uniform(0, 1000)},
+        'gps': {'latitude': 35.6895, 'longitude': 139.6917, 'altitude': 50.0,
+                'accuracy': 10.0, 'speed': 0.5},
+        'magnetometer': {'x': rng.uniform(-50, 50), 'y': rng.uniform(-50, 50), 'z': rng.uniform(-50, 50)},
+        'proximity': {'distance': 5.0},
+        'gravity': {'x': 0.12, 'y': 0.34, 'z': 9.78},
+    } for i in range(count)]
+
+
+def measure(label: str, samples: int, func):
+    # timeit と同様にGCを止めて計測する
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+    finally:
+        gc.enable()
+    print(f"{label:>22}: {elapsed / samples * 1e6:.3f} µs/sample")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=100000)
+    args = parser.parse_args()
+
+    records = make_records(args.samples)
+    json_frames = [json.dumps(r, separators=(',', ':')).encode('utf-8') for r in records]
+    binary_frames = [encode_frame(r) for r in records]
+
+    print(f"サンプル数: {args.samples}")
+    print(f"{'JSON':>22}: {sum(map(len, json_frames)) / args.samples:.1f} bytes/sample")
+    print(f"{'バイナリ':>22}: {sum(map(len, binary_frames)) / args.samples:.1f} bytes/sample")
+
+    measure('JSON (json.loads)', args.samples,
+            lambda: [json.loads(f.decode('utf-8')) for f in json_frames])
+    measure('バイナリ (struct)', args.samples,
+            lambda: [decode_frame(f) for f in binary_frames])
+
+    try:
+        import numpy as np
+    except ImportError:
+        print("numpy がないため一括デコードの計測をスキップします")
+        return
+    joined = b''.join(binary_frames)
+    dtype = frame_dtype(ALL_SENSORS)
+    # 列ごとの連続した配列に変換するまでを計測
+    measure('バイナリ (numpy一括)', args.samples,
+            lambda: [np.ascontiguousarray(column) for column in
+                     (lambda a: [a[name] for name in dtype.names])(np.frombuffer(joined, dtype=dtype))])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+複数プロセスでの受信処理（sensor_ble.workers）のスケーリング
+
+複数の疑似デバイスの合成データ（Notification列）を事前に作っておき、
+受信順のとおりデバイスを交互にしながら、できるだけ速く次の2通りで処理します。
+    - スレッド:      デバイスごとの DeviceSession（--multi の既定。1プロセス）
+    - ワーカー N:    WorkerPool の N 個のワーカープロセス（--multi --workers N）
+すべてのデバイスの出力を閉じ終えるまでの時間から、サンプル/秒と
+スレッドに対する倍率を表示します。I/O プロセスの列は、Notification 1件を
+渡す（キューまたはリングバッファに書く）のにかかった I/O プロセスの時間です。
+各デバイスの出力ファイルの件数と、タイムスタンプが受信順に並んでいることも確認します。
+
+ワーカーを増やしても速くなるのは CPU のコア数までです。
+
+使用方法:
+    python3 benchmarks/bench_workers.py [--devices 8] [--samples 5000] [--mode m5|json|binary]
+                                        [--workers 1,2,4] [--sink csv|npy|parquet]
+"""
+
+import argparse
+import csv
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from itertools import zip_longest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sensor_ble.fake_ble import FakeDevice, synthetic_source  # noqa: E402
+from sensor_ble.pipeline import BLOCK, RawNotification  # noqa: E402
+from sensor_ble.receiver import make_decoder  # noqa: E402
+from sensor_ble.sinks import create_sink  # noqa: E402
+from sensor_ble.supervisor import DeviceSession, address_slug  # noqa: E402
+from sensor_ble.workers import WorkerPool  # noqa: E402
+
+
+def timed(func):
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        result = func()
+        return time.perf_counter() - start, result
+    finally:
+        gc.enable()
+
+
+def make_notifications(devices, samples, mode, framing):
+    """デバイスごとの Notification を受信順に交互に並べた [(デバイス番号, データ), ...] と、
+    デバイスごとの正しい出力のタイムスタンプの列"""
+    streams = []
+    expected = []
+    for index in range(devices):
+        source = synthetic_source(1000.0, samples, chunked=mode == 'm5', binary=mode == 'binary', seed=index)
+        streams.append([(index, data) for _, data in source])
+        decoder = make_decoder(framing)
+        expected.append([record.timestamp for _, data in streams[-1]
+                         for record in decoder(RawNotification(0.0, data))])
+    notifications = [item for group in zip_longest(*streams) for item in group if item is not None]
+    return notifications, expected
+
+
+def feed(sessions, notifications):
+    """I/O プロセスの処理（Notification を渡す）にかかった秒数"""
+    handlers = [session.notification_handler for session in sessions]
+    start = time.perf_counter()
+    for index, data in notifications:
+        handlers[index](None, bytearray(data))
+    return time.perf_counter() - start
+
+
+def queue_size(notifications, devices, workers=1):
+    """送信側が待たずに済むキューのサイズ
+
+    待たされると Notification の受信時刻の間隔が空き、m5 の再構築が
+    タイムアウトして結果が変わってしまうため、全件が入る大きさにする。
+    """
+    counts = Counter(index for index, _ in notifications)
+    return max(counts.values()) * -(-devices // workers)
+
+
+def run_threads(devices, notifications, framing, sink_kind, workdir):
+    sessions = []
+    for index in range(devices):
+        device = FakeDevice(f"FA:KE:00:00:00:{index:02X}", f"FakeSensor{index}")
+        sink = create_sink(sink_kind, os.path.join(workdir, address_slug(device.address)))
+        session = DeviceSession(device, make_decoder(framing), sink, None,
+                                queue_size(notifications, devices), BLOCK)
+        session.start()
+        sessions.append(session)
+
+    def run():
+        forward = feed(sessions, notifications)
+        for session in sessions:
+            session.close()
+        return forward
+
+    elapsed, forward = timed(run)
+    return elapsed, forward, [session.segments[0] for session in sessions]
+
+
+def run_workers(workers, devices, notifications, framing, sink_kind, workdir):
+    pool = WorkerPool(workers, lambda address: os.path.join(workdir, address_slug(address)),
+                      framing, sink_kind, queue_size=queue_size(notifications, devices, workers),
+                      backpressure=BLOCK)
+    pool.start()
+    try:
+        sessions = [pool.session(FakeDevice(f"FA:KE:00:00:00:{index:02X}", f"FakeSensor{index}"))
+                    for index in range(devices)]
+        for session in sessions:
+            session.start()
+
+        def run():
+            forward = feed(sessions, notifications)
+            for session in sessions:
+                session.close()
+            return forward
+
+        elapsed, forward = timed(run)
+    finally:
+        pool.stop()
+    return elapsed, forward, [session.segments[0] for session in sessions]
+
+
+def check_outputs(paths, expected, sink_kind):
+    """各出力の件数とタイムスタンプの順序を確認（問題があればその説明）"""
+    for path, timestamps_expected in zip(paths, expected):
+        if sink_kind == 'csv':
+            with open(path, newline='') as f:
+                timestamps = [int(row[0]) for row in list(csv.reader(f))[1:]]
+        elif sink_kind == 'npy':
+            import numpy as np
+            timestamps = np.load(os.path.join(path, 'timestamp.npy')).tolist()
+        else:
+            import pyarrow.parquet as pq
+            timestamps = pq.read_table(path, columns=['timestamp']).column(0).to_pylist()
+        if len(timestamps) != len(timestamps_expected):
+            return f"{os.path.basename(path)}: {len(timestamps)} 件 (期待値 {len(timestamps_expected)})"
+        if timestamps != timestamps_expected:
+            return f"{os.path.basename(path)}: タイムスタンプが受信順に並んでいません"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--devices', type=int, default=8)
+    parser.add_argument('--samples', type=int, default=5000, help="デバイスごとのサンプル数 (既定: 5000)")
+    parser.add_argument('--mode', choices=('json', 'm5', 'binary'), default='m5')
+    parser.add_argument('--workers', default='1,2,4', help="ワーカー数のリスト (既定: 1,2,4)")
+    parser.add_argument('--sink', choices=('csv', 'npy', 'parquet'), default='csv')
+    args = parser.parse_args()
+
+    framing = 'm5' if args.mode == 'm5' else 'json'
+    notifications, expected = make_notifications(args.devices, args.samples, args.mode, framing)
+    total = args.devices * args.samples
+    print(f"形式: {args.mode}, 出力: {args.sink}, デバイス: {args.devices} 台 × {args.samples:,} サンプル "
+          f"(Notification {len(notifications):,} 件), CPU: {os.cpu_count()} コア")
+    print(f"{'':<14}{'時間':>8}{'サンプル/秒':>14}{'倍率':>8}{'I/O プロセス':>16}  確認")
+
+    baseline = None
+    configs = [('スレッド', None)] + [(f"ワーカー {n}", n) for n in map(int, args.workers.split(','))]
+    for label, workers in configs:
+        workdir = tempfile.mkdtemp(prefix='bench_workers_')
+        try:
+            if workers is None:
+                elapsed, forward, paths = run_threads(args.devices, notifications, framing, args.sink, workdir)
+            else:
+                elapsed, forward, paths = run_workers(workers, args.devices, notifications, framing,
+                                                      args.sink, workdir)
+            problem = check_outputs(paths, expected, args.sink)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        rate = total / elapsed
+        baseline = baseline or rate
+        print(f"{label:<14}{elapsed:>7.2f}s{rate:>14,.0f}{rate / baseline:>7.2f}x"
+              f"{forward / len(notifications) * 1e6:>12.2f} µs/件  {'✗ ' + problem if problem else '✓'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Sensor BLE - PC側受信処理の共通モジュール
+
+受信処理（sensor_ble.receiver、sensor-ble コマンド）と、その部品をまとめた
+パッケージです。起動を速くするため、受信クラスなどは最初に参照されたときに
+読み込みます（import sensor_ble だけでは asyncio や NumPy を読み込みません）。
+"""
+
+from .reassembler import FrameReassembler
+
+# 属性名 -> 定義しているモジュール
+_LAZY = {
+    'SensorDataReceiverBLE': 'receiver',
+    'register_stage': 'receiver',
+    'Publisher': 'publisher',
+    'Catalog': 'catalog',
+    'SensorSample': 'schema',
+}
+
+__all__ = [
+    'FrameReassembler',
+    'SensorDataReceiverBLE',
+    'register_stage',
+    'Publisher',
+    'Catalog',
+    'SensorSample',
+]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        from importlib import import_module
+        value = getattr(import_module(f".{_LAZY[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,11 @@
+"""
+python3 -m sensor_ble で受信を開始する（sensor-ble コマンドと同じ）
+"""
+
+import sys
+
+from .receiver import cli
+
+if __name__ == "__main__":
+    sys.argv[0] = 'python3 -m sensor_ble'  # --help の usage に __main__.py と表示されないようにする
+    cli()
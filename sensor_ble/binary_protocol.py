@@ -0,0 +1,149 @@
+"""
+固定レイアウトのバイナリ形式（JSONの代替）
+
+1サンプルを次のレイアウトのフレームで表します（リトルエンディアン）:
+
+    offset  size  内容
+    0       1     マジック兼バージョン (0xB0 | version)
+    1       1     センサーの有無ビットマスク (bit0 = accelerometer ... bit6 = gravity)
+    2       8     timestamp (int64, ミリ秒)
+    10      -     有無ビットが立っているセンサーの値を SENSOR_LAYOUT の順に連結
+
+各センサーの値の型は SensorData.kt に合わせています（Float は float32、
+GPS の緯度・経度・高度は float64）。全センサーありで 98 バイトとなり、
+JSON（約 400 バイト）と違って1回のNotificationに収まります。
+
+先頭バイトが 0xB0〜0xBF ならバイナリ、'{' ならJSONとして判別できます
+（0xB0〜0xBF は UTF-8 の先頭バイトにならないため、JSONと衝突しません）。
+ただしこれはフレームの先頭での話です。M5版のように任意のバイト位置で分割された
+JSONの途中のチャンクは、継続バイト (0x80〜0xBF) で始まることがあります。
+そのため判別は、再構築中のデータがないときだけ行います。
+"""
+
+import struct
+from typing import Any, Dict, List, Tuple, Union
+
+from .csv_sink import SENSOR_FIELDS
+from .schema import SensorSample, sample_builder
+
+VERSION = 1
+MAGIC = 0xB0
+MAGIC_MASK = 0xF0
+FRAME_MARKER = MAGIC | VERSION
+
+# (JSONのキー, struct 書式) の順に並べる。フィールド名は SENSOR_FIELDS と共通
+SENSOR_LAYOUT = tuple(
+    (key, fields, fmt) for (key, fields), fmt in zip(SENSOR_FIELDS, (
+        'fff',    # accelerometer
+        'fff',    # gyroscope
+        'f',      # light
+        'dddff',  # gps
+        'fff',    # magnetometer
+        'f',      # proximity
+        'fff',    # gravity
+    ))
+)
+ALL_SENSORS = (1 << len(SENSOR_LAYOUT)) - 1
+
+_HEADER = struct.Struct('<BBq')
+HEADER_SIZE = _HEADER.size
+
+# ビットマスクごとの (フレーム全体の Struct, デコード手順)（初回使用時に作成）
+_frame_layouts: Dict[int, Tuple[struct.Struct, Tuple[Tuple[str, Tuple[str, ...], int, int], ...]]] = {}
+
+
+class BinaryFrameError(ValueError):
+    """バイナリフレームの形式が不正"""
+
+
+def is_binary(data: bytes) -> bool:
+    """先頭バイトからバイナリフレームかどうかを判定"""
+    return len(data) > 0 and data[0] & MAGIC_MASK == MAGIC
+
+
+def _frame_layout(mask: int):
+    layout = _frame_layouts.get(mask)
+    if layout is None:
+        fmt = '<BBq'
+        plan = []
+        index = 3
+        for bit, (key, fields, codes) in enumerate(SENSOR_LAYOUT):
+            if mask & (1 << bit):
+                fmt += codes
+                plan.append((key, fields, index, index + len(fields)))
+                index += len(fields)
+        layout = _frame_layouts[mask] = (struct.Struct(fmt), tuple(plan))
+    return layout
+
+
+def frame_struct(mask: int) -> struct.Struct:
+    """ビットマスクに対応するフレーム全体の Struct"""
+    return _frame_layout(mask)[0]
+
+
+def encode_frame(data: Dict[str, Any]) -> bytes:
+    """センサーデータ (dict) をバイナリフレームに変換"""
+    mask = 0
+    values: List[Any] = []
+    for bit, (key, fields, _) in enumerate(SENSOR_LAYOUT):
+        group = data.get(key)
+        if group:
+            mask |= 1 << bit
+            values.extend(group[field] for field in fields)
+    return frame_struct(mask).pack(FRAME_MARKER, mask, data.get('timestamp', 0), *values)
+
+
+def decode_frame(buffer: bytes, offset: int = 0,
+                 samples: bool = False) -> Tuple[Union[Dict[str, Any], SensorSample], int]:
+    """offset から1フレームをデコードし、(センサーデータ, フレーム長) を返す
+
+    samples=True なら dict の代わりに SensorSample を返します（dict を作りません）。
+    """
+    if len(buffer) - offset < HEADER_SIZE:
+        raise BinaryFrameError("フレームが短すぎます")
+    marker, mask = buffer[offset], buffer[offset + 1]
+    if marker & MAGIC_MASK != MAGIC:
+        raise BinaryFrameError(f"バイナリフレームではありません: 0x{marker:02X}")
+    if marker & ~MAGIC_MASK != VERSION:
+        raise BinaryFrameError(f"未対応のバージョンです: {marker & ~MAGIC_MASK}")
+    if mask & ~ALL_SENSORS:
+        raise BinaryFrameError(f"不正なビットマスクです: 0x{mask:02X}")
+
+    compiled, plan = _frame_layout(mask)
+    if len(buffer) - offset < compiled.size:
+        raise BinaryFrameError("フレームが途中で切れています")
+    values = compiled.unpack_from(buffer, offset)
+    if samples:
+        return sample_builder(mask, 2)(values), compiled.size
+
+    data: Dict[str, Any] = {'timestamp': values[2]}
+    for key, fields, start, stop in plan:
+        data[key] = dict(zip(fields, values[start:stop]))
+    return data, compiled.size
+
+
+def decode_frames(buffer: bytes, samples: bool = False) -> List[Any]:
+    """連結された複数のフレームをすべてデコード"""
+    records = []
+    offset = 0
+    while offset < len(buffer):
+        data, size = decode_frame(buffer, offset, samples)
+        records.append(data)
+        offset += size
+    return records
+
+
+def frame_dtype(mask: int = ALL_SENSORS):
+    """ビットマスクに対応する NumPy の構造化 dtype
+
+    同じビットマスクのフレームが連続して記録されたバッファは
+    numpy.frombuffer(buffer, dtype=frame_dtype(mask)) でまとめてデコードできます。
+    """
+    import numpy as np
+
+    fields = [('marker', 'u1'), ('mask', 'u1'), ('timestamp', '<i8')]
+    for bit, (key, names, fmt) in enumerate(SENSOR_LAYOUT):
+        if mask & (1 << bit):
+            fields.extend((f"{key}_{name}", '<f8' if code == 'd' else '<f4')
+                          for name, code in zip(names, fmt))
+    return np.dtype(fields)
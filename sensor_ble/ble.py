@@ -0,0 +1,47 @@
+"""
+BLE 接続まわりの共通定義
+
+UUID と、bleak の BleakScanner / BleakClient を包む薄いバックエンドです。
+MultiDeviceSupervisor / ReconnectingSession はこのバックエンドを介して
+スキャン・接続するため、sensor_ble.fake_ble の FakeBackend に差し替えると
+実機なしで動作確認できます。
+"""
+
+from typing import Any, Callable, List, Optional
+
+# Androidアプリで定義したUUID
+SERVICE_UUID = "0000180A-0000-1000-8000-00805F9B34FB"
+CHARACTERISTIC_UUID = "00002A57-0000-1000-8000-00805F9B34FB"
+
+
+def advertises_service(advertisement_data: Any, service_uuid: str = SERVICE_UUID) -> bool:
+    """アドバタイズに service_uuid が含まれているか"""
+    return service_uuid.lower() in [s.lower() for s in advertisement_data.service_uuids]
+
+
+class BleakBackend:
+    """bleak を使う実機用バックエンド"""
+
+    async def discover(self, timeout: float = 5.0,
+                       service_uuid: str = SERVICE_UUID) -> List[Any]:
+        """service_uuid をアドバタイズしているデバイスを列挙"""
+        from bleak import BleakScanner
+
+        found = await BleakScanner.discover(timeout=timeout, return_adv=True)
+        return [device for device, adv in found.values()
+                if advertises_service(adv, service_uuid)]
+
+    async def find_device(self, timeout: float = 10.0,
+                          service_uuid: str = SERVICE_UUID) -> Optional[Any]:
+        """service_uuid をアドバタイズしている最初のデバイスを探す"""
+        from bleak import BleakScanner
+
+        return await BleakScanner.find_device_by_filter(
+            lambda d, ad: advertises_service(ad, service_uuid), timeout=timeout)
+
+    def client(self, device: Any,
+               disconnected_callback: Optional[Callable[[Any], None]] = None):
+        """未接続の BleakClient を作成"""
+        from bleak import BleakClient
+
+        return BleakClient(device, disconnected_callback=disconnected_callback)
@@ -0,0 +1,221 @@
+"""
+受信Notificationの記録ファイル
+
+受信したNotificationをそのままの内容と受信時刻（time.monotonic()）で
+追記していく形式です。JSONのパースに失敗したデータも含めてすべて
+残るため、後から ReplayBackend で再生して受信処理をやり直せます。
+
+ファイル形式（リトルエンディアン）:
+    ヘッダ   8 バイト  b'SBLECAP1'
+    レコード 12 バイト (受信時刻 float64, 長さ uint32) + Notificationの内容
+
+CaptureWriter は事前確保したバッファにレコードを詰め、満杯になるか
+一定時間ごとにまとめて書き出します。CaptureReader はファイルを
+メモリマップし、各Notificationの内容をコピーせずに memoryview で返します。
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import BinaryIO, Iterable, Iterator, Optional, Tuple
+
+MAGIC = b'SBLECAP1'
+RECORD_HEADER = struct.Struct('<dI')
+
+DEFAULT_BUFFER_SIZE = 1 << 20  # 1 MiB
+DEFAULT_FLUSH_INTERVAL = 1.0   # 秒
+
+
+class CaptureFormatError(ValueError):
+    """記録ファイルの形式が不正"""
+
+
+class CaptureWriter:
+    """受信Notificationを記録ファイルに追記する
+
+    write() はバッファへのコピーだけを行うため、Notificationコールバック内から
+    呼び出せます。既存の記録ファイルを指定した場合は末尾に追記します。
+    """
+
+    def __init__(self, path: str, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        self._length = 0
+        self._file: Optional[BinaryIO] = None
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+        # 統計
+        self.record_count = 0
+        self.byte_count = 0
+        self.flush_count = 0
+
+    def open(self):
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, 'rb') as f:
+                _check_magic(f, self.path)
+            self._file = open(self.path, 'ab')
+        else:
+            self._file = open(self.path, 'wb')
+            self._file.write(MAGIC)
+            self._file.flush()
+
+    def write(self, received_at: float, data: bytes):
+        """Notificationを1件追加（バッファが満杯なら書き出し）"""
+        length = len(data)
+        size = RECORD_HEADER.size + length
+        with self._lock:
+            if self._length + size > len(self._buffer):
+                self._flush()
+                if size > len(self._buffer):
+                    # バッファより大きいレコードは直接書き出す
+                    self._file.write(RECORD_HEADER.pack(received_at, length))
+                    self._file.write(data)
+                    self._file.flush()
+                    self.record_count += 1
+                    self.byte_count += size
+                    return
+            start = self._length + RECORD_HEADER.size
+            RECORD_HEADER.pack_into(self._buffer, self._length, received_at, length)
+            self._buffer[start:start + length] = data
+            self._length = start + length
+            self.record_count += 1
+            self.byte_count += size
+
+    def flush_if_due(self):
+        """前回の書き出しから flush_interval 以上経過していれば書き出し"""
+        with self._lock:
+            if self._length and time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._flush()
+                self._file.close()
+                self._file = None
+
+    def _flush(self):
+        if self._length:
+            self._file.write(self._view[:self._length])
+            self._length = 0
+        self._file.flush()
+        self.flush_count += 1
+        self._last_flush = time.monotonic()
+
+
+class CaptureReader:
+    """記録ファイルをメモリマップして順に読み出す
+
+    反復で得られる内容は記録ファイル上の memoryview です（コピーしません）。
+    close() の前に使い終えるか、必要なら bytes() でコピーしてください。
+    書き込み途中で終了したファイルでも、完全なレコードまでは読み出せます。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            if os.fstat(self._file.fileno()).st_size < len(MAGIC):
+                raise CaptureFormatError(f"Notification記録ファイルではありません: {path}")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        self._view = memoryview(self._mmap)
+        if self._view[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise CaptureFormatError(f"Notification記録ファイルではありません: {path}")
+        self.truncated = False
+
+    def __enter__(self) -> "CaptureReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self) -> Iterator[Tuple[float, memoryview]]:
+        view = self._view
+        end = len(view)
+        unpack_from = RECORD_HEADER.unpack_from
+        header_size = RECORD_HEADER.size
+        offset = len(MAGIC)
+        while offset + header_size <= end:
+            received_at, length = unpack_from(view, offset)
+            start = offset + header_size
+            if start + length > end:
+                break
+            yield received_at, view[start:start + length]
+            offset = start + length
+        self.truncated = offset != end
+
+    def close(self):
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # 返した memoryview がまだ使われている。参照がなくなれば解放される
+            pass
+        self._file.close()
+
+
+def write_capture(path: str, notifications: Iterable[Tuple[float, bytes]]) -> int:
+    """(受信時刻, 内容) の列を記録ファイルに書き出し、件数を返す"""
+    if os.path.exists(path):
+        os.remove(path)
+    writer = CaptureWriter(path)
+    writer.open()
+    try:
+        for received_at, data in notifications:
+            writer.write(received_at, data)
+    finally:
+        writer.close()
+    return writer.record_count
+
+
+def iter_capture(path: str) -> Iterator[Tuple[float, bytes]]:
+    """記録ファイルから (受信時刻, 内容) を順に読み出す"""
+    with CaptureReader(path) as reader:
+        for received_at, view in reader:
+            yield received_at, bytes(view)
+        view = None  # 最後の memoryview を手放してからメモリマップを閉じる
+        if reader.truncated:
+            print(f"✗ 記録ファイルの末尾が途中で切れています: {path}")
+
+
+def _check_magic(f: BinaryIO, path: str):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise CaptureFormatError(f"Notification記録ファイルではありません: {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Notification記録ファイルの概要を表示")
+    parser.add_argument('files', nargs='+', help="記録ファイル (.blecap)")
+    args = parser.parse_args()
+
+    for path in args.files:
+        count = 0
+        total = 0
+        first = last = 0.0
+        with CaptureReader(path) as reader:
+            for received_at, data in reader:
+                if count == 0:
+                    first = received_at
+                last = received_at
+                count += 1
+                total += len(data)
+            truncated = reader.truncated
+        duration = last - first
+        rate = count / duration if duration > 0 else 0.0
+        print(f"{path}: {count} 件, {total:,} バイト, {duration:.1f} 秒 ({rate:.1f} 件/秒)"
+              f"{', 末尾が途中で切れています' if truncated else ''}")
+
+
+if __name__ == "__main__":
+    main()
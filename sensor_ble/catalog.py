@@ -0,0 +1,553 @@
+"""
+記録済みCSVの索引と範囲の読み込み
+
+受信スクリプトが出力した sensor_data_ble_*.csv ごとに、隣に索引ファイル
+（<CSV>.idx、JSON）を作り、時刻の範囲や列を指定した読み込みで
+必要な部分だけをシーク・パースします。
+
+索引の内容:
+    - ファイル全体の timestamp の最小・最大、行数、列ごとの値のある行数
+    - block_rows 行ごとのブロックの (バイト位置, 行数, timestamp の最小・最大,
+      値のある列のビットマスク)
+
+索引の作成はファイルを大きなチャンクで読み、改行・区切りの位置と
+timestamp を NumPy の配列演算でまとめて求めます。追記されたファイルは
+前回の索引の最後のブロックから先だけを読み直します（先頭の内容が
+変わっていれば作り直します）。
+
+範囲の読み込みは、時刻が重なり、要求した列に値のあるブロックだけを
+連続したバイト範囲にまとめて読み、pyarrow があれば pyarrow.csv で、
+なければ csv モジュールで要求した列だけを型付きの配列に変換します。
+
+使用方法:
+    python3 -m sensor_ble.catalog index [ディレクトリ/ファイル ...]
+    python3 -m sensor_ble.catalog info [ディレクトリ/ファイル ...]
+    python3 -m sensor_ble.catalog query [ディレクトリ/ファイル ...] --start 14:02 --end 14:05 \\
+        --columns gyro_x,gyro_y,gyro_z [--output gyro.npz]
+"""
+
+import argparse
+import csv
+import glob
+import io
+import json
+import os
+import sys
+import time
+import zlib
+from datetime import datetime, timedelta
+from datetime import time as dtime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .columnar import COLUMNS
+from .convert import rows_to_columns
+from .csv_sink import CSV_HEADER
+
+INDEX_SUFFIX = '.idx'
+INDEX_VERSION = 1
+DEFAULT_BLOCK_ROWS = 4096
+DEFAULT_READ_SIZE = 16 << 20   # 索引作成時に一度に読むバイト数
+_HEAD_BYTES = 1 << 16          # 追記されたかの判定に使う先頭のバイト数
+_MAX_RANGE_BLOCKS = 64         # 1回にパースする最大ブロック数
+
+_DTYPES = dict(COLUMNS)
+_VALUE_NAMES = [name for name, _ in COLUMNS[1:]]
+# CSV上の列の位置（datetime 列を含む）
+_CSV_POSITIONS = {name: CSV_HEADER.index(name) for name, _ in COLUMNS}
+_FIELD_COUNT = len(CSV_HEADER)
+# 派生ファイル（同じ列を持つリサンプリング結果など）は対象にしない
+_DERIVED_SUFFIXES = ('_resampled.csv', '_features.csv', '_orientation.csv')
+
+_COMMA = ord(',')
+_NEWLINE = ord('\n')
+_CR = ord('\r')
+
+
+class FileIndex:
+    """1つのCSVファイルの索引"""
+
+    def __init__(self, path: str, block_rows: int = DEFAULT_BLOCK_ROWS):
+        self.path = path
+        self.block_rows = block_rows
+        self.size = 0           # 索引に含めたバイト数（最後の完全な行の終わり）
+        self.file_size = 0      # 索引作成時のファイルサイズ（書き込み途中の行を含む）
+        self.mtime = 0.0
+        self.head_crc = 0
+        self.data_offset = 0    # ヘッダ行の次のバイト位置
+        self.rows = 0
+        # [バイト位置, 行数, timestamp 最小, timestamp 最大, 値のある列のビットマスク]
+        self.blocks: List[List[int]] = []
+        self.present: Dict[str, int] = {name: 0 for name in _VALUE_NAMES}
+
+    @property
+    def index_path(self) -> str:
+        return self.path + INDEX_SUFFIX
+
+    @property
+    def ts_min(self) -> Optional[int]:
+        return min((b[2] for b in self.blocks), default=None)
+
+    @property
+    def ts_max(self) -> Optional[int]:
+        return max((b[3] for b in self.blocks), default=None)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["FileIndex"]:
+        """path（CSV）の索引ファイルを読み込む（なければ・形式が違えば None）"""
+        try:
+            with open(path + INDEX_SUFFIX, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('version') != INDEX_VERSION:
+            return None
+        index = cls(path, data['block_rows'])
+        for key in ('size', 'file_size', 'mtime', 'head_crc', 'data_offset', 'rows', 'blocks', 'present'):
+            setattr(index, key, data[key])
+        return index
+
+    def save(self):
+        data = {
+            'version': INDEX_VERSION,
+            'block_rows': self.block_rows,
+            'size': self.size,
+            'file_size': self.file_size,
+            'mtime': self.mtime,
+            'head_crc': self.head_crc,
+            'data_offset': self.data_offset,
+            'rows': self.rows,
+            'ts_min': self.ts_min,
+            'ts_max': self.ts_max,
+            'present': self.present,
+            'blocks': self.blocks,
+        }
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp, self.index_path)
+
+    def select_blocks(self, start: Optional[int] = None, end: Optional[int] = None,
+                      names: Optional[Sequence[str]] = None) -> List[Tuple[int, int]]:
+        """時刻が [start, end] に重なり、names の列に値のあるブロックの連続範囲
+
+        戻り値は (最初のブロック, 最後のブロックの次) のリストです。
+        """
+        mask = 0
+        for name in names or ():
+            if name in self.present:
+                mask |= 1 << _VALUE_NAMES.index(name)
+        ranges: List[Tuple[int, int]] = []
+        for i, (_, _, low, high, present) in enumerate(self.blocks):
+            if (start is not None and high < start) or (end is not None and low > end):
+                continue
+            if mask and not present & mask:
+                continue
+            if ranges and ranges[-1][1] == i and i - ranges[-1][0] < _MAX_RANGE_BLOCKS:
+                ranges[-1] = (ranges[-1][0], i + 1)
+            else:
+                ranges.append((i, i + 1))
+        return ranges
+
+    def byte_range(self, first: int, stop: int) -> Tuple[int, int]:
+        """ブロック [first, stop) のバイト範囲"""
+        end = self.blocks[stop][0] if stop < len(self.blocks) else self.size
+        return self.blocks[first][0], end
+
+    def read(self, start: Optional[int] = None, end: Optional[int] = None,
+             names: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """timestamp が [start, end] の行の列配列を読み込む
+
+        names を指定すると timestamp とその列だけを読み、いずれかの列に
+        値のある行だけを返します。
+        """
+        names = list(names) if names else list(_VALUE_NAMES)
+        wanted = ['timestamp'] + [name for name in names if name != 'timestamp']
+        parts = []
+        with open(self.path, 'rb') as f:
+            for first, stop in self.select_blocks(start, end, names):
+                offset, limit = self.byte_range(first, stop)
+                f.seek(offset)
+                columns = parse_csv_bytes(f.read(limit - offset), wanted)
+                keep = np.ones(len(columns['timestamp']), dtype=bool)
+                if start is not None:
+                    keep &= columns['timestamp'] >= start
+                if end is not None:
+                    keep &= columns['timestamp'] <= end
+                values = [columns[name] for name in wanted[1:]]
+                if values:
+                    keep &= np.logical_or.reduce([~np.isnan(v) for v in values])
+                parts.append({name: array[keep] for name, array in columns.items()})
+        if not parts:
+            return {name: np.empty(0, dtype=_DTYPES[name]) for name in wanted}
+        return {name: np.concatenate([part[name] for part in parts]) for name in wanted}
+
+
+def _head_crc(path: str, size: int) -> int:
+    with open(path, 'rb') as f:
+        return zlib.crc32(f.read(min(size, _HEAD_BYTES)))
+
+
+def build_index(path: str, block_rows: int = DEFAULT_BLOCK_ROWS,
+                read_size: int = DEFAULT_READ_SIZE) -> Tuple[FileIndex, str]:
+    """path の索引を作成・更新して保存し、(索引, 'created' / 'updated' / 'unchanged') を返す"""
+    stat = os.stat(path)
+    index = FileIndex.load(path)
+    status = 'created'
+    if index is not None and index.block_rows == block_rows and index.size <= stat.st_size:
+        if index.head_crc == _head_crc(path, index.size):
+            if index.file_size == stat.st_size and index.mtime == stat.st_mtime:
+                return index, 'unchanged'
+            status = 'updated'
+        else:
+            index = None
+    else:
+        index = None
+
+    if index is None:
+        index = FileIndex(path, block_rows)
+        with open(path, 'rb') as f:
+            header = f.readline()
+        if header.rstrip(b'\r\n').decode('utf-8', 'replace').split(',') != CSV_HEADER:
+            raise ValueError(f"sensor_data_ble 形式のCSVではありません: {path}")
+        index.data_offset = index.size = len(header)
+    elif index.blocks:
+        # 最後のブロックは途中までのことがあるので、その先頭から読み直す
+        offset, rows, _, _, _ = index.blocks.pop()
+        index.present = _subtract_present(index.present, path, offset, index.size)
+        index.size = offset
+        index.rows -= rows
+
+    _index_rows(index, read_size)
+    index.file_size = stat.st_size
+    index.mtime = stat.st_mtime
+    index.head_crc = _head_crc(path, index.size)
+    index.save()
+    return index, status
+
+
+def _subtract_present(present: Dict[str, int], path: str, offset: int, end: int) -> Dict[str, int]:
+    """読み直す範囲 [offset, end) の分を列ごとの値のある行数から引く"""
+    counts = dict(present)
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(end - offset)
+    if data:
+        _, _, nonempty = _scan_lines(data)
+        for name, count in zip(_VALUE_NAMES, nonempty.sum(axis=0).tolist()):
+            counts[name] -= count
+    return counts
+
+
+def _index_rows(index: FileIndex, read_size: int):
+    """index.size から後ろの完全な行を読んでブロックを追加する"""
+    blocks = index.blocks
+    present = np.array([index.present[name] for name in _VALUE_NAMES], dtype=np.int64)
+    with open(index.path, 'rb') as f:
+        f.seek(index.size)
+        while True:
+            data = f.read(read_size)
+            if not data:
+                break
+            last_newline = data.rfind(b'\n')
+            if last_newline < 0:
+                if len(data) < read_size:
+                    break  # 書き込み途中の最後の行
+                raise ValueError(f"行が長すぎます: {index.path}")
+            if last_newline + 1 < len(data):
+                f.seek(index.size + last_newline + 1)
+                data = data[:last_newline + 1]
+            starts, timestamps, nonempty = _scan_lines(data)
+            present += nonempty.sum(axis=0)
+            row_numbers = index.rows + np.arange(len(starts))
+            block_ids = row_numbers // index.block_rows
+            splits = np.flatnonzero(np.diff(block_ids)) + 1
+            bounds = np.concatenate([[0], splits])
+            lows = np.minimum.reduceat(timestamps, bounds)
+            highs = np.maximum.reduceat(timestamps, bounds)
+            masks = np.logical_or.reduceat(nonempty, bounds) @ (1 << np.arange(len(_VALUE_NAMES)))
+            counts = np.diff(np.concatenate([bounds, [len(starts)]]))
+            for j, first in enumerate(bounds.tolist()):
+                if blocks and index.rows and row_numbers[first] % index.block_rows:
+                    # 前のチャンクから続くブロックに合流する
+                    block = blocks[-1]
+                    block[1] += int(counts[j])
+                    block[2] = min(block[2], int(lows[j]))
+                    block[3] = max(block[3], int(highs[j]))
+                    block[4] |= int(masks[j])
+                else:
+                    blocks.append([index.size + int(starts[first]), int(counts[j]),
+                                   int(lows[j]), int(highs[j]), int(masks[j])])
+            index.rows += len(starts)
+            index.size += len(data)
+    index.present = {name: int(count) for name, count in zip(_VALUE_NAMES, present)}
+
+
+def _scan_lines(data: bytes) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """完全な行だけのバイト列から (行の先頭位置, timestamp, 値のある列) を求める"""
+    buf = np.frombuffer(data, dtype=np.uint8)
+    separators = np.flatnonzero((buf == _COMMA) | (buf == _NEWLINE))
+    rows = len(separators) // _FIELD_COUNT
+    if rows * _FIELD_COUNT != len(separators):
+        raise ValueError("列の数が合わない行があります")
+    separators = separators.reshape(rows, _FIELD_COUNT)
+    if rows and not (buf[separators[:, -1]] == _NEWLINE).all():
+        raise ValueError("列の数が合わない行があります")
+    starts = np.empty(rows, dtype=np.int64)
+    if rows:
+        starts[0] = 0
+        starts[1:] = separators[:-1, -1] + 1
+
+    # 行の先頭から最初の ',' までの数字を整数として読む
+    ends = separators[:, 0]
+    width = int((ends - starts).max()) if rows else 0
+    if width > 18:
+        raise ValueError("timestamp が長すぎます")
+    timestamps = np.zeros(rows, dtype=np.int64)
+    for k in range(width):
+        position = starts + k
+        valid = position < ends
+        digits = buf[np.where(valid, position, 0)].astype(np.int64) - 48
+        timestamps = np.where(valid, timestamps * 10 + digits, timestamps)
+
+    # 区切りが隣り合う（または行末が '\r\n' だけ）の列は空欄
+    field_ends = separators.copy()
+    field_ends[:, -1] -= buf[separators[:, -1] - 1] == _CR
+    field_starts = np.empty_like(separators)
+    field_starts[:, 0] = starts
+    field_starts[:, 1:] = separators[:, :-1] + 1
+    nonempty = field_ends > field_starts
+    value_positions = [_CSV_POSITIONS[name] for name in _VALUE_NAMES]
+    return starts, timestamps, nonempty[:, value_positions]
+
+
+def parse_csv_bytes(data: bytes, names: Sequence[str]) -> Dict[str, np.ndarray]:
+    """ヘッダを含まないCSVの行のバイト列から names の列を型付きの配列で読む
+
+    pyarrow があれば pyarrow.csv で（マルチスレッド・列単位で）変換し、
+    なければ csv モジュールで読んで要求した列だけを変換します。
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        rows = list(csv.reader(io.StringIO(data.decode('utf-8'))))
+        if not rows:
+            return {name: np.empty(0, dtype=_DTYPES[name]) for name in names}
+        return rows_to_columns(rows, names)
+
+    table = pa_csv.read_csv(
+        pa.py_buffer(data),
+        read_options=pa_csv.ReadOptions(column_names=CSV_HEADER),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=list(names),
+            column_types={name: pa.from_numpy_dtype(_DTYPES[name]) for name in names}),
+    )
+    return {name: table.column(name).to_numpy().astype(_DTYPES[name], copy=False)
+            for name in names}
+
+
+def find_files(paths: Sequence[str]) -> List[str]:
+    """ファイル・ディレクトリの指定から sensor_data_ble_*.csv を名前順に列挙"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, 'sensor_data_ble_*.csv')))
+        else:
+            files.append(path)
+    return sorted({f for f in files if not f.endswith(_DERIVED_SUFFIXES)})
+
+
+class Catalog:
+    """複数のCSVファイルの索引をまとめて扱う
+
+    update() で索引を作成・更新し、query() で全ファイルから範囲を読み込みます。
+    """
+
+    def __init__(self, paths: Sequence[str], block_rows: int = DEFAULT_BLOCK_ROWS):
+        self.paths = list(paths)
+        self.block_rows = block_rows
+        self.indexes: List[FileIndex] = []
+        self.errors: Dict[str, str] = {}
+
+    def update(self) -> Dict[str, int]:
+        """索引を作成・更新し、状態ごとのファイル数を返す"""
+        counts = {'created': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+        self.indexes = []
+        self.errors = {}
+        for path in find_files(self.paths):
+            try:
+                index, status = build_index(path, self.block_rows)
+            except (OSError, ValueError) as e:
+                self.errors[path] = str(e)
+                counts['failed'] += 1
+                continue
+            self.indexes.append(index)
+            counts[status] += 1
+        return counts
+
+    def query(self, start: Optional[int] = None, end: Optional[int] = None,
+              names: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """全ファイルから timestamp が [start, end]（ミリ秒）の行を読み込む
+
+        戻り値の 'session' は self.indexes の何番目のファイルの行かを表します。
+        """
+        return self._query([(start, end)], names, daily=False)
+
+    def query_daily(self, start: dtime, end: dtime,
+                    names: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """各ファイルの記録期間の毎日の start〜end（時刻のみ）の行を読み込む"""
+        return self._query([(start, end)], names, daily=True)
+
+    def _query(self, ranges: List[Tuple[Any, Any]], names: Optional[Sequence[str]],
+               daily: bool) -> Dict[str, np.ndarray]:
+        unknown = [name for name in names or () if name not in _DTYPES]
+        if unknown:
+            raise ValueError(f"不明な列です: {', '.join(unknown)}")
+        parts = []
+        for number, index in enumerate(self.indexes):
+            if not index.blocks:
+                continue
+            windows = (_daily_windows(index, *ranges[0]) if daily else ranges)
+            for start, end in windows:
+                columns = index.read(start, end, names)
+                columns['session'] = np.full(len(columns['timestamp']), number, dtype=np.int32)
+                parts.append(columns)
+        if not parts:
+            wanted = ['timestamp'] + [n for n in (names or _VALUE_NAMES) if n != 'timestamp']
+            empty = {name: np.empty(0, dtype=_DTYPES[name]) for name in wanted}
+            empty['session'] = np.empty(0, dtype=np.int32)
+            return empty
+        return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+    def to_dataframe(self, columns: Dict[str, np.ndarray]):
+        """query() の結果を pandas.DataFrame に変換（pandas が必要）"""
+        try:
+            import pandas as pd
+        except ImportError:
+            raise RuntimeError("DataFrame への変換には pandas が必要です: pip install pandas")
+        frame = pd.DataFrame({name: array for name, array in columns.items() if name != 'session'})
+        frame.insert(1, 'datetime', pd.to_datetime(columns['timestamp'], unit='ms'))
+        sessions = [os.path.basename(index.path) for index in self.indexes]
+        frame['session'] = pd.Categorical.from_codes(columns['session'], sessions)
+        return frame
+
+
+def _daily_windows(index: FileIndex, start: dtime, end: dtime) -> Iterator[Tuple[int, int]]:
+    """ファイルの記録期間の各日の start〜end をミリ秒の範囲で返す（end < start なら翌日まで）"""
+    first = datetime.fromtimestamp(index.ts_min / 1000.0).date() - timedelta(days=1)
+    last = datetime.fromtimestamp(index.ts_max / 1000.0).date()
+    day = first
+    while day <= last:
+        low = datetime.combine(day, start)
+        high = datetime.combine(day if end >= start else day + timedelta(days=1), end)
+        if int(high.timestamp() * 1000) >= index.ts_min and int(low.timestamp() * 1000) <= index.ts_max:
+            yield int(low.timestamp() * 1000), int(high.timestamp() * 1000)
+        day += timedelta(days=1)
+
+
+def parse_time(text: str) -> Any:
+    """'YYYY-MM-DD HH:MM[:SS]' または UNIX時刻 (ms) はミリ秒、'HH:MM[:SS]' は時刻 (datetime.time)"""
+    if text.isdigit():
+        return int(text)
+    for fmt in ('%H:%M', '%H:%M:%S', '%H:%M:%S.%f'):
+        try:
+            return datetime.strptime(text, fmt).time()
+        except ValueError:
+            pass
+    for fmt in ('%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d'):
+        try:
+            return int(datetime.strptime(text, fmt).timestamp() * 1000)
+        except ValueError:
+            pass
+    raise ValueError(f"時刻の形式が不正です: {text}")
+
+
+def _format_ms(value: Optional[int]) -> str:
+    if value is None:
+        return '-'
+    return datetime.fromtimestamp(value / 1000.0).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _save_result(path: str, catalog: Catalog, columns: Dict[str, np.ndarray]):
+    if path.endswith('.npz'):
+        sessions = np.array([os.path.basename(index.path) for index in catalog.indexes])
+        np.savez(path, sessions=sessions, **columns)
+        return
+    names = [name for name in columns if name != 'session']
+    sessions = [os.path.basename(index.path) for index in catalog.indexes]
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(names + ['session'])
+        values = [[('' if v != v else v) for v in columns[name].tolist()] for name in names]
+        writer.writerows(list(row) + [sessions[s]]
+                         for row, s in zip(zip(*values), columns['session'].tolist()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="記録済みCSVの索引作成と範囲の読み込み")
+    commands = parser.add_subparsers(dest='command', required=True)
+    for name, text in (('index', "索引を作成・更新する"), ('info', "索引の内容を表示する"),
+                       ('query', "時刻の範囲と列を指定して読み込む")):
+        command = commands.add_parser(name, help=text)
+        command.add_argument('paths', nargs='*', default=['.'],
+                             help="CSVファイルまたはディレクトリ (既定: カレントディレクトリ)")
+        command.add_argument('--block-rows', type=int, default=DEFAULT_BLOCK_ROWS,
+                             help=f"索引のブロックの行数 (既定: {DEFAULT_BLOCK_ROWS})")
+        if name == 'query':
+            command.add_argument('--start', help="開始時刻 (HH:MM[:SS] は各日の時刻、"
+                                                 "'YYYY-MM-DD HH:MM[:SS]' または UNIX時刻 ms)")
+            command.add_argument('--end', help="終了時刻 (--start と同じ形式)")
+            command.add_argument('--columns', help="読み込む列 (カンマ区切り、例: gyro_x,gyro_y,gyro_z)")
+            command.add_argument('--output', help="結果を保存するファイル (.npz または .csv)")
+    args = parser.parse_args()
+
+    catalog = Catalog(args.paths, args.block_rows)
+    start = time.perf_counter()
+    counts = catalog.update()
+    elapsed = time.perf_counter() - start
+    for path, error in catalog.errors.items():
+        print(f"✗ 索引を作成できませんでした: {path}: {error}")
+    if args.command == 'index':
+        print(f"✓ 索引: 作成 {counts['created']}, 更新 {counts['updated']}, "
+              f"変更なし {counts['unchanged']}, 失敗 {counts['failed']} ({elapsed:.2f} s)")
+        return
+
+    if args.command == 'info':
+        for index in catalog.indexes:
+            present = ', '.join(name for name, count in index.present.items() if count)
+            print(f"{index.path}: {index.rows:,} 行, {len(index.blocks)} ブロック, "
+                  f"{_format_ms(index.ts_min)} 〜 {_format_ms(index.ts_max)}")
+            print(f"  値のある列: {present or '-'}")
+        return
+
+    names = [name.strip() for name in args.columns.split(',')] if args.columns else None
+    try:
+        low = parse_time(args.start) if args.start else None
+        high = parse_time(args.end) if args.end else None
+        if isinstance(low, dtime) or isinstance(high, dtime):
+            if not (isinstance(low, dtime) and isinstance(high, dtime)):
+                raise ValueError("時刻だけの指定は --start と --end の両方に必要です")
+            start = time.perf_counter()
+            result = catalog.query_daily(low, high, names)
+        else:
+            start = time.perf_counter()
+            result = catalog.query(low, high, names)
+    except ValueError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    print(f"✓ {len(result['timestamp']):,} 行 ({elapsed:.2f} s)")
+    for number, index in enumerate(catalog.indexes):
+        count = int((result['session'] == number).sum())
+        if count:
+            print(f"  {index.path}: {count:,} 行")
+    if args.output:
+        _save_result(args.output, catalog, result)
+        print(f"✓ 保存しました: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
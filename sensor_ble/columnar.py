@@ -0,0 +1,270 @@
+"""
+列指向のバイナリ記録形式
+
+センサーデータを型付きの列配列（NumPy）に貯め、一定件数ごとに
+まとめて書き出します。CSVより書き込みが速く、ファイルも小さく、
+解析時の読み込みも高速です。
+
+列の型は Android 側の SensorData.kt に合わせています:
+    - timestamp:              int64 (Long)
+    - gps_lat/gps_lon/gps_alt: float64 (Double)
+    - それ以外:               float32 (Float)
+欠損しているセンサーの値は NaN になります。
+
+出力形式:
+    - NpySink:     ディレクトリに列ごとの .npy を追記
+                   （numpy.load(path, mmap_mode='r') でメモリマップ可能）
+    - ParquetSink: row group 単位で Parquet に追記（pyarrow が必要）
+"""
+
+import os
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .csv_sink import CSV_HEADER, DEFAULT_FLUSH_INTERVAL, SENSOR_FIELDS
+from .schema import SensorSample
+
+DEFAULT_CHUNK_ROWS = 4096
+
+_FLOAT64_COLUMNS = ('gps_lat', 'gps_lon', 'gps_alt')
+
+# (列名, 型)。datetime 列は timestamp から復元できるため持たない
+COLUMNS: List[Tuple[str, Any]] = [('timestamp', np.int64)] + [
+    (name, np.float64 if name in _FLOAT64_COLUMNS else np.float32)
+    for name in CSV_HEADER[2:]
+]
+
+# 1行分の構造化 dtype（SensorSample.row() と同じ並び）
+ROW_DTYPE = np.dtype(COLUMNS)
+
+
+class ColumnBuffer:
+    """事前確保した列配列にレコードを貯めるバッファ
+
+    領域は ROW_DTYPE の構造化配列1つで、columns はその列ごとのビューです。
+    SensorSample は1回の代入で1行をまとめて書き込めます。
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CHUNK_ROWS):
+        self.capacity = capacity
+        self.rows = np.empty(capacity, dtype=ROW_DTYPE)
+        self.columns: Dict[str, np.ndarray] = {name: self.rows[name] for name, _ in COLUMNS}
+        self._targets = [self.columns[name] for name, _ in COLUMNS[1:]]
+        self.length = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def full(self) -> bool:
+        return self.length >= self.capacity
+
+    def append(self, data: Dict[str, Any]):
+        """センサーデータ (dict または SensorSample) を1件追加"""
+        i = self.length
+        if type(data) is SensorSample:
+            self.rows[i] = data.row()
+            self.length = i + 1
+            return
+        self.columns['timestamp'][i] = data.get('timestamp', 0)
+        targets = self._targets
+        col = 0
+        for key, fields in SENSOR_FIELDS:
+            group = data.get(key)
+            if group:
+                for field in fields:
+                    value = group.get(field)
+                    targets[col][i] = np.nan if value is None else value
+                    col += 1
+            else:
+                for _ in fields:
+                    targets[col][i] = np.nan
+                    col += 1
+        self.length = i + 1
+
+    def append_columns(self, columns: Dict[str, np.ndarray], start: int, stop: int) -> int:
+        """列配列の [start, stop) を空き容量の範囲でまとめて追加し、追加件数を返す"""
+        count = min(stop - start, self.capacity - self.length)
+        for name, _ in COLUMNS:
+            self.columns[name][self.length:self.length + count] = columns[name][start:start + count]
+        self.length += count
+        return count
+
+    def view(self) -> Dict[str, np.ndarray]:
+        """有効部分の列ビュー（コピーしない）"""
+        return {name: array[:self.length] for name, array in self.columns.items()}
+
+    def clear(self):
+        self.length = 0
+
+
+class _ColumnarSink(ABC):
+    """列指向シンクの共通部分（CsvSink と同じインターフェース）
+
+    サブクラスは open()・_write_chunk()・_close() で出力先を実装します。
+    """
+
+    def __init__(self, path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.buffer = ColumnBuffer(chunk_rows)
+        self.segments: List[str] = [path]
+        self.row_count = 0
+        self.flush_count = 0
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    @abstractmethod
+    def open(self):
+        """出力先を作成する"""
+
+    def write(self, data: Dict[str, Any]):
+        """センサーデータを1件追加（バッファが満杯なら書き出し）"""
+        with self._lock:
+            self.buffer.append(data)
+            self.row_count += 1
+            if self.buffer.full:
+                self._flush()
+
+    def write_columns(self, columns: Dict[str, np.ndarray]):
+        """列配列をまとめて追加（CSVからの変換などで使用）"""
+        total = len(columns['timestamp'])
+        with self._lock:
+            start = 0
+            while start < total:
+                start += self.buffer.append_columns(columns, start, total)
+                if self.buffer.full:
+                    self._flush()
+            self.row_count += total
+
+    def flush_if_due(self):
+        """前回の書き出しから flush_interval 以上経過していれば書き出し"""
+        with self._lock:
+            if (len(self.buffer) and
+                    time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush()
+
+    def close(self):
+        with self._lock:
+            if len(self.buffer):
+                self._flush()
+            self._close()
+
+    def _flush(self):
+        self._write_chunk(self.buffer.view())
+        self.buffer.clear()
+        self.flush_count += 1
+        self._last_flush = time.monotonic()
+
+    @abstractmethod
+    def _write_chunk(self, columns: Dict[str, np.ndarray]):
+        """バッファの列配列（コピーではなくビュー）を書き出す"""
+
+    @abstractmethod
+    def _close(self):
+        """出力先を閉じる"""
+
+
+class NpySink(_ColumnarSink):
+    """列ごとの .npy ファイルに追記するシンク
+
+    .npy のヘッダは固定長で確保しておき、書き出しのたびに件数を
+    更新します。途中で異常終了しても書き出し済みの行は読み込めます。
+    """
+
+    HEADER_SIZE = 128
+
+    def __init__(self, path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        super().__init__(path, chunk_rows, flush_interval)
+        self._files: Dict[str, Any] = {}
+        self._written = 0
+
+    def open(self):
+        os.makedirs(self.path, exist_ok=True)
+        for name, dtype in COLUMNS:
+            f = open(os.path.join(self.path, f"{name}.npy"), 'wb')
+            f.write(_npy_header(np.dtype(dtype), 0, self.HEADER_SIZE))
+            self._files[name] = f
+
+    def _write_chunk(self, columns: Dict[str, np.ndarray]):
+        self._written += len(columns['timestamp'])
+        for name, dtype in COLUMNS:
+            f = self._files[name]
+            f.write(columns[name].tobytes())
+            # 件数を更新したヘッダで先頭を上書き
+            f.seek(0)
+            f.write(_npy_header(np.dtype(dtype), self._written, self.HEADER_SIZE))
+            f.seek(0, os.SEEK_END)
+            f.flush()
+
+    def _close(self):
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+
+class ParquetSink(_ColumnarSink):
+    """row group 単位で Parquet に追記するシンク（pyarrow が必要）"""
+
+    def __init__(self, path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 compression: str = 'zstd'):
+        super().__init__(path, chunk_rows, flush_interval)
+        self.compression = compression
+        self._writer = None
+        self._pa = None
+
+    def open(self):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet出力には pyarrow が必要です: pip install pyarrow")
+        self._pa = pa
+        schema = pa.schema([(name, pa.from_numpy_dtype(dtype)) for name, dtype in COLUMNS])
+        self._writer = pq.ParquetWriter(self.path, schema, compression=self.compression)
+
+    def _write_chunk(self, columns: Dict[str, np.ndarray]):
+        pa = self._pa
+        # NaN は Parquet 上では null として保存する
+        arrays = [
+            pa.array(columns[name], from_pandas=name != 'timestamp')
+            for name, _ in COLUMNS
+        ]
+        table = pa.Table.from_arrays(arrays, names=[name for name, _ in COLUMNS])
+        self._writer.write_table(table)
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def load_npy(path: str, mmap: bool = True) -> Dict[str, np.ndarray]:
+    """NpySink で記録したディレクトリを列配列として読み込む"""
+    mode: Optional[str] = 'r' if mmap else None
+    return {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+        for name, _ in COLUMNS
+    }
+
+
+def _npy_header(dtype: np.dtype, length: int, size: int) -> bytes:
+    """固定長 (size バイト) の .npy v1.0 ヘッダを作成"""
+    header = repr({
+        'descr': np.lib.format.dtype_to_descr(dtype),
+        'fortran_order': False,
+        'shape': (length,),
+    })
+    body_size = size - 10
+    header = header.ljust(body_size - 1) + '\n'
+    if len(header) != body_size:
+        raise ValueError(".npy ヘッダが確保した領域に収まりません")
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', body_size) + header.encode('latin1')
@@ -0,0 +1,106 @@
+"""
+記録済みCSVの列指向形式への変換
+
+使用方法:
+    python3 -m sensor_ble.convert sensor_data_ble_*.csv [--format npy|parquet]
+
+sensor_data_ble_YYYYMMDD_HHMMSS.csv を同じ名前の .npy ディレクトリ
+または .parquet ファイルに変換します。CSVはチャンク単位で読み込み、
+列ごとにまとめて数値へ変換します。
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .columnar import COLUMNS, DEFAULT_CHUNK_ROWS
+from .csv_sink import CSV_HEADER
+from .sinks import create_sink
+
+_VALUE_COLUMNS = [(i, name, dtype) for i, (name, dtype) in
+                  enumerate(COLUMNS[1:], start=2)]
+
+
+def read_csv_chunks(path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[Dict[str, np.ndarray]]:
+    """受信スクリプトが出力したCSVを列配列のチャンクとして読み込む"""
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header != CSV_HEADER:
+            raise ValueError(f"sensor_data_ble 形式のCSVではありません: {path}")
+        rows: List[List[str]] = []
+        for row in reader:
+            rows.append(row)
+            if len(rows) >= chunk_rows:
+                yield rows_to_columns(rows)
+                rows = []
+        if rows:
+            yield rows_to_columns(rows)
+
+
+def rows_to_columns(rows: List[List[str]],
+                    names: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """CSVの行（文字列のリスト）を列配列に変換（names を指定するとその列だけ）"""
+    # 列単位に転置してから変換する（空欄は NaN）
+    transposed = list(zip(*rows))
+    columns = {}
+    if names is None or 'timestamp' in names:
+        columns['timestamp'] = np.array(transposed[0], dtype=np.int64)
+    for index, name, dtype in _VALUE_COLUMNS:
+        if names is not None and name not in names:
+            continue
+        values = np.array(transposed[index], dtype=object)
+        values[values == ''] = 'nan'
+        columns[name] = values.astype(np.float64).astype(dtype)
+    return columns
+
+
+def load_columns(path: str) -> Dict[str, np.ndarray]:
+    """記録済みの .npy ディレクトリまたはCSVを列配列として読み込む"""
+    if os.path.isdir(path):
+        from .columnar import load_npy
+        return load_npy(path)
+    chunks = list(read_csv_chunks(path))
+    if not chunks:
+        return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name, _ in COLUMNS}
+
+
+def convert_csv(src: str, fmt: str = 'npy') -> str:
+    """CSVファイルを変換し、出力先のパスを返す"""
+    stem, _ = os.path.splitext(src)
+    sink = create_sink(fmt, stem)
+    sink.open()
+    try:
+        for columns in read_csv_chunks(src):
+            sink.write_columns(columns)
+    finally:
+        sink.close()
+    return sink.segments[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="記録済みCSVを列指向形式に変換")
+    parser.add_argument('files', nargs='+', help="sensor_data_ble_*.csv")
+    parser.add_argument('--format', choices=('npy', 'parquet'), default='npy',
+                        help="出力形式 (既定: npy)")
+    args = parser.parse_args()
+
+    for src in args.files:
+        start = time.perf_counter()
+        try:
+            dst = convert_csv(src, args.format)
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"✗ 変換に失敗しました: {src}: {e}")
+            sys.exit(1)
+        elapsed = time.perf_counter() - start
+        print(f"✓ {src} -> {dst} ({elapsed:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
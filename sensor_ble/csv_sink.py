@@ -0,0 +1,219 @@
+"""
+バッファリング付きCSVシンク
+
+1行ごとに flush するのではなく、一定行数または一定時間ごとに
+まとめて書き込みます。ファイルサイズまたは時刻（1時間ごと）で
+ファイルを分割し、閉じたファイルはバックグラウンドスレッドで
+gzip圧縮することもできます。
+
+分割後のファイル名:
+    sensor_data_ble_20250101_120000.csv          # 1つ目
+    sensor_data_ble_20250101_120000_part001.csv  # 2つ目以降
+"""
+
+import csv
+import gzip
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from .schema import FIELD_NAMES, GROUP_BITS, SENSOR_SCHEMA, SensorSample
+
+CSV_HEADER = ['timestamp', 'datetime'] + list(FIELD_NAMES)
+
+# (JSONのキー, フィールド) の順にCSVの列へ展開する
+SENSOR_FIELDS = tuple(
+    (key, tuple(field for field, _, _ in fields)) for key, fields in SENSOR_SCHEMA
+)
+
+DEFAULT_FLUSH_ROWS = 500
+DEFAULT_FLUSH_INTERVAL = 1.0  # 秒
+
+
+def format_datetime(timestamp: int) -> str:
+    """ミリ秒のUNIX時刻をCSV用の日時文字列に変換"""
+    return datetime.fromtimestamp(timestamp / 1000.0).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+
+# 有無ビットマスク → 空欄にする列の位置（初回使用時に作成）
+_blank_columns: Dict[int, Tuple[int, ...]] = {}
+
+
+def sample_to_row(sample: SensorSample) -> List[Any]:
+    """SensorSample をCSVの1行に変換（無いセンサーの列と NaN は空欄）"""
+    timestamp = sample.timestamp
+    # あるセンサーでも欠けたフィールドは NaN なので、write_columns() と同じく空欄にする
+    row = [timestamp, format_datetime(timestamp), *[('' if value != value else value) for value in sample.flat()]]
+    blanks = _blank_columns.get(sample.present)
+    if blanks is None:
+        blanks = _blank_columns[sample.present] = tuple(
+            CSV_HEADER.index(column)
+            for key, fields in SENSOR_SCHEMA if not sample.present & GROUP_BITS[key]
+            for _, column, _ in fields
+        )
+    for index in blanks:
+        row[index] = ''
+    return row
+
+
+def record_to_row(data: Dict[str, Any]) -> List[Any]:
+    """センサーデータ (dict または SensorSample) をCSVの1行に変換"""
+    if type(data) is SensorSample:
+        return sample_to_row(data)
+    timestamp = data.get('timestamp', 0)
+    row = [timestamp, format_datetime(timestamp)]
+    for key, fields in SENSOR_FIELDS:
+        group = data.get(key)
+        if group:
+            row.extend([group.get(field, '') for field in fields])
+        else:
+            row.extend([''] * len(fields))
+    return row
+
+
+class CsvSink:
+    """行をまとめて書き込むCSVシンク（ファイル分割・gzip圧縮対応）"""
+
+    def __init__(self, path: str,
+                 flush_rows: int = DEFAULT_FLUSH_ROWS,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 rotate_bytes: Optional[int] = None,
+                 rotate_hourly: bool = False,
+                 compress: bool = False):
+        self.path = path
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.rotate_hourly = rotate_hourly
+        self.compress = compress
+
+        self._lock = threading.Lock()
+        self._rows: List[List[Any]] = []
+        self._file = None
+        self._writer = None
+        self._last_flush = time.monotonic()
+        self._next_rotation_at: Optional[float] = None
+        self._compressor: Optional[threading.Thread] = None
+        self._compress_queue: "queue.Queue[Optional[int]]" = queue.Queue()
+
+        # 統計
+        self.segments: List[str] = []   # 出力ファイル（圧縮したものは .gz のパス）
+        self.row_count = 0
+        self.flush_count = 0
+
+    def open(self):
+        """最初のファイルを開く"""
+        if self.compress:
+            self._compressor = threading.Thread(
+                target=self._compress_worker, name="csv-gzip", daemon=True)
+            self._compressor.start()
+        self._open_segment()
+
+    def write(self, data: Dict[str, Any]):
+        """センサーデータを1件追加（必要ならフラッシュ・ファイル分割）"""
+        self.write_row(record_to_row(data))
+
+    def write_row(self, row: List[Any]):
+        """変換済みの1行を追加"""
+        with self._lock:
+            if (self._next_rotation_at is not None and
+                    time.time() >= self._next_rotation_at):
+                self._rotate()
+            self._rows.append(row)
+            self.row_count += 1
+            if (len(self._rows) >= self.flush_rows or
+                    time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush()
+
+    def write_columns(self, columns: Dict[str, Any]):
+        """列配列（NumPy）をまとめて追加（NaN は空欄）"""
+        values = [[('' if value != value else value) for value in columns[name].tolist()]
+                  for name in CSV_HEADER[2:]]
+        for timestamp, *row in zip(columns['timestamp'].tolist(), *values):
+            self.write_row([timestamp, format_datetime(timestamp)] + row)
+
+    def flush_if_due(self):
+        """前回のフラッシュから flush_interval 以上経過していればフラッシュ
+
+        データが途切れたときにもバッファが残らないよう、定期的に呼び出します。
+        """
+        with self._lock:
+            if (self._rows and
+                    time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush()
+
+    def close(self):
+        """残りの行を書き込んでファイルを閉じる（圧縮の完了も待つ）
+
+        compress のときは最後のファイルも圧縮し、segments は圧縮後のパスになります。
+        """
+        with self._lock:
+            if self._file is not None:
+                self._flush(rotate=False)
+                self._close_segment()
+        if self._compressor is not None:
+            self._compress_queue.put(None)
+            self._compressor.join()
+            self._compressor = None
+
+    def _segment_path(self, index: int) -> str:
+        if index == 0:
+            return self.path
+        stem, ext = os.path.splitext(self.path)
+        return f"{stem}_part{index:03d}{ext}"
+
+    def _open_segment(self):
+        path = self._segment_path(len(self.segments))
+        # 行のバッファリングはこのクラスで行うため、ファイル側も大きめに確保
+        self._file = open(path, 'w', newline='', encoding='utf-8', buffering=1 << 16)
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(CSV_HEADER)
+        self.segments.append(path)
+        if self.rotate_hourly:
+            next_hour = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+            self._next_rotation_at = next_hour.timestamp()
+
+    def _close_segment(self):
+        self._file.close()
+        self._file = None
+        self._writer = None
+        if self.compress:
+            self._compress_queue.put(len(self.segments) - 1)
+
+    def _rotate(self):
+        self._flush(rotate=False)
+        self._close_segment()
+        self._open_segment()
+
+    def _flush(self, rotate: bool = True):
+        if self._rows:
+            self._writer.writerows(self._rows)
+            self._rows.clear()
+        self._file.flush()
+        self.flush_count += 1
+        self._last_flush = time.monotonic()
+        if (rotate and self.rotate_bytes is not None and
+                self._file.tell() >= self.rotate_bytes):
+            self._close_segment()
+            self._open_segment()
+
+    def _compress_worker(self):
+        while True:
+            index = self._compress_queue.get()
+            if index is None:
+                break
+            path = self.segments[index]
+            try:
+                with open(path, 'rb') as src, gzip.open(path + '.gz', 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(path)
+            except OSError as e:
+                print(f"✗ gzip圧縮に失敗しました: {path}: {e}")
+                continue
+            # 実際にあるファイルを表示できるよう、圧縮後のパスに置き換える
+            with self._lock:
+                self.segments[index] = path + '.gz'
@@ -0,0 +1,253 @@
+"""
+一定間隔で更新するコンソールダッシュボード
+
+レコードごとに何行も表示する代わりに、受信したレコードを集計だけして
+おき、refresh_hz の間隔で次の内容を1回の書き込みで描画します:
+    - センサーごとの最新値・受信レート
+    - 直近 window 秒の最小 / 最大 / 平均
+    - 受信数・ドロップ数・パースエラー数（パイプラインの統計）
+    - 端末のタイムスタンプから受信までの遅延（端末とPCの時計のずれを含む）
+
+update() は表示ステージのスレッドから、run() はイベントループから呼びます。
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import unicodedata
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, TextIO, Tuple
+
+from .csv_sink import SENSOR_FIELDS
+from .schema import as_sample
+
+DEFAULT_REFRESH_HZ = 5.0
+DEFAULT_WINDOW = 5.0  # 秒
+_BUCKETS_PER_WINDOW = 10
+
+SENSOR_LABELS = {
+    'accelerometer': '加速度',
+    'gyroscope': 'ジャイロ',
+    'light': '光',
+    'gps': 'GPS',
+    'magnetometer': '磁気',
+    'proximity': '近接',
+    'gravity': '重力',
+}
+
+
+# Metrics のヒストグラム名と表示名（表示する順）
+STAGE_LABELS = (
+    ('queue_wait', '待ち'),
+    ('reassemble', '再構築'),
+    ('decode', 'デコード'),
+    ('sink-0', '保存'),
+    ('display-0', '表示'),
+    ('receive_to_sink-0', '受信→保存'),
+)
+
+# 小数点以下6桁で表示するフィールド（緯度・経度）
+_PRECISE_FIELDS = {('gps', 'latitude'), ('gps', 'longitude')}
+
+
+def _pad(text: str, width: int) -> str:
+    """全角文字を2桁として数え、表示幅が width になるよう右側を空白で埋める"""
+    display = sum(2 if unicodedata.east_asian_width(c) in 'WF' else 1 for c in text)
+    return text + ' ' * max(0, width - display)
+
+
+def _number(value: Any, fmt: str) -> str:
+    """12桁で数値を表示（数値でなければ '-'）"""
+    try:
+        return f"{value:>12{fmt}}"
+    except (TypeError, ValueError):
+        return f"{'-':>12}"
+
+
+class WindowStats:
+    """直近 window 秒の件数・最小・最大・平均（時間バケットで集計）
+
+    window を _BUCKETS_PER_WINDOW 個のバケットに分け、現在のバケットには
+    値をそのまま貯めておき、バケットが切り替わるときにまとめて
+    件数・合計・最小・最大に集約します。1件ごとの処理は追加だけです。
+    """
+
+    def __init__(self, fields: int, window: float = DEFAULT_WINDOW):
+        self.fields = fields
+        self.window = window
+        self.bucket_span = window / _BUCKETS_PER_WINDOW
+        # 集約済みのバケット: (開始時刻, 件数, 合計, 最小, 最大)
+        self._buckets: Deque[Tuple[float, int, List[float], List[float], List[float]]] = deque()
+        self._rows: List[Tuple[float, ...]] = []
+        self._start = float('-inf')
+        self.latest: Optional[Tuple[float, ...]] = None
+        self.total = 0
+
+    def add(self, now: float, values: Tuple[float, ...]):
+        if now - self._start >= self.bucket_span:
+            self._close_bucket()
+            self._start = now
+            while self._buckets and now - self._buckets[0][0] > self.window:
+                self._buckets.popleft()
+        self._rows.append(values)
+        self.latest = values
+        self.total += 1
+
+    def _aggregate(self):
+        """現在のバケットを集約する（数値でない値が混ざっていれば None）"""
+        columns = list(zip(*self._rows))
+        try:
+            return (self._start, len(self._rows), [sum(c) for c in columns],
+                    [min(c) for c in columns], [max(c) for c in columns])
+        except TypeError:
+            return None
+
+    def _close_bucket(self):
+        if self._rows:
+            bucket = self._aggregate()
+            if bucket is not None:
+                self._buckets.append(bucket)
+            self._rows = []
+
+    def summary(self, now: float):
+        """(レート Hz, [(最小, 最大, 平均), ...]) を返す。window 内にデータがなければ None"""
+        buckets = [b for b in self._buckets if now - b[0] <= self.window]
+        current = self._aggregate() if self._rows else None
+        if current is not None:
+            buckets.append(current)
+        count = sum(b[1] for b in buckets)
+        if not count:
+            return None
+        span = max(now - buckets[0][0], self.bucket_span)
+        stats = [
+            (min(b[3][i] for b in buckets), max(b[4][i] for b in buckets),
+             sum(b[2][i] for b in buckets) / count)
+            for i in range(self.fields)
+        ]
+        return count / span, stats
+
+
+class Dashboard:
+    """集計したセンサーデータを一定間隔で描画するダッシュボード
+
+    stats_provider はパイプラインの統計 (IngestPipeline.stats() と同じキー)
+    を返す関数です。metrics（sensor_ble.metrics.Metrics）を指定すると
+    段階ごとの処理時間も表示します。
+    """
+
+    def __init__(self, refresh_hz: float = DEFAULT_REFRESH_HZ,
+                 window: float = DEFAULT_WINDOW,
+                 stats_provider: Optional[Callable[[], Dict[str, int]]] = None,
+                 title: str = "Sensor BLE",
+                 stream: Optional[TextIO] = None,
+                 metrics: Optional[Any] = None):
+        self.interval = 1.0 / refresh_hz
+        self.window = window
+        self.stats_provider = stats_provider
+        self.metrics = metrics
+        self.title = title
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+        self._sensors: Dict[str, WindowStats] = {
+            key: WindowStats(len(fields), window) for key, fields in SENSOR_FIELDS
+        }
+        self._latency = WindowStats(1, window)
+        self._devices: Dict[str, WindowStats] = {}
+        self._lines = 0
+        self.record_count = 0
+        self.frame_count = 0
+
+    def update(self, data: Dict[str, Any]):
+        """レコードを1件集計する（表示ステージのハンドラ）"""
+        now = time.monotonic()
+        with self._lock:
+            self.record_count += 1
+            # SensorSample.group() は float だけのタプルを返すため
+            # （GCの追跡対象から外れ）、大量に貯めても負担にならない
+            sample = as_sample(data)
+            for key, window in self._sensors.items():
+                values = sample.group(key)
+                if values is not None:
+                    window.add(now, values)
+            timestamp = sample.timestamp
+            if timestamp:
+                self._latency.add(now, (time.time() * 1000.0 - timestamp,))
+            device = sample.device
+            if device is not None:
+                window = self._devices.get(device)
+                if window is None:
+                    window = self._devices[device] = WindowStats(0, self.window)
+                window.add(now, ())
+
+    async def run(self):
+        """refresh_hz の間隔で描画を続ける（キャンセルされるまで）"""
+        while True:
+            self.draw()
+            await asyncio.sleep(self.interval)
+
+    def draw(self):
+        """現在の集計を1回の書き込みで描画"""
+        frame = self.render()
+        prefix = ''
+        if self.stream.isatty() and self._lines:
+            # 前回のフレームの先頭に戻って上書きする
+            prefix = f"\x1b[{self._lines}F\x1b[J"
+        self.stream.write(prefix + frame)
+        self.stream.flush()
+        self._lines = frame.count('\n')
+        self.frame_count += 1
+
+    def render(self) -> str:
+        now = time.monotonic()
+        stats = self.stats_provider() if self.stats_provider is not None else {}
+        with self._lock:
+            sensors = [(key, fields, self._sensors[key].latest, self._sensors[key].summary(now))
+                       for key, fields in SENSOR_FIELDS]
+            latency = self._latency.summary(now)
+            devices = [(address, window.summary(now)) for address, window in self._devices.items()]
+            record_count = self.record_count
+
+        lines = [
+            f"=== {self.title} ダッシュボード "
+            f"(更新 {1.0 / self.interval:.0f} Hz, 集計 {self.window:.0f} 秒) "
+            f"{datetime.now().strftime('%H:%M:%S')} ===",
+            f"受信データ数: {record_count:,}  "
+            f"Notification数: {stats.get('received', 0):,}  "
+            f"ドロップ数: {stats.get('dropped_raw', 0):,}  "
+            f"パースエラー数: {stats.get('parse_errors', 0):,}  "
+            f"表示の間引き: {sum(v for k, v in stats.items() if k.startswith('dropped_display')):,}",
+        ]
+        if latency is not None:
+            _, ((low, high, mean),) = latency
+            lines.append(f"遅延 (端末→PC): 平均 {mean:.1f} ms  最小 {low:.1f} ms  最大 {high:.1f} ms")
+        else:
+            lines.append("遅延 (端末→PC): -")
+        if self.metrics is not None:
+            stages = []
+            for name, label in STAGE_LABELS:
+                histogram = self.metrics.histograms.get(name)
+                if histogram is not None and histogram.count:
+                    stages.append(f"{label} {histogram.quantile(0.5) * 1e3:.2f}/"
+                                  f"{histogram.quantile(0.99) * 1e3:.2f}")
+            lines.append("処理時間 p50/p99 (ms): " + ("  ".join(stages) or "-"))
+        for address, summary in devices:
+            rate = summary[0] if summary is not None else 0.0
+            lines.append(f"デバイス {address}: {rate:.1f} Hz")
+
+        lines.append(f"{_pad('センサー', 10)}{'Hz':>7}  {_pad('項目', 10)}"
+                     f"{'最新':>10}{'最小':>10}{'最大':>10}{'平均':>10}")
+        for key, fields, latest, summary in sensors:
+            label = SENSOR_LABELS.get(key, key)
+            if summary is None:
+                lines.append(f"{_pad(label, 10)}{'-':>7}")
+                continue
+            rate, field_stats = summary
+            for i, field in enumerate(fields):
+                fmt = '.6f' if (key, field) in _PRECISE_FIELDS else '.3f'
+                low, high, mean = field_stats[i]
+                head = f"{_pad(label, 10)}{rate:>7.1f}" if i == 0 else ' ' * 17
+                lines.append(f"{head}  {field:<10}{_number(latest[i], fmt)}{low:>12{fmt}}"
+                             f"{high:>12{fmt}}{mean:>12{fmt}}")
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,152 @@
+"""
+受信データのデコーダ
+
+IngestPipeline の decode ステージで使用します。どちらのデコーダも
+RawNotification を受け取り、デコード済みのセンサーデータ（dict）の
+リストを返します。
+
+- JsonDecoder:        1 Notification = 1 JSON（app 版）
+- ChunkedJsonDecoder: 分割送信されたJSONを再構築（app_for_m5 版）
+
+どちらも先頭バイトでバイナリ形式（sensor_ble.binary_protocol）を判別し、
+バイナリのNotificationはJSONを介さずにデコードします。ChunkedJsonDecoder は
+再構築中のデータがないとき（フレームの境界）だけ判別します。JSONの途中の
+チャンクは UTF-8 の継続バイト (0x80〜0xBF) で始まることがあるためです。
+
+samples=True を指定すると、dict の代わりに平坦な SensorSample
+（sensor_ble.schema）を返します。出力側はグループの dict をたどらずに
+値を読めます（バイナリ形式では dict を一切作りません）。
+"""
+
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from .binary_protocol import BinaryFrameError, decode_frames, is_binary
+from .pipeline import RawNotification
+from .reassembler import MAX_BUFFER_SIZE, FrameReassembler
+from .schema import sample_from_dict
+
+BUFFER_TIMEOUT_MS = 300  # バッファタイムアウト（ミリ秒）
+
+
+class JsonDecoder:
+    """1つのNotificationを1つのJSONとしてデコード"""
+
+    def __init__(self, samples: bool = False):
+        self.samples = samples
+        self.decoded_count = 0
+        self.error_count = 0
+
+    def reset(self):
+        """状態を持たないため何もしない"""
+
+    def __call__(self, raw: RawNotification) -> List[Dict[str, Any]]:
+        if is_binary(raw.data):
+            return _decode_binary(self, raw.data)
+        try:
+            sensor_data = json.loads(raw.data.decode('utf-8'))
+        except UnicodeDecodeError:
+            self.error_count += 1
+            print(f"✗ 受信データのデコードに失敗しました: {raw.data}")
+            return []
+        except json.JSONDecodeError:
+            self.error_count += 1
+            print(f"✗ JSONのパースに失敗しました: {raw.data}")
+            return []
+        if self.samples:
+            sensor_data = _to_sample(self, sensor_data)
+            if sensor_data is None:
+                return []
+        self.decoded_count += 1
+        return [sensor_data]
+
+
+class ChunkedJsonDecoder:
+    """分割送信されたJSONを再構築してデコード（M5版）"""
+
+    def __init__(self, timeout_ms: float = BUFFER_TIMEOUT_MS,
+                 max_buffer_size: int = MAX_BUFFER_SIZE,
+                 samples: bool = False):
+        self.timeout_ms = timeout_ms
+        self.samples = samples
+        self.reassembler = FrameReassembler(max_buffer_size)
+        self.last_received_at = 0.0
+        self.decoded_count = 0
+        self.error_count = 0
+        self.timeout_count = 0
+        # IngestPipeline に metrics を渡すと設定され、再構築の時間を記録する
+        self.metrics: Optional[Any] = None
+
+    def reset(self):
+        """再構築中のバッファをクリア"""
+        self.reassembler.reset()
+
+    def __call__(self, raw: RawNotification) -> List[Dict[str, Any]]:
+        reassembler = self.reassembler
+
+        # タイムアウトチェック
+        if ((raw.received_at - self.last_received_at) * 1000 > self.timeout_ms and
+                reassembler.pending > 0):
+            print("タイムアウト: 不完全なバッファをクリア")
+            self.timeout_count += 1
+            reassembler.reset()
+        self.last_received_at = raw.received_at
+
+        # バイナリフレームは分割されないため再構築は不要。JSONは任意のバイト位置で
+        # 分割されるため、再構築の途中のチャンクは先頭バイトで判別しない
+        if reassembler.pending == 0 and is_binary(raw.data):
+            return _decode_binary(self, raw.data)
+
+        # バッファサイズ制限（超過時は再構築クラス側でクリアされる）
+        overflow_count = reassembler.overflow_count
+        if self.metrics is None:
+            frames = reassembler.feed(raw.data)
+        else:
+            started = time.perf_counter()
+            frames = reassembler.feed(raw.data)
+            self.metrics.histogram('reassemble').record(time.perf_counter() - started)
+        if reassembler.overflow_count != overflow_count:
+            print(f"警告: バッファサイズ超過 (>{reassembler.max_size} bytes)、クリア")
+
+        records = []
+        for frame in frames:
+            try:
+                sensor_data = json.loads(frame.decode('utf-8'))
+            except UnicodeDecodeError:
+                self.error_count += 1
+                print(f"✗ 受信データのデコードに失敗しました: {frame}")
+                continue
+            except json.JSONDecodeError as e:
+                self.error_count += 1
+                print(f"✗ JSONのパースに失敗しました: {e}")
+                continue
+            if self.samples:
+                sensor_data = _to_sample(self, sensor_data)
+                if sensor_data is None:
+                    continue
+            records.append(sensor_data)
+        self.decoded_count += len(records)
+        return records
+
+
+def _to_sample(decoder, sensor_data: Any) -> Optional[Any]:
+    """JSONの値を SensorSample に変換（センサーデータの形でなければ None）"""
+    try:
+        return sample_from_dict(sensor_data)
+    except AttributeError:
+        decoder.error_count += 1
+        print(f"✗ センサーデータの形式ではありません: {sensor_data!r:.80}")
+        return None
+
+
+def _decode_binary(decoder, data: bytes) -> List[Dict[str, Any]]:
+    """バイナリ形式のNotificationをデコード（decoder の統計を更新）"""
+    try:
+        records = decode_frames(data, decoder.samples)
+    except BinaryFrameError as e:
+        decoder.error_count += 1
+        print(f"✗ バイナリフレームのデコードに失敗しました: {e}")
+        return []
+    decoder.decoded_count += len(records)
+    return records
@@ -0,0 +1,210 @@
+"""
+実機なしで動作する疑似BLEバックエンド
+
+BleakBackend と同じインターフェース（discover / find_device / client）で、
+疑似デバイスがNotificationを送信します。
+
+- FakeBackend:   N台の疑似デバイスが合成センサーデータを一定レートで送信
+                 （chunked=True なら app_for_m5 と同じく244バイトに分割）
+- ReplayBackend: Notification記録ファイル (sensor_ble.capture) を
+                 記録時と同じ間隔（または speed 倍速）で再生
+
+    backend = FakeBackend(devices=3, rate_hz=50, chunked=True)
+    supervisor = MultiDeviceSupervisor(..., backend=backend)
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from .binary_protocol import encode_frame
+from .ble import CHARACTERISTIC_UUID
+from .capture import iter_capture
+from .synthetic import M5_CHUNK_SIZE, encode_json, make_sample, split_chunks
+
+# (送信開始からの経過秒, Notificationの内容) の列
+NotificationSource = Iterator[Tuple[float, bytes]]
+
+# 送信が遅れているときでも他のタスクを動かすため、この件数ごとに制御を返す
+_YIELD_EVERY = 64
+
+
+class FakeDevice:
+    """疑似デバイス（BLEDevice の代わり）"""
+
+    def __init__(self, address: str, name: str):
+        self.address = address
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"FakeDevice({self.address})"
+
+
+class FakeClient:
+    """BleakClient の代わりに source の内容をNotificationするクライアント"""
+
+    def __init__(self, device: FakeDevice, source_factory: Callable[[], NotificationSource],
+                 disconnected_callback: Optional[Callable[[Any], None]] = None):
+        self.device = device
+        self.address = device.address
+        self.mtu_size = 247
+        self._source_factory = source_factory
+        self._disconnected_callback = disconnected_callback
+        self._task: Optional[asyncio.Task] = None
+        self._connected = False
+        self.sent_count = 0
+        self.finished = False
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected
+
+    async def connect(self):
+        self._connected = True
+
+    async def disconnect(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._connected:
+            self._connected = False
+            if self._disconnected_callback is not None:
+                self._disconnected_callback(self)
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.disconnect()
+
+    async def start_notify(self, characteristic: str, callback: Callable[[Any, bytearray], None]):
+        if characteristic.lower() != CHARACTERISTIC_UUID.lower():
+            raise ValueError(f"未知のキャラクタリスティックです: {characteristic}")
+        self._task = asyncio.ensure_future(self._emit(characteristic, callback))
+
+    async def stop_notify(self, characteristic: str):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _emit(self, characteristic: str, callback: Callable[[Any, bytearray], None]):
+        start = time.monotonic()
+        for offset, payload in self._source_factory():
+            wait = start + offset - time.monotonic()
+            if wait > 0.001:
+                await asyncio.sleep(wait)
+            elif self.sent_count % _YIELD_EVERY == 0:
+                # 送信が予定より遅れている場合はまとめて送る
+                await asyncio.sleep(0)
+            callback(characteristic, bytearray(payload))
+            self.sent_count += 1
+        # 送信し終えたら切断されたものとして扱う
+        self.finished = True
+        self._task = None
+        await self.disconnect()
+
+
+def synthetic_source(rate_hz: float, samples: Optional[int] = None, chunked: bool = False,
+                     chunk_size: int = M5_CHUNK_SIZE, binary: bool = False,
+                     seed: Any = 0) -> NotificationSource:
+    """合成センサーデータを rate_hz で送信する source
+
+    タイムスタンプは送信開始時の現在時刻から始まるため、実機と同じように
+    端末→PC の遅延を計算できます。
+    """
+    rng = random.Random(seed)
+    start_ms = int(time.time() * 1000)
+    index = 0
+    while samples is None or index < samples:
+        data = make_sample(index, rng, rate_hz, start_ms)
+        offset = index / rate_hz
+        if binary:
+            yield offset, encode_frame(data)
+        else:
+            payload = encode_json(data)
+            for chunk in (split_chunks(payload, chunk_size) if chunked else [payload]):
+                yield offset, chunk
+        index += 1
+
+
+def replay_source(path: str, speed: float = 1.0) -> NotificationSource:
+    """記録ファイルを記録時の間隔で再生する source（speed=0 なら待たずに送信）"""
+    first: Optional[float] = None
+    for received_at, data in iter_capture(path):
+        if first is None:
+            first = received_at
+        yield ((received_at - first) / speed if speed > 0 else 0.0), data
+
+
+class FakeBackend:
+    """N台の疑似デバイスを提供するバックエンド
+
+    samples を指定すると、各デバイスはその件数を送信した後に切断し、
+    以降はスキャンで見つからなくなります。
+    """
+
+    def __init__(self, devices: int = 1, rate_hz: float = 50.0, chunked: bool = False,
+                 samples: Optional[int] = None, binary: bool = False):
+        self.devices = [FakeDevice(f"FA:KE:00:00:00:{i:02X}", f"FakeSensor{i}")
+                        for i in range(devices)]
+        self.rate_hz = rate_hz
+        self.chunked = chunked
+        self.samples = samples
+        self.binary = binary
+        self.clients: List[FakeClient] = []
+
+    async def discover(self, timeout: float = 5.0, service_uuid: str = "") -> List[FakeDevice]:
+        await asyncio.sleep(0)
+        finished = {c.address for c in self.clients if c.finished}
+        return [d for d in self.devices if d.address not in finished]
+
+    async def find_device(self, timeout: float = 10.0,
+                          service_uuid: str = "") -> Optional[FakeDevice]:
+        devices = await self.discover(timeout, service_uuid)
+        return devices[0] if devices else None
+
+    def client(self, device: FakeDevice,
+               disconnected_callback: Optional[Callable[[Any], None]] = None) -> FakeClient:
+        client = FakeClient(
+            device,
+            lambda: synthetic_source(self.rate_hz, self.samples, self.chunked,
+                                     binary=self.binary, seed=device.address),
+            disconnected_callback)
+        self.clients.append(client)
+        return client
+
+
+class ReplayBackend:
+    """Notification記録ファイルを再生する1台の疑似デバイス
+
+    再生し終えると exhausted が True になり、ReconnectingSession は
+    再接続せずに終了します。
+    """
+
+    def __init__(self, path: str, speed: float = 1.0):
+        self.path = path
+        self.speed = speed
+        self.device = FakeDevice("RE:PL:AY:00:00:00", f"Replay({path})")
+        self.clients: List[FakeClient] = []
+
+    @property
+    def exhausted(self) -> bool:
+        return any(c.finished for c in self.clients)
+
+    async def discover(self, timeout: float = 5.0, service_uuid: str = "") -> List[FakeDevice]:
+        await asyncio.sleep(0)
+        return [] if self.exhausted else [self.device]
+
+    async def find_device(self, timeout: float = 10.0,
+                          service_uuid: str = "") -> Optional[FakeDevice]:
+        devices = await self.discover(timeout, service_uuid)
+        return devices[0] if devices else None
+
+    def client(self, device: FakeDevice,
+               disconnected_callback: Optional[Callable[[Any], None]] = None) -> FakeClient:
+        client = FakeClient(device, lambda: replay_source(self.path, self.speed),
+                            disconnected_callback)
+        self.clients.append(client)
+        return client
@@ -0,0 +1,312 @@
+"""
+スライディングウィンドウの特徴量計算
+
+加速度・ジャイロ・磁気・重力から、window サンプルのウィンドウを
+hop サンプルずつずらしながら特徴量を計算します。
+
+    - magnitude:   各センサーのノルムの平均（加速度は標準偏差も）
+    - rms:         加速度・ジャイロの軸ごとの RMS とノルムの RMS
+    - jerk:        加速度の時間微分（ジャーク）のノルムの平均・RMS
+    - fft:         加速度ノルム（平均を除去、Hann窓）の周波数帯ごとのエネルギー
+    - orientation: 重力から roll / pitch、磁気から方位（度）
+
+FeatureEngine は受信したレコードを Python のリストに貯め、最初は window 件、
+以降は hop 件ごとに NumPy のリングバッファへまとめて書き込んでから
+1ウィンドウ分をベクトル演算で計算します（1サンプルごとの NumPy 演算はしません）。
+compute_windows() は記録済みの列配列から全ウィンドウをまとめて計算します。
+どちらもウィンドウの開始位置は 0, hop, 2*hop, ... で、window が hop で
+割り切れなくても同じ行が得られます。
+欠けているセンサーの値は直前の値で補います。
+
+使用方法（記録済みファイルから計算）:
+    python3 -m sensor_ble.features sensor_data_ble_*.csv [--window 256] [--hop 64]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from .convert import load_columns
+from .csv_sink import DEFAULT_FLUSH_INTERVAL
+from .schema import as_sample
+
+DEFAULT_WINDOW = 256
+DEFAULT_HOP = 64
+# 周波数帯 (下限 Hz, 上限 Hz)
+DEFAULT_BANDS: Tuple[Tuple[float, float], ...] = ((0.5, 3.0), (3.0, 8.0), (8.0, 15.0), (15.0, 25.0))
+FEATURE_GROUPS = ('magnitude', 'rms', 'jerk', 'fft', 'orientation')
+
+# 特徴量の計算に使うセンサー（JSONのキー, 列名の接頭辞）
+_SENSORS = (
+    ('accelerometer', 'accel'),
+    ('gyroscope', 'gyro'),
+    ('magnetometer', 'magnet'),
+    ('gravity', 'gravity'),
+)
+CHANNELS = ('timestamp',) + tuple(f"{prefix}_{axis}" for _, prefix in _SENSORS for axis in 'xyz')
+
+_TS = 0
+_ACCEL = slice(1, 4)
+_GYRO = slice(4, 7)
+_MAGNET = slice(7, 10)
+_GRAVITY = slice(10, 13)
+
+# バッチ計算で一度に処理するウィンドウ数（メモリ使用量の上限）
+_BATCH_WINDOWS = 2048
+
+
+def feature_names(groups: Sequence[str] = FEATURE_GROUPS,
+                  bands: Sequence[Tuple[float, float]] = DEFAULT_BANDS) -> List[str]:
+    """compute_features() が返す特徴量の列名（timestamp を除く）"""
+    names: List[str] = []
+    if 'magnitude' in groups:
+        names += ['accel_mag_mean', 'accel_mag_std', 'gyro_mag_mean', 'magnet_mag_mean']
+    if 'rms' in groups:
+        names += [f"{prefix}_rms_{axis}" for prefix in ('accel', 'gyro') for axis in 'xyz']
+        names += ['accel_mag_rms', 'gyro_mag_rms']
+    if 'jerk' in groups:
+        names += ['jerk_mean', 'jerk_rms']
+    if 'fft' in groups:
+        names += [f"accel_band_{low:g}_{high:g}hz" for low, high in bands]
+    if 'orientation' in groups:
+        names += ['roll_deg', 'pitch_deg', 'heading_deg']
+    return names
+
+
+def compute_features(windows: np.ndarray,
+                     groups: Sequence[str] = FEATURE_GROUPS,
+                     bands: Sequence[Tuple[float, float]] = DEFAULT_BANDS) -> Dict[str, np.ndarray]:
+    """(ウィンドウ数, window, len(CHANNELS)) の配列から特徴量を計算
+
+    戻り値は 列名 → (ウィンドウ数,) の配列。'timestamp' は各ウィンドウの最後の時刻です。
+    """
+    ts = windows[:, :, _TS]
+    accel = windows[:, :, _ACCEL]
+    size = windows.shape[1]
+    out: Dict[str, np.ndarray] = {'timestamp': ts[:, -1]}
+    accel_mag = np.sqrt(np.einsum('nwc,nwc->nw', accel, accel))
+
+    if 'magnitude' in groups or 'rms' in groups:
+        gyro = windows[:, :, _GYRO]
+        gyro_mag = np.sqrt(np.einsum('nwc,nwc->nw', gyro, gyro))
+    if 'magnitude' in groups:
+        magnet = windows[:, :, _MAGNET]
+        out['accel_mag_mean'] = accel_mag.mean(axis=1)
+        out['accel_mag_std'] = accel_mag.std(axis=1)
+        out['gyro_mag_mean'] = gyro_mag.mean(axis=1)
+        out['magnet_mag_mean'] = np.sqrt(np.einsum('nwc,nwc->nw', magnet, magnet)).mean(axis=1)
+    if 'rms' in groups:
+        for prefix, data in (('accel', accel), ('gyro', gyro)):
+            rms = np.sqrt(np.mean(data * data, axis=1))
+            for i, axis in enumerate('xyz'):
+                out[f"{prefix}_rms_{axis}"] = rms[:, i]
+        out['accel_mag_rms'] = np.sqrt(np.mean(accel_mag * accel_mag, axis=1))
+        out['gyro_mag_rms'] = np.sqrt(np.mean(gyro_mag * gyro_mag, axis=1))
+    if 'jerk' in groups:
+        dt = np.diff(ts, axis=1) / 1000.0
+        dt[dt <= 0] = np.nan
+        jerk = np.diff(accel, axis=1) / dt[:, :, None]
+        jerk_mag = np.sqrt(np.einsum('nwc,nwc->nw', jerk, jerk))
+        out['jerk_mean'] = np.nanmean(jerk_mag, axis=1)
+        out['jerk_rms'] = np.sqrt(np.nanmean(jerk_mag * jerk_mag, axis=1))
+    if 'fft' in groups:
+        # サンプリング周波数はウィンドウ内のタイムスタンプから求める
+        span = (ts[:, -1] - ts[:, 0]) / 1000.0
+        fs = np.where(span > 0, (size - 1) / np.where(span > 0, span, 1.0), np.nan)
+        signal = (accel_mag - accel_mag.mean(axis=1, keepdims=True)) * np.hanning(size)
+        power = np.abs(np.fft.rfft(signal, axis=1)) ** 2 / size
+        freqs = np.arange(power.shape[1])[None, :] * (fs[:, None] / size)
+        for low, high in bands:
+            mask = (freqs >= low) & (freqs < high)
+            out[f"accel_band_{low:g}_{high:g}hz"] = np.where(mask, power, 0.0).sum(axis=1)
+    if 'orientation' in groups:
+        gx, gy, gz = windows[:, :, _GRAVITY].mean(axis=1).T
+        mx, my, mz = windows[:, :, _MAGNET].mean(axis=1).T
+        roll = np.arctan2(gy, gz)
+        pitch = np.arctan2(-gx, np.sqrt(gy * gy + gz * gz))
+        # 傾きを補正した磁気ベクトルから方位を求める
+        hx = mx * np.cos(pitch) + mz * np.sin(pitch)
+        hy = mx * np.sin(roll) * np.sin(pitch) + my * np.cos(roll) - mz * np.sin(roll) * np.cos(pitch)
+        out['roll_deg'] = np.degrees(roll)
+        out['pitch_deg'] = np.degrees(pitch)
+        out['heading_deg'] = np.degrees(np.arctan2(-hy, hx)) % 360.0
+    return out
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """各列の NaN を直前の値で埋める（先頭の NaN は残る）"""
+    mask = np.isnan(values)
+    if not mask.any():
+        return values
+    index = np.where(mask, 0, np.arange(len(values))[:, None])
+    np.maximum.accumulate(index, axis=0, out=index)
+    return values[index, np.arange(values.shape[1])]
+
+
+def compute_windows(columns: Dict[str, np.ndarray], window: int = DEFAULT_WINDOW,
+                    hop: int = DEFAULT_HOP, groups: Sequence[str] = FEATURE_GROUPS,
+                    bands: Sequence[Tuple[float, float]] = DEFAULT_BANDS) -> Dict[str, np.ndarray]:
+    """列配列（load_npy() や read_csv_chunks() の形式）から全ウィンドウの特徴量を計算"""
+    data = forward_fill(np.column_stack([np.asarray(columns[name], dtype=np.float64)
+                                         for name in CHANNELS]))
+    names = ['timestamp'] + feature_names(groups, bands)
+    if len(data) < window:
+        return {name: np.empty(0, dtype=np.int64 if name == 'timestamp' else np.float64)
+                for name in names}
+    # (ウィンドウ数, チャンネル, window) のビューを作り、計算時に (ウィンドウ数, window, チャンネル) に並べ替える
+    views = np.lib.stride_tricks.sliding_window_view(data, window, axis=0)[::hop]
+    parts = [compute_features(views[i:i + _BATCH_WINDOWS].transpose(0, 2, 1), groups, bands)
+             for i in range(0, len(views), _BATCH_WINDOWS)]
+    features = {name: np.concatenate([part[name] for part in parts]) for name in names}
+    features['timestamp'] = features['timestamp'].astype(np.int64)
+    return features
+
+
+class FeatureEngine:
+    """受信したレコードから hop 件ごとに特徴量を計算するストリーミング処理
+
+    IngestPipeline のシンクとして write() を登録し、計算した特徴量の行
+    (dict) を outputs の各関数に渡します。最初の行は window 件目、以降は
+    hop 件ごとで、compute_windows() と同じウィンドウになります。
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW, hop: int = DEFAULT_HOP,
+                 groups: Sequence[str] = FEATURE_GROUPS,
+                 bands: Sequence[Tuple[float, float]] = DEFAULT_BANDS,
+                 outputs: Iterable[Callable[[Dict[str, float]], None]] = ()):
+        if window < 2 or hop < 1:
+            raise ValueError("window は2以上、hop は1以上を指定してください")
+        self.window = window
+        self.hop = hop
+        self.groups = tuple(groups)
+        self.bands = tuple(bands)
+        self.outputs = list(outputs)
+        self.names = ['timestamp'] + feature_names(self.groups, self.bands)
+        # 同じ内容を2回書くリングバッファ。最新 window 行が常に連続した領域になる
+        self._ring = np.full((2 * window, len(CHANNELS)), np.nan)
+        self._position = 0
+        self._pending: List[Tuple[float, ...]] = []
+        self._last = {key: (np.nan, np.nan, np.nan) for key, _ in _SENSORS}
+        # 次のウィンドウが揃うまでに必要な件数（最初だけ window、以降は hop）
+        self._needed = window
+        self.sample_count = 0
+        self.row_count = 0
+
+    def write(self, data: Dict[str, Any]):
+        """レコードを1件追加（ウィンドウが揃ったら特徴量を計算）"""
+        last = self._last
+        sample = as_sample(data)
+        row = (sample.timestamp,)
+        for key, _ in _SENSORS:
+            values = sample.group(key)
+            if values is not None:
+                last[key] = values
+            row += last[key]
+        self._pending.append(row)
+        if len(self._pending) >= self._needed:
+            self._process()
+
+    def _process(self):
+        block = np.asarray(self._pending, dtype=np.float64)
+        self._pending = []
+        self.sample_count += len(block)
+        window = self.window
+        if len(block) > window:
+            block = block[-window:]
+        index = (self._position + np.arange(len(block))) % window
+        self._ring[index] = block
+        self._ring[index + window] = block
+        self._position = (self._position + len(block)) % window
+        self._needed = self.hop
+        current = self._ring[self._position:self._position + window]
+        features = compute_features(current[None], self.groups, self.bands)
+        row = {name: float(features[name][0]) for name in self.names}
+        row['timestamp'] = int(row['timestamp'])
+        self.row_count += 1
+        for output in self.outputs:
+            output(row)
+
+
+class FeatureCsvSink:
+    """特徴量の行をまとめてCSVに書き込むシンク"""
+
+    def __init__(self, path: str, names: Sequence[str],
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.names = list(names)
+        self.flush_interval = flush_interval
+        self.segments = [path]
+        self.row_count = 0
+        self._rows: List[List[Any]] = []
+        self._file = None
+        self._writer = None
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def open(self):
+        self._file = open(self.path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.names)
+
+    def write(self, row: Dict[str, Any]):
+        with self._lock:
+            self._rows.append([row[name] for name in self.names])
+            self.row_count += 1
+
+    def write_columns(self, columns: Dict[str, np.ndarray]):
+        with self._lock:
+            self._writer.writerows(zip(*(columns[name].tolist() for name in self.names)))
+            self.row_count += len(columns['timestamp'])
+
+    def flush_if_due(self):
+        with self._lock:
+            if self._rows and time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._flush()
+                self._file.close()
+                self._file = None
+
+    def _flush(self):
+        self._writer.writerows(self._rows)
+        self._rows.clear()
+        self._file.flush()
+        self._last_flush = time.monotonic()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="記録済みデータからスライディングウィンドウの特徴量を計算")
+    parser.add_argument('files', nargs='+', help="sensor_data_ble_*.csv または .npy ディレクトリ")
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW,
+                        help=f"ウィンドウのサンプル数 (既定: {DEFAULT_WINDOW})")
+    parser.add_argument('--hop', type=int, default=DEFAULT_HOP,
+                        help=f"ウィンドウをずらすサンプル数 (既定: {DEFAULT_HOP})")
+    args = parser.parse_args()
+
+    for src in args.files:
+        start = time.perf_counter()
+        dst = os.path.splitext(src.rstrip(os.sep))[0] + '_features.csv'
+        try:
+            features = compute_windows(load_columns(src), args.window, args.hop)
+            sink = FeatureCsvSink(dst, list(features))
+            sink.open()
+            sink.write_columns(features)
+            sink.close()
+        except (OSError, ValueError) as e:
+            print(f"✗ 特徴量の計算に失敗しました: {src}: {e}")
+            sys.exit(1)
+        elapsed = time.perf_counter() - start
+        print(f"✓ {src} -> {dst} ({sink.row_count} 行, {elapsed:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+"""
+姿勢推定（Madgwick / Mahony フィルタ）
+
+加速度・ジャイロ・磁気から姿勢のクォータニオンとオイラー角
+（roll / pitch / yaw、度）を求めます。サンプル間の時間 dt には
+ペイロードの timestamp（端末の時刻、ミリ秒）を使います。
+
+    - madgwick: 勾配降下法による補正（ゲイン beta）
+    - mahony:   PI制御による補正（比例ゲイン kp、積分ゲイン ki）
+
+磁気の値がないサンプルは加速度・ジャイロだけで更新します（yaw はドリフトします）。
+timestamp が戻った・大きく飛んだ（再接続や端末の時計の変更）ときは、
+直前の正常な dt で更新して姿勢が跳ばないようにします。
+
+OrientationFilter は1サンプルごとの更新を float のローカル変数だけで行い、
+NumPy の配列や中間オブジェクトを作りません（受信中の処理用）。
+FusionStage は IngestPipeline のシンクとして使い、推定結果の行 (dict) を
+outputs の各関数に渡します。fuse_columns() は記録済みの列配列に対して
+正規化・dt・オイラー角の計算を NumPy でまとめて行います。
+
+出力する列（FUSION_COLUMNS）:
+    timestamp, q_w, q_x, q_y, q_z, roll_deg, pitch_deg, yaw_deg
+
+使用方法（記録済みファイルから計算）:
+    python3 -m sensor_ble.fusion sensor_data_ble_*.csv [--algorithm mahony] [--gain 0.5]
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .convert import load_columns
+from .features import FeatureCsvSink, forward_fill
+from .schema import GROUP_BITS, as_sample
+
+ALGORITHMS = ('madgwick', 'mahony')
+DEFAULT_ALGORITHM = 'madgwick'
+DEFAULT_BETA = 0.1   # Madgwick のゲイン
+DEFAULT_KP = 1.0     # Mahony の比例ゲイン
+DEFAULT_KI = 0.0     # Mahony の積分ゲイン
+DEFAULT_DT = 0.02    # 最初の dt が決まるまでの値（秒、50 Hz）
+MAX_DT = 0.5         # これより長い間隔は途切れとみなす（秒）
+
+FUSION_COLUMNS = ('timestamp', 'q_w', 'q_x', 'q_y', 'q_z', 'roll_deg', 'pitch_deg', 'yaw_deg')
+
+_INPUT_COLUMNS = ('timestamp', 'accel_x', 'accel_y', 'accel_z', 'gyro_x', 'gyro_y', 'gyro_z',
+                  'magnet_x', 'magnet_y', 'magnet_z')
+
+_ACCEL_GYRO = GROUP_BITS['accelerometer'] | GROUP_BITS['gyroscope']
+_MAGNET = GROUP_BITS['magnetometer']
+
+
+def default_gain(algorithm: str) -> float:
+    """アルゴリズムごとの既定のゲイン（Madgwick は beta、Mahony は kp）"""
+    return DEFAULT_BETA if algorithm == 'madgwick' else DEFAULT_KP
+
+
+def _madgwick_step(q0: float, q1: float, q2: float, q3: float,
+                   gx: float, gy: float, gz: float,
+                   ax: float, ay: float, az: float,
+                   mx: float, my: float, mz: float,
+                   dt: float, beta: float) -> Tuple[float, float, float, float]:
+    """Madgwick フィルタの1ステップ（加速度・磁気は正規化済み、磁気が 0 なら使わない）"""
+    qd0 = 0.5 * (-q1 * gx - q2 * gy - q3 * gz)
+    qd1 = 0.5 * (q0 * gx + q2 * gz - q3 * gy)
+    qd2 = 0.5 * (q0 * gy - q1 * gz + q3 * gx)
+    qd3 = 0.5 * (q0 * gz + q1 * gy - q2 * gx)
+
+    if ax or ay or az:
+        _2q0 = 2.0 * q0
+        _2q1 = 2.0 * q1
+        _2q2 = 2.0 * q2
+        _2q3 = 2.0 * q3
+        q0q0 = q0 * q0
+        q1q1 = q1 * q1
+        q2q2 = q2 * q2
+        q3q3 = q3 * q3
+        if mx or my or mz:
+            q0q1 = q0 * q1
+            q0q2 = q0 * q2
+            q0q3 = q0 * q3
+            q1q2 = q1 * q2
+            q1q3 = q1 * q3
+            q2q3 = q2 * q3
+            _2q0mx = _2q0 * mx
+            _2q0my = _2q0 * my
+            _2q0mz = _2q0 * mz
+            _2q1mx = _2q1 * mx
+            # 地球座標系での磁場の向き (bx, 0, bz)
+            hx = (mx * q0q0 - _2q0my * q3 + _2q0mz * q2 + mx * q1q1 + _2q1 * my * q2
+                  + _2q1 * mz * q3 - mx * q2q2 - mx * q3q3)
+            hy = (_2q0mx * q3 + my * q0q0 - _2q0mz * q1 + _2q1mx * q2 - my * q1q1
+                  + my * q2q2 + _2q2 * mz * q3 - my * q3q3)
+            _2bx = math.sqrt(hx * hx + hy * hy)
+            _2bz = (-_2q0mx * q2 + _2q0my * q1 + mz * q0q0 + _2q1mx * q3 - mz * q1q1
+                    + _2q2 * my * q3 - mz * q2q2 + mz * q3q3)
+            _4bx = 2.0 * _2bx
+            _4bz = 2.0 * _2bz
+            # 目的関数（推定した重力・磁場と測定値の差）
+            fa_x = 2.0 * (q1q3 - q0q2) - ax
+            fa_y = 2.0 * (q0q1 + q2q3) - ay
+            fa_z = 1.0 - 2.0 * (q1q1 + q2q2) - az
+            fm_x = _2bx * (0.5 - q2q2 - q3q3) + _2bz * (q1q3 - q0q2) - mx
+            fm_y = _2bx * (q1q2 - q0q3) + _2bz * (q0q1 + q2q3) - my
+            fm_z = _2bx * (q0q2 + q1q3) + _2bz * (0.5 - q1q1 - q2q2) - mz
+            s0 = (-_2q2 * fa_x + _2q1 * fa_y - _2bz * q2 * fm_x
+                  + (-_2bx * q3 + _2bz * q1) * fm_y + _2bx * q2 * fm_z)
+            s1 = (_2q3 * fa_x + _2q0 * fa_y - 4.0 * q1 * fa_z + _2bz * q3 * fm_x
+                  + (_2bx * q2 + _2bz * q0) * fm_y + (_2bx * q3 - _4bz * q1) * fm_z)
+            s2 = (-_2q0 * fa_x + _2q3 * fa_y - 4.0 * q2 * fa_z
+                  + (-_4bx * q2 - _2bz * q0) * fm_x + (_2bx * q1 + _2bz * q3) * fm_y
+                  + (_2bx * q0 - _4bz * q2) * fm_z)
+            s3 = (_2q1 * fa_x + _2q2 * fa_y + (-_4bx * q3 + _2bz * q1) * fm_x
+                  + (-_2bx * q0 + _2bz * q2) * fm_y + _2bx * q1 * fm_z)
+        else:
+            _4q0 = 4.0 * q0
+            _4q1 = 4.0 * q1
+            _4q2 = 4.0 * q2
+            _8q1 = 8.0 * q1
+            _8q2 = 8.0 * q2
+            s0 = _4q0 * q2q2 + _2q2 * ax + _4q0 * q1q1 - _2q1 * ay
+            s1 = (_4q1 * q3q3 - _2q3 * ax + 4.0 * q0q0 * q1 - _2q0 * ay - _4q1
+                  + _8q1 * q1q1 + _8q1 * q2q2 + _4q1 * az)
+            s2 = (4.0 * q0q0 * q2 + _2q0 * ax + _4q2 * q3q3 - _2q3 * ay - _4q2
+                  + _8q2 * q1q1 + _8q2 * q2q2 + _4q2 * az)
+            s3 = 4.0 * q1q1 * q3 - _2q1 * ax + 4.0 * q2q2 * q3 - _2q2 * ay
+        norm = math.sqrt(s0 * s0 + s1 * s1 + s2 * s2 + s3 * s3)
+        if norm > 0.0:
+            scale = beta / norm
+            qd0 -= scale * s0
+            qd1 -= scale * s1
+            qd2 -= scale * s2
+            qd3 -= scale * s3
+
+    q0 += qd0 * dt
+    q1 += qd1 * dt
+    q2 += qd2 * dt
+    q3 += qd3 * dt
+    scale = 1.0 / math.sqrt(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3)
+    return q0 * scale, q1 * scale, q2 * scale, q3 * scale
+
+
+def _mahony_step(q0: float, q1: float, q2: float, q3: float,
+                 gx: float, gy: float, gz: float,
+                 ax: float, ay: float, az: float,
+                 mx: float, my: float, mz: float,
+                 dt: float, kp: float, ki: float,
+                 integral: Tuple[float, float, float]) -> Tuple[float, ...]:
+    """Mahony フィルタの1ステップ（加速度・磁気は正規化済み、磁気が 0 なら使わない）
+
+    戻り値は (q0, q1, q2, q3, 積分項x, 積分項y, 積分項z)。
+    """
+    ix, iy, iz = integral
+    if ax or ay or az:
+        q0q1 = q0 * q1
+        q0q2 = q0 * q2
+        q1q1 = q1 * q1
+        q1q3 = q1 * q3
+        q2q2 = q2 * q2
+        q2q3 = q2 * q3
+        # 推定した重力の向き（の半分）
+        vx = q1q3 - q0q2
+        vy = q0q1 + q2q3
+        vz = q0 * q0 - 0.5 + q3 * q3
+        ex = ay * vz - az * vy
+        ey = az * vx - ax * vz
+        ez = ax * vy - ay * vx
+        if mx or my or mz:
+            q0q3 = q0 * q3
+            q1q2 = q1 * q2
+            q3q3 = q3 * q3
+            hx = 2.0 * (mx * (0.5 - q2q2 - q3q3) + my * (q1q2 - q0q3) + mz * (q1q3 + q0q2))
+            hy = 2.0 * (mx * (q1q2 + q0q3) + my * (0.5 - q1q1 - q3q3) + mz * (q2q3 - q0q1))
+            bx = math.sqrt(hx * hx + hy * hy)
+            bz = 2.0 * (mx * (q1q3 - q0q2) + my * (q2q3 + q0q1) + mz * (0.5 - q1q1 - q2q2))
+            # 推定した磁場の向き（の半分）
+            wx = bx * (0.5 - q2q2 - q3q3) + bz * (q1q3 - q0q2)
+            wy = bx * (q1q2 - q0q3) + bz * (q0q1 + q2q3)
+            wz = bx * (q0q2 + q1q3) + bz * (0.5 - q1q1 - q2q2)
+            ex += my * wz - mz * wy
+            ey += mz * wx - mx * wz
+            ez += mx * wy - my * wx
+        if ki > 0.0:
+            ix += 2.0 * ki * ex * dt
+            iy += 2.0 * ki * ey * dt
+            iz += 2.0 * ki * ez * dt
+            gx += ix
+            gy += iy
+            gz += iz
+        gx += 2.0 * kp * ex
+        gy += 2.0 * kp * ey
+        gz += 2.0 * kp * ez
+
+    half = 0.5 * dt
+    gx *= half
+    gy *= half
+    gz *= half
+    q0, q1, q2, q3 = (q0 - q1 * gx - q2 * gy - q3 * gz,
+                      q1 + q0 * gx + q2 * gz - q3 * gy,
+                      q2 + q0 * gy - q1 * gz + q3 * gx,
+                      q3 + q0 * gz + q1 * gy - q2 * gx)
+    scale = 1.0 / math.sqrt(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3)
+    return q0 * scale, q1 * scale, q2 * scale, q3 * scale, ix, iy, iz
+
+
+def initial_quaternion(ax: float, ay: float, az: float,
+                       mx: float = 0.0, my: float = 0.0, mz: float = 0.0) -> Tuple[float, float, float, float]:
+    """加速度（と磁気）の1サンプルから初期姿勢のクォータニオンを求める
+
+    静止時の値から求めるため、フィルタが収束するまでの時間を省けます。
+    """
+    roll = math.atan2(ay, az)
+    pitch = math.atan2(-ax, math.sqrt(ay * ay + az * az))
+    yaw = 0.0
+    if mx or my or mz:
+        # 傾きを補正した磁気ベクトルから方位を求める
+        hx = mx * math.cos(pitch) + (my * math.sin(roll) + mz * math.cos(roll)) * math.sin(pitch)
+        hy = my * math.cos(roll) - mz * math.sin(roll)
+        yaw = math.atan2(-hy, hx)
+    cr, sr = math.cos(roll / 2), math.sin(roll / 2)
+    cp, sp = math.cos(pitch / 2), math.sin(pitch / 2)
+    cy, sy = math.cos(yaw / 2), math.sin(yaw / 2)
+    return (cr * cp * cy + sr * sp * sy,
+            sr * cp * cy - cr * sp * sy,
+            cr * sp * cy + sr * cp * sy,
+            cr * cp * sy - sr * sp * cy)
+
+
+def quaternion_to_euler(q0: float, q1: float, q2: float, q3: float) -> Tuple[float, float, float]:
+    """クォータニオンから (roll, pitch, yaw)（度、yaw は 0〜360）"""
+    roll = math.atan2(2.0 * (q0 * q1 + q2 * q3), 1.0 - 2.0 * (q1 * q1 + q2 * q2))
+    sin_pitch = 2.0 * (q0 * q2 - q3 * q1)
+    pitch = math.asin(1.0 if sin_pitch > 1.0 else -1.0 if sin_pitch < -1.0 else sin_pitch)
+    yaw = math.atan2(2.0 * (q0 * q3 + q1 * q2), 1.0 - 2.0 * (q2 * q2 + q3 * q3))
+    return math.degrees(roll), math.degrees(pitch), math.degrees(yaw) % 360.0
+
+
+class OrientationFilter:
+    """1サンプルずつ更新する姿勢推定フィルタ
+
+    gain は Madgwick では beta、Mahony では kp です（None なら既定値）。
+    状態はクォータニオンの4つの float（と Mahony の積分項）だけです。
+    """
+
+    def __init__(self, algorithm: str = DEFAULT_ALGORITHM, gain: Optional[float] = None,
+                 ki: float = DEFAULT_KI):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"未対応の姿勢推定アルゴリズムです: {algorithm}")
+        self.algorithm = algorithm
+        self.gain = default_gain(algorithm) if gain is None else gain
+        self.ki = ki
+        self.reset()
+
+    def reset(self):
+        """姿勢を初期化する（次のサンプルで初期姿勢を求め直す）"""
+        self.q = (1.0, 0.0, 0.0, 0.0)
+        self.initialized = False
+        self.dt = DEFAULT_DT
+        self.last_timestamp: Optional[float] = None
+        self.skipped_dt = 0  # timestamp が戻った・飛んだ回数
+        self._integral = (0.0, 0.0, 0.0)
+
+    def update(self, timestamp: float,
+               gx: float, gy: float, gz: float,
+               ax: float, ay: float, az: float,
+               mx: float = 0.0, my: float = 0.0, mz: float = 0.0) -> Tuple[float, float, float, float]:
+        """1サンプル分更新してクォータニオン (w, x, y, z) を返す
+
+        timestamp はミリ秒、ジャイロは rad/s。磁気がなければ 0 を渡します。
+        """
+        norm = ax * ax + ay * ay + az * az
+        if norm > 0.0:
+            norm = 1.0 / math.sqrt(norm)
+            ax *= norm
+            ay *= norm
+            az *= norm
+        norm = mx * mx + my * my + mz * mz
+        if norm > 0.0:
+            norm = 1.0 / math.sqrt(norm)
+            mx *= norm
+            my *= norm
+            mz *= norm
+
+        if not self.initialized:
+            self.last_timestamp = timestamp
+            if ax or ay or az:
+                self.q = initial_quaternion(ax, ay, az, mx, my, mz)
+                self.initialized = True
+            return self.q
+
+        dt = (timestamp - self.last_timestamp) * 0.001
+        self.last_timestamp = timestamp
+        if 0.0 < dt <= MAX_DT:
+            self.dt = dt
+        else:
+            dt = self.dt
+            self.skipped_dt += 1
+
+        q0, q1, q2, q3 = self.q
+        if self.algorithm == 'madgwick':
+            self.q = _madgwick_step(q0, q1, q2, q3, gx, gy, gz, ax, ay, az, mx, my, mz,
+                                    dt, self.gain)
+        else:
+            q0, q1, q2, q3, ix, iy, iz = _mahony_step(
+                q0, q1, q2, q3, gx, gy, gz, ax, ay, az, mx, my, mz,
+                dt, self.gain, self.ki, self._integral)
+            self.q = (q0, q1, q2, q3)
+            self._integral = (ix, iy, iz)
+        return self.q
+
+    def euler(self) -> Tuple[float, float, float]:
+        """現在の姿勢の (roll, pitch, yaw)（度）"""
+        return quaternion_to_euler(*self.q)
+
+
+class FusionStage:
+    """受信したレコードから姿勢を推定するストリーミング処理
+
+    IngestPipeline のシンクとして write() を登録し、加速度とジャイロを含む
+    レコードごとに FUSION_COLUMNS の行 (dict) を outputs の各関数に渡します。
+    磁気がないレコードでは直前の磁気の値を使います。
+    """
+
+    def __init__(self, algorithm: str = DEFAULT_ALGORITHM, gain: Optional[float] = None,
+                 ki: float = DEFAULT_KI,
+                 outputs: Iterable[Callable[[Dict[str, float]], None]] = ()):
+        self.filter = OrientationFilter(algorithm, gain, ki)
+        self.outputs = list(outputs)
+        self.names = list(FUSION_COLUMNS)
+        self._magnet = (0.0, 0.0, 0.0)
+        self.sample_count = 0
+        self.row_count = 0
+
+    def reset(self):
+        """再接続時などに姿勢を初期化する"""
+        self.filter.reset()
+
+    def write(self, data: Dict[str, Any]):
+        """レコードを1件処理（加速度かジャイロがなければ何もしない）"""
+        self.sample_count += 1
+        sample = as_sample(data)
+        if sample.present & _ACCEL_GYRO != _ACCEL_GYRO:
+            return
+        if sample.present & _MAGNET:
+            self._magnet = (sample.magnet_x, sample.magnet_y, sample.magnet_z)
+        ax, ay, az = sample.accel_x, sample.accel_y, sample.accel_z
+        gx, gy, gz = sample.gyro_x, sample.gyro_y, sample.gyro_z
+        mx, my, mz = self._magnet
+        timestamp = sample.timestamp
+        q0, q1, q2, q3 = self.filter.update(timestamp, gx, gy, gz, ax, ay, az, mx, my, mz)
+        roll, pitch, yaw = quaternion_to_euler(q0, q1, q2, q3)
+        row = {'timestamp': timestamp, 'q_w': q0, 'q_x': q1, 'q_y': q2, 'q_z': q3,
+               'roll_deg': roll, 'pitch_deg': pitch, 'yaw_deg': yaw}
+        self.row_count += 1
+        for output in self.outputs:
+            output(row)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """各行を単位ベクトルにする（長さ 0 の行は 0 のまま）"""
+    norm = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norm > 0, norm, 1.0)
+
+
+def fuse_columns(columns: Dict[str, np.ndarray], algorithm: str = DEFAULT_ALGORITHM,
+                 gain: Optional[float] = None, ki: float = DEFAULT_KI) -> Dict[str, np.ndarray]:
+    """列配列（load_npy() や read_csv_chunks() の形式）から全サンプルの姿勢を推定
+
+    欠損の補完、加速度・磁気の正規化、dt（途切れ・逆行の補正を含む）と
+    オイラー角の計算は配列演算でまとめて行い、時間方向に逐次的な
+    フィルタの更新だけを float のループで行います。
+    加速度かジャイロのない行は結果に含めません。
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"未対応の姿勢推定アルゴリズムです: {algorithm}")
+    gain = default_gain(algorithm) if gain is None else gain
+    data = np.column_stack([np.asarray(columns[name], dtype=np.float64) for name in _INPUT_COLUMNS])
+    # 受信中と同じく、加速度とジャイロがそろった行だけを使い、磁気は直前の値で補う
+    data = forward_fill(data[~np.isnan(data[:, 1:7]).any(axis=1)])
+    ts = data[:, 0]
+    accel = _normalize(data[:, 1:4])
+    gyro = data[:, 4:7]
+    magnet = _normalize(np.nan_to_num(data[:, 7:10]))
+
+    # 途切れ・逆行した区間は直前の正常な dt で置き換える
+    dt = np.diff(ts, prepend=ts[:1]) * 0.001
+    valid = (dt > 0) & (dt <= MAX_DT)
+    index = np.where(valid, np.arange(len(dt)), 0)
+    np.maximum.accumulate(index, out=index)
+    dt = np.where(index > 0, dt[index], DEFAULT_DT)
+
+    n = len(ts)
+    quats = np.empty((n, 4))
+    if n:
+        # 初期姿勢は加速度が 0 でない最初のサンプルから求める
+        moving = np.flatnonzero(np.abs(accel).sum(axis=1) > 0)
+        start = int(moving[0]) if len(moving) else n
+        quats[:start + 1] = initial_quaternion(*accel[min(start, n - 1)], *magnet[min(start, n - 1)])
+        q0, q1, q2, q3 = quats[min(start, n - 1)].tolist()
+        # 行ごとの引数 (gx, gy, gz, ax, ay, az, mx, my, mz, dt) を float のリストにしておく
+        rows = np.column_stack([gyro, accel, magnet, dt])[start + 1:].tolist()
+        out = []
+        append = out.append
+        if algorithm == 'madgwick':
+            step = _madgwick_step
+            for row in rows:
+                q0, q1, q2, q3 = step(q0, q1, q2, q3, *row, gain)
+                append((q0, q1, q2, q3))
+        else:
+            step = _mahony_step
+            integral = (0.0, 0.0, 0.0)
+            for row in rows:
+                q0, q1, q2, q3, ix, iy, iz = step(q0, q1, q2, q3, *row, gain, ki, integral)
+                integral = (ix, iy, iz)
+                append((q0, q1, q2, q3))
+        if out:
+            quats[start + 1:] = out
+
+    q0, q1, q2, q3 = quats.T
+    return {
+        'timestamp': ts.astype(np.int64),
+        'q_w': q0, 'q_x': q1, 'q_y': q2, 'q_z': q3,
+        'roll_deg': np.degrees(np.arctan2(2.0 * (q0 * q1 + q2 * q3), 1.0 - 2.0 * (q1 * q1 + q2 * q2))),
+        'pitch_deg': np.degrees(np.arcsin(np.clip(2.0 * (q0 * q2 - q3 * q1), -1.0, 1.0))),
+        'yaw_deg': np.degrees(np.arctan2(2.0 * (q0 * q3 + q1 * q2), 1.0 - 2.0 * (q2 * q2 + q3 * q3))) % 360.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="記録済みデータから姿勢（クォータニオン・オイラー角）を推定")
+    parser.add_argument('files', nargs='+', help="sensor_data_ble_*.csv または .npy ディレクトリ")
+    parser.add_argument('--algorithm', choices=ALGORITHMS, default=DEFAULT_ALGORITHM,
+                        help=f"姿勢推定のアルゴリズム (既定: {DEFAULT_ALGORITHM})")
+    parser.add_argument('--gain', type=float, default=None,
+                        help=f"Madgwick の beta / Mahony の kp (既定: {DEFAULT_BETA} / {DEFAULT_KP})")
+    parser.add_argument('--ki', type=float, default=DEFAULT_KI,
+                        help=f"Mahony の積分ゲイン (既定: {DEFAULT_KI})")
+    args = parser.parse_args()
+
+    for src in args.files:
+        start = time.perf_counter()
+        dst = os.path.splitext(src.rstrip(os.sep))[0] + '_orientation.csv'
+        try:
+            columns = load_columns(src)
+            fused = fuse_columns(columns, args.algorithm, args.gain, args.ki)
+            sink = FeatureCsvSink(dst, FUSION_COLUMNS)
+            sink.open()
+            sink.write_columns(fused)
+            sink.close()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"✗ 姿勢の推定に失敗しました: {src}: {e}")
+            sys.exit(1)
+        elapsed = time.perf_counter() - start
+        print(f"✓ {src} -> {dst} ({sink.row_count} 行, {elapsed:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
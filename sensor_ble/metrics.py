@@ -0,0 +1,187 @@
+"""
+受信処理の計測
+
+IngestPipeline に Metrics を渡すと、Notificationの受信から保存・表示までの
+各段階の処理時間をヒストグラムに、件数をカウンタに記録します。
+Metrics を渡さない場合は計測用のコードを一切通らないため、負荷はありません。
+
+記録するヒストグラム（単位は秒）:
+    - queue_wait:          受信 → decode ステージで取り出すまで
+    - reassemble:          分割データの再構築（ChunkedJsonDecoder のみ）
+    - decode:              再構築・パースを含むデコード全体
+    - sink-N / display-N:  各出力の処理時間
+    - receive_to_sink-N / receive_to_display-N: 受信 → 出力完了
+    - phone_to_pc:         ペイロードの timestamp → デコード完了
+                           （端末とPCの時計のずれを含む）
+
+ヒストグラムは HdrHistogram と同じ考え方の対数バケット（2倍ごとに16分割、
+相対誤差 約6%）で、記録は整数演算と配列の加算だけです。
+各ヒストグラムは基本的に1つのスレッドから記録されます。複数スレッドから
+同時に記録すると、まれに件数が失われることがあります（計測用途では許容）。
+
+集計は summary_lines() で文字列に、prometheus_text() で Prometheus の
+テキスト形式にでき、serve() でローカルのHTTPエンドポイントから公開できます。
+"""
+
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    # http.server は serve() を呼んだときだけ読み込む（起動時間を短くするため）
+    from http.server import ThreadingHTTPServer
+
+_SUB_BITS = 4
+_SUB_COUNT = 1 << _SUB_BITS
+_MAX_BITS = 40  # 2^40 µs ≒ 12日
+_BUCKET_COUNT = (_MAX_BITS - _SUB_BITS + 1) * _SUB_COUNT
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+def _bucket_index(micros: int) -> int:
+    if micros < _SUB_COUNT:
+        return micros
+    bits = micros.bit_length()
+    index = (bits - _SUB_BITS) * _SUB_COUNT + (micros >> (bits - _SUB_BITS - 1)) - _SUB_COUNT
+    return index if index < _BUCKET_COUNT else _BUCKET_COUNT - 1
+
+
+def _bucket_upper(index: int) -> int:
+    """バケットに入る最大値 (µs)"""
+    if index < _SUB_COUNT:
+        return index
+    bits = index // _SUB_COUNT + _SUB_BITS
+    top = index % _SUB_COUNT + _SUB_COUNT
+    shift = bits - _SUB_BITS - 1
+    return ((top + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """マイクロ秒単位の対数バケットによる遅延ヒストグラム"""
+
+    def __init__(self):
+        self.counts = [0] * _BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0   # 秒
+        self.max = 0.0     # 秒
+
+    def record(self, seconds: float):
+        micros = int(seconds * 1e6)
+        if micros < 0:
+            micros = 0
+        self.counts[_bucket_index(micros)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """q 分位点（秒、バケットの上限値）"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return min(_bucket_upper(index) / 1e6, self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class Metrics:
+    """段階ごとのヒストグラムとカウンタの集まり"""
+
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._last_summary: Tuple[float, Dict[str, int]] = (self.started_at, {})
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        """name のヒストグラム（なければ作成）"""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, LatencyHistogram())
+        return histogram
+
+    def inc(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary_lines(self) -> List[str]:
+        """前回の呼び出しからのレートと、各段階の遅延の分位点"""
+        now = time.monotonic()
+        last_at, last_counters = self._last_summary
+        counters = dict(self.counters)
+        self._last_summary = (now, counters)
+        elapsed = max(now - last_at, 1e-9)
+
+        lines = []
+        if counters:
+            lines.append("レート: " + ", ".join(
+                f"{name} {(value - last_counters.get(name, 0)) / elapsed:,.1f}/s"
+                for name, value in sorted(counters.items())))
+        for name, histogram in sorted(self.histograms.items()):
+            if histogram.count:
+                lines.append(
+                    f"{name}: n={histogram.count:,} "
+                    f"平均 {histogram.mean * 1e3:.3f} ms, "
+                    f"p50 {histogram.quantile(0.5) * 1e3:.3f} ms, "
+                    f"p99 {histogram.quantile(0.99) * 1e3:.3f} ms, "
+                    f"最大 {histogram.max * 1e3:.3f} ms")
+        return lines
+
+    def prometheus_text(self, extra: Optional[Dict[str, int]] = None) -> str:
+        """Prometheus のテキスト形式（extra はパイプラインの統計などの追加の値）"""
+        lines = []
+        for name, value in sorted(self.counters.items()):
+            metric = _metric_name(name) + '_total'
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for name, histogram in sorted(self.histograms.items()):
+            metric = _metric_name(name) + '_seconds'
+            lines.append(f"# TYPE {metric} summary")
+            for q in QUANTILES:
+                lines.append(f'{metric}{{quantile="{q}"}} {histogram.quantile(q):.6f}')
+            lines += [f"{metric}_sum {histogram.total:.6f}", f"{metric}_count {histogram.count}"]
+        for name, value in sorted((extra or {}).items()):
+            metric = _metric_name(f"pipeline_{name}")
+            lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port: int, host: str = '127.0.0.1',
+              stats_provider: Optional[Callable[[], Dict[str, int]]] = None) -> 'ThreadingHTTPServer':
+        """GET /metrics で prometheus_text() を返すHTTPサーバーを別スレッドで起動"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text(
+                    stats_provider() if stats_provider is not None else None).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+
+def _metric_name(name: str) -> str:
+    return 'sensor_ble_' + ''.join(c if c.isalnum() else '_' for c in name)
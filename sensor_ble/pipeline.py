@@ -0,0 +1,331 @@
+"""
+ノンブロッキング受信パイプライン
+
+bleakのNotificationコールバック内では受信バイト列と受信時刻を
+有界キューに積むだけにし、デコード・CSV保存・表示はそれぞれ
+ワーカースレッドのステージで処理します。ディスクや端末が遅くても
+BLEのイベントループは止まりません。
+
+    callback ──> [raw queue] ──> decode ──┬─> [sink queue]    ──> sink
+                                          └─> [display queue] ──> display
+
+各キューは満杯時の振る舞い（背圧ポリシー）を選択できます:
+    - block:       空きができるまで待つ
+    - drop-oldest: 最も古い要素を捨てて追加する
+    - drop-newest: 追加しようとした要素を捨てる
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+BLOCK = 'block'
+DROP_OLDEST = 'drop-oldest'
+DROP_NEWEST = 'drop-newest'
+BACKPRESSURE_POLICIES = (BLOCK, DROP_OLDEST, DROP_NEWEST)
+
+DEFAULT_QUEUE_SIZE = 4096
+DEFAULT_DISPLAY_QUEUE_SIZE = 64
+# 秒。--workers のリングバッファ（sensor_ble.workers）に block で書くときに待つ最大時間。
+# 待つのはイベントループの中なので、その間は全デバイスの受信が止まる
+WORKER_BLOCK_TIMEOUT = 0.5
+
+
+# decode ステージにデコーダのリセットを指示する制御用の要素
+_RESET = object()
+
+
+class RawNotification(NamedTuple):
+    """受信したNotification（受信時刻はtime.monotonic()）"""
+    received_at: float
+    data: bytes
+
+
+class _Control(NamedTuple):
+    """put_control() で積んだ要素（背圧ポリシーの対象外）"""
+    item: Any
+
+
+class QueueClosed(Exception):
+    """クローズ済みで空のキューから取り出そうとした"""
+
+
+class BoundedQueue:
+    """背圧ポリシー付きの有界キュー"""
+
+    def __init__(self, maxsize: int = DEFAULT_QUEUE_SIZE, policy: str = BLOCK):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"未対応の背圧ポリシーです: {policy}")
+        if maxsize <= 0:
+            raise ValueError("キューサイズは1以上を指定してください")
+        self.maxsize = maxsize
+        self.policy = policy
+        self._items: deque = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._closed = False
+        self._control_count = 0  # キュー内の制御用の要素の数（maxsize には数えない）
+
+        # 統計
+        self.offered_count = 0   # put() が呼ばれた回数
+        self.put_count = 0
+        self.dropped_count = 0
+        self.high_watermark = 0
+
+    def __len__(self) -> int:
+        return len(self._items) - self._control_count
+
+    def put(self, item: Any) -> bool:
+        """要素を追加する。捨てられた場合は False を返す"""
+        with self._lock:
+            self.offered_count += 1
+            if self._closed:
+                self.dropped_count += 1
+                return False
+            if len(self) >= self.maxsize:
+                if self.policy == DROP_NEWEST:
+                    self.dropped_count += 1
+                    return False
+                if self.policy == DROP_OLDEST:
+                    self._drop_oldest()
+                    self.dropped_count += 1
+                else:
+                    while len(self) >= self.maxsize and not self._closed:
+                        self._not_full.wait()
+                    if self._closed:
+                        self.dropped_count += 1
+                        return False
+            self._items.append(item)
+            self.put_count += 1
+            if len(self) > self.high_watermark:
+                self.high_watermark = len(self)
+            self._not_empty.notify()
+            return True
+
+    def _drop_oldest(self):
+        """制御用でない最も古い要素を捨てる"""
+        items = self._items
+        if type(items[0]) is not _Control:
+            items.popleft()
+            return
+        for index, item in enumerate(items):
+            if type(item) is not _Control:
+                del items[index]
+                return
+
+    def put_control(self, item: Any) -> bool:
+        """制御用の要素を背圧ポリシーにかかわらず追加する
+
+        捨てず、待たず、ほかの要素も追い出しません。maxsize や統計には数えず、
+        drop-oldest で捨てられることもありません。クローズ済みなら False を返します。
+        """
+        with self._lock:
+            if self._closed:
+                return False
+            self._items.append(_Control(item))
+            self._control_count += 1
+            self._not_empty.notify()
+            return True
+
+    def get(self) -> Any:
+        """要素を取り出す。クローズ済みで空なら QueueClosed を送出"""
+        with self._lock:
+            while not self._items:
+                if self._closed:
+                    raise QueueClosed()
+                self._not_empty.wait()
+            item = self._items.popleft()
+            if type(item) is _Control:
+                self._control_count -= 1
+                return item.item
+            self._not_full.notify()
+            return item
+
+    def close(self):
+        """以降の追加を拒否する（残っている要素は取り出せる）"""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+
+class Stage(threading.Thread):
+    """キューから要素を取り出して処理するワーカースレッド"""
+
+    def __init__(self, name: str, queue: BoundedQueue,
+                 handler: Callable[[Any], Optional[Iterable[Any]]],
+                 outputs: Optional[List[BoundedQueue]] = None):
+        super().__init__(name=name, daemon=True)
+        self.queue = queue
+        self.handler = handler
+        self.outputs = outputs or []
+        self.processed_count = 0
+        self.error_count = 0
+
+    def run(self):
+        while True:
+            try:
+                item = self.queue.get()
+            except QueueClosed:
+                break
+            try:
+                results = self.handler(item)
+            except Exception as e:
+                self.error_count += 1
+                print(f"✗ {self.name} ステージでエラーが発生しました: {e}")
+                continue
+            self.processed_count += 1
+            if results and self.outputs:
+                for result in results:
+                    for output in self.outputs:
+                        output.put(result)
+        for output in self.outputs:
+            output.close()
+
+
+class IngestPipeline:
+    """受信コールバックから切り離したデコード・保存・表示パイプライン
+
+    decoder は RawNotification を受け取り、デコード済みレコードの
+    リストを返す呼び出し可能オブジェクトです。sinks と displays は
+    レコードを1件ずつ受け取ります。sinks は欠損させたくない出力
+    （CSVなど）、displays は間引いてよい出力（コンソール表示など）です。
+    capture（CaptureWriter など）を指定すると、受信データをキューに積む前に
+    受信時刻とともにそのまま記録します（キューで捨てられたものも残ります）。
+
+    metrics（sensor_ble.metrics.Metrics）を指定すると、各段階の処理時間と
+    件数を記録します。このときだけ計測用のハンドラに差し替えるため、
+    指定しなければ計測の負荷はかかりません。
+    """
+
+    def __init__(self, decoder: Callable[[RawNotification], List[Dict[str, Any]]],
+                 sinks: Iterable[Callable[[Dict[str, Any]], None]] = (),
+                 displays: Iterable[Callable[[Dict[str, Any]], None]] = (),
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 policy: str = DROP_OLDEST,
+                 display_queue_size: int = DEFAULT_DISPLAY_QUEUE_SIZE,
+                 capture: Optional[Any] = None,
+                 metrics: Optional[Any] = None):
+        self.decoder = decoder
+        self.capture = capture
+        self.metrics = metrics
+        self.raw_queue = BoundedQueue(queue_size, policy)
+        self.stages: List[Stage] = []
+
+        outputs: List[BoundedQueue] = []
+        for i, sink in enumerate(sinks):
+            queue = BoundedQueue(queue_size, BLOCK)
+            outputs.append(queue)
+            self.stages.append(Stage(f"sink-{i}", queue, self._output_handler(f"sink-{i}", sink)))
+        for i, display in enumerate(displays):
+            queue = BoundedQueue(display_queue_size, DROP_OLDEST)
+            outputs.append(queue)
+            self.stages.append(Stage(f"display-{i}", queue,
+                                     self._output_handler(f"display-{i}", display)))
+        decode = self._decode
+        if metrics is not None:
+            decode = self._decode_measured
+            self.submit = self._submit_measured  # type: ignore[assignment]
+            if hasattr(decoder, 'metrics'):
+                decoder.metrics = metrics
+        self.decode_stage = Stage("decode", self.raw_queue, decode, outputs)
+        self.stages.insert(0, self.decode_stage)
+        self._started = False
+
+    def start(self):
+        """ワーカースレッドを開始"""
+        if not self._started:
+            for stage in self.stages:
+                stage.start()
+            self._started = True
+
+    def submit(self, data: bytearray) -> bool:
+        """Notificationコールバックから呼ぶ。受信データをキューに積むだけ"""
+        received_at = time.monotonic()
+        if self.capture is not None:
+            self.capture.write(received_at, data)
+        return self.raw_queue.put(RawNotification(received_at, bytes(data)))
+
+    def _submit_measured(self, data: bytearray) -> bool:
+        received_at = time.monotonic()
+        self.metrics.inc('notifications')
+        self.metrics.inc('bytes', len(data))
+        if self.capture is not None:
+            self.capture.write(received_at, data)
+        return self.raw_queue.put(RawNotification(received_at, bytes(data)))
+
+    def reset_decoder(self):
+        """キュー上の順序を保ったまま、decode ステージでデコーダをリセットする
+
+        再接続時など、途中まで再構築したデータを捨てたいときに使います。
+        リセットはキューの背圧ポリシーにかかわらず必ず積みます（drop-newest で
+        捨てられたり、drop-oldest で受信データを追い出したりしません）。
+        """
+        self.raw_queue.put_control(_RESET)
+
+    def _decode(self, item: Any) -> List[Dict[str, Any]]:
+        if item is _RESET:
+            reset = getattr(self.decoder, 'reset', None)
+            if reset is not None:
+                reset()
+            return []
+        return self.decoder(item)
+
+    def _decode_measured(self, item: Any) -> List[Any]:
+        """計測付きの decode。後段で受信からの遅延を測れるよう (受信時刻, レコード) を流す"""
+        if item is _RESET:
+            return self._decode(item)
+        metrics = self.metrics
+        started = time.perf_counter()
+        metrics.histogram('queue_wait').record(time.monotonic() - item.received_at)
+        records = self.decoder(item)
+        metrics.histogram('decode').record(time.perf_counter() - started)
+        if records:
+            metrics.inc('records', len(records))
+            wall_ms = time.time() * 1000.0
+            phone_to_pc = metrics.histogram('phone_to_pc')
+            for record in records:
+                timestamp = record.get('timestamp')
+                if timestamp:
+                    phone_to_pc.record((wall_ms - timestamp) / 1000.0)
+        return [(item.received_at, record) for record in records]
+
+    def _output_handler(self, name: str, handler: Callable[[Dict[str, Any]], None]):
+        """metrics があれば、処理時間と受信からの遅延を記録するハンドラで包む"""
+        if self.metrics is None:
+            return handler
+        duration = self.metrics.histogram(name)
+        end_to_end = self.metrics.histogram(f"receive_to_{name}")
+
+        def measured(item: Tuple[float, Dict[str, Any]]):
+            received_at, record = item
+            started = time.perf_counter()
+            handler(record)
+            duration.record(time.perf_counter() - started)
+            end_to_end.record(time.monotonic() - received_at)
+
+        return measured
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """新規受付を止め、キューに残った要素を処理しきってから終了"""
+        self.raw_queue.close()
+        if self._started:
+            for stage in self.stages:
+                stage.join(timeout)
+            self._started = False
+
+    def stats(self) -> Dict[str, int]:
+        """キューごとのドロップ数などの統計"""
+        stats = {
+            'received': self.raw_queue.offered_count,
+            'dropped_raw': self.raw_queue.dropped_count,
+            'parse_errors': getattr(self.decoder, 'error_count', 0),
+            'decode_errors': self.decode_stage.error_count,
+        }
+        for stage in self.stages[1:]:
+            stats[f'dropped_{stage.name}'] = stage.queue.dropped_count
+            stats[f'errors_{stage.name}'] = stage.error_count
+        return stats
+
@@ -0,0 +1,602 @@
+"""
+受信データのローカル配信
+
+Publisher はデコード済みのレコードを、ローカルのエンドポイントに接続した
+複数の購読者（プロッタ・推論・可視化など）へ配信するステージです。
+BLEの接続は1本のまま、受信データを何本でも同時に利用できます。
+
+対応するエンドポイント:
+    - tcp://127.0.0.1:8765     改行区切りのJSON（1行1レコード）
+    - unix:///tmp/sensor.sock  同上（Unixドメインソケット）
+    - ws://127.0.0.1:8765      WebSocket（テキストメッセージの中身は同上）
+    - udp://127.0.0.1:8766     購読者が送ったデータグラムの送信元へ配信
+
+レコードは1回だけJSONに変換して queue_size 行のリングバッファに書くだけなので、
+write() の負荷は購読者の数や処理速度によりません。各購読者はリング上の
+自分の読み出し位置を持ち（購読者ごとに最大 queue_size 行の有界キューと同じ）、
+配信は別スレッドのイベントループで、一定間隔 (batch_interval) ごとに
+溜まった行をまとめて1回で送ります（1メッセージあたりのオーバーヘッドを削減）。
+
+遅い購読者の扱い:
+    - queue_size 行より遅れると古い行から捨てる（購読者ごとのドロップ数に計上）
+    - 送信が slow_timeout 秒以上終わらない（相手が読んでいない）接続は切断する
+
+購読者ごとの間引き:
+    接続時に {"every": 10, "max_hz": 30} のようなJSONを送ると
+    （tcp / unix は1行、ws はテキストメッセージまたは ws://...?every=10 の
+    クエリ、udp は購読のデータグラム）、その購読者だけ N 件に1件、
+    または timestamp の間隔が 1/max_hz 秒以上のレコードだけを受け取ります。
+    udp の購読者は UDP_SUBSCRIPTION_TTL 秒ごとに購読のデータグラムを
+    送り直してください（{"unsubscribe": true} で解除）。
+
+購読側の例:
+    python3 -m sensor_ble.publisher tcp://127.0.0.1:8765 --every 10
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import socket
+import struct
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from .schema import SensorSample
+
+TRANSPORTS = ('tcp', 'unix', 'ws', 'udp')
+DEFAULT_QUEUE_SIZE = 1024        # 購読者ごとのキューの行数
+DEFAULT_BATCH_INTERVAL = 0.02    # 秒
+DEFAULT_BATCH_MAX = 512          # 1メッセージにまとめる最大行数
+DEFAULT_SLOW_TIMEOUT = 5.0       # 秒
+SEND_BUFFER_SIZE = 256 * 1024    # 接続ごとのソケットの送信バッファ（カーネル側に溜まる量の上限）
+UDP_MAX_DATAGRAM = 60000         # バイト
+UDP_SUBSCRIPTION_TTL = 30.0      # 秒
+
+_WS_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+_WS_TEXT = 0x1
+_WS_CLOSE = 0x8
+_WS_PING = 0x9
+_WS_PONG = 0xA
+
+
+def parse_endpoint(url: str) -> Tuple[str, str, int]:
+    """'tcp://host:port' などを (方式, ホストまたはパス, ポート) に分解"""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in TRANSPORTS:
+        raise ValueError(f"未対応のエンドポイントです: {url} "
+                         f"(tcp://, unix://, ws://, udp:// のいずれかを指定してください)")
+    if scheme == 'unix':
+        path = parts.netloc + parts.path
+        if not path:
+            raise ValueError(f"ソケットのパスを指定してください: {url}")
+        return scheme, path, 0
+    if parts.port is None:
+        raise ValueError(f"ポート番号を指定してください: {url}")
+    return scheme, parts.hostname or '127.0.0.1', parts.port
+
+
+def ws_frame(payload: bytes, opcode: int = _WS_TEXT) -> bytes:
+    """サーバーから送るWebSocketのフレーム（マスクなし）"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def read_ws_frame(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    """WebSocketのフレームを1つ読む（マスクがあれば外す）"""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack('!H', await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack('!Q', await reader.readexactly(8))
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return first & 0x0F, payload
+
+
+class Subscriber:
+    """1つの購読者（間引きの設定とリングバッファ上の読み出し位置）"""
+
+    def __init__(self, name: str, cursor: int = 0):
+        self.name = name
+        self.every = 1
+        self.min_interval_ms = 0.0
+        self.cursor = cursor       # 次に送るレコードの通し番号
+        self.address: Any = None   # udp の送信先
+        self.last_seen = time.monotonic()
+        self._last_timestamp: Optional[int] = None
+
+        # 統計
+        self.sent_count = 0
+        self.dropped_count = 0
+
+    def configure(self, options: Dict[str, Any]):
+        """{"every": N, "max_hz": HZ} で間引きを設定（不正な値は無視）"""
+        try:
+            if 'every' in options:
+                self.every = max(1, int(options['every']))
+            if 'max_hz' in options:
+                max_hz = float(options['max_hz'])
+                self.min_interval_ms = 1000.0 / max_hz if max_hz > 0 else 0.0
+        except (TypeError, ValueError):
+            pass
+
+    def accept(self, sequence: int, timestamp: int) -> bool:
+        """間引きの設定に従い、このレコードを送るかどうか"""
+        if sequence % self.every:
+            return False
+        if self.min_interval_ms:
+            last = self._last_timestamp
+            # 時計が戻った場合はそこから数え直す
+            if last is not None and 0 <= timestamp - last < self.min_interval_ms:
+                return False
+            self._last_timestamp = timestamp
+        return True
+
+
+class Publisher:
+    """デコード済みのレコードを購読者へ配信するステージ
+
+    write() は受信パイプラインのシンクとして呼ばれ、start() で起動した
+    配信スレッドが購読者ごとにまとめて送信します。close() は残りの行を
+    送ってから接続を閉じます。
+    """
+
+    def __init__(self, endpoint: str,
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 batch_interval: float = DEFAULT_BATCH_INTERVAL,
+                 batch_max: int = DEFAULT_BATCH_MAX,
+                 slow_timeout: float = DEFAULT_SLOW_TIMEOUT):
+        self.endpoint = endpoint
+        self.transport, self.host, self.port = parse_endpoint(endpoint)
+        self.queue_size = max(1, queue_size)
+        self.batch_interval = batch_interval
+        self.batch_max = max(1, batch_max)
+        self.slow_timeout = slow_timeout
+
+        # 購読者の一覧は配信スレッドだけが置き換え、write() はその時点のタプルを使う
+        self.subscribers: Tuple[Subscriber, ...] = ()
+        # 配信する行のリングバッファ。write() はスロットを書いてから通し番号を進め、
+        # 配信スレッドは各購読者の位置から通し番号の手前までを読む
+        self._ring: List[Tuple[int, bytes]] = [(0, b'')] * self.queue_size
+        self._sequence = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._server: Any = None
+        self._closing = False
+        self._tasks: set = set()
+
+        # 統計
+        self.record_count = 0
+        self.connection_count = 0
+        self.slow_disconnects = 0
+        self._finished_sent = 0
+        self._finished_dropped = 0
+
+    @property
+    def address(self) -> str:
+        """実際に待ち受けているアドレス（ポート 0 を指定した場合も含む）"""
+        if self.transport == 'unix':
+            return f"unix://{self.host}"
+        return f"{self.transport}://{self.host}:{self.port}"
+
+    def start(self):
+        """配信スレッドを起動して待ち受けを開始（失敗時は OSError を送出）"""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="publisher", daemon=True)
+        self._thread.start()
+        try:
+            asyncio.run_coroutine_threadsafe(self._listen(), self._loop).result()
+        except BaseException:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = None
+            raise
+
+    def write(self, record: Dict[str, Any]):
+        """レコードをJSONの行にしてリングバッファに書く（購読者がいなければ何もしない）"""
+        self.record_count += 1
+        if not self.subscribers:
+            return
+        if type(record) is SensorSample:
+            line = record.to_json().encode('utf-8') + b'\n'
+            timestamp = record.timestamp
+        else:
+            line = json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n'
+            timestamp = record.get('timestamp', 0)
+        sequence = self._sequence
+        self._ring[sequence % self.queue_size] = (timestamp, line)
+        self._sequence = sequence + 1
+
+    def close(self):
+        """残りの行を送ってから待ち受けと接続を閉じる（ブロッキング）"""
+        if self._loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(
+                timeout=self.slow_timeout + 1.0)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def stats(self) -> Dict[str, int]:
+        """配信の統計（切断済みの購読者を含む）"""
+        subscribers = self.subscribers
+        return {
+            'records': self.record_count,
+            'subscribers': len(subscribers),
+            'connections': self.connection_count,
+            'slow_disconnects': self.slow_disconnects,
+            'sent': self._finished_sent + sum(s.sent_count for s in subscribers),
+            'dropped': self._finished_dropped + sum(s.dropped_count for s in subscribers),
+        }
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return (f"配信 {self.address}: 接続 {stats['connections']}, 送信 {stats['sent']} 行, "
+                f"ドロップ {stats['dropped']} 行, 遅い購読者の切断 {stats['slow_disconnects']}")
+
+    # --- 以下は配信スレッドのイベントループで実行 ---
+
+    async def _listen(self):
+        if self.transport == 'udp':
+            loop = asyncio.get_running_loop()
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: _UdpProtocol(self), local_addr=(self.host, self.port))
+            self._server = transport
+            self.port = transport.get_extra_info('sockname')[1]
+            self._spawn(self._udp_sender(transport))
+            return
+        if self.transport == 'unix':
+            if os.path.exists(self.host):
+                os.remove(self.host)  # 前回の実行で残ったソケットファイル
+            self._server = await asyncio.start_unix_server(self._handle_stream, self.host)
+        else:
+            self._server = await asyncio.start_server(self._handle_stream, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+
+    async def _shutdown(self):
+        self._closing = True
+        if self.transport != 'udp':
+            self._server.close()  # udp は _udp_sender が残りを送ってから閉じる
+        # 各接続は残りの行を送り終えると閉じる
+        if self._tasks:
+            await asyncio.wait(list(self._tasks), timeout=self.slow_timeout)
+        for task in list(self._tasks):
+            task.cancel()
+        if self.transport != 'udp':
+            await self._server.wait_closed()
+        if self.transport == 'unix' and os.path.exists(self.host):
+            os.remove(self.host)
+
+    def _spawn(self, coroutine) -> asyncio.Task:
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _add(self, subscriber: Subscriber):
+        subscriber.cursor = self._sequence
+        self.subscribers = self.subscribers + (subscriber,)
+        self.connection_count += 1
+
+    def _remove(self, subscriber: Subscriber):
+        if subscriber not in self.subscribers:
+            return
+        self.subscribers = tuple(s for s in self.subscribers if s is not subscriber)
+        self._finished_sent += subscriber.sent_count
+        self._finished_dropped += subscriber.dropped_count
+
+    def _pending(self, subscriber: Subscriber) -> int:
+        return self._sequence - subscriber.cursor
+
+    def _take(self, subscriber: Subscriber) -> List[bytes]:
+        """購読者の位置から最大 batch_max 件を読み、送る行を返す"""
+        ring = self._ring
+        capacity = self.queue_size
+        cursor = subscriber.cursor
+        sequence = self._sequence
+        if sequence - cursor > capacity:
+            subscriber.dropped_count += sequence - capacity - cursor
+            cursor = sequence - capacity
+        stop = min(sequence, cursor + self.batch_max)
+        taken = []
+        for number in range(cursor, stop):
+            timestamp, line = ring[number % capacity]
+            if subscriber.accept(number, timestamp):
+                taken.append((number, line))
+        subscriber.cursor = stop
+        # 読んでいる間に write() が上書きしたスロットは捨てる
+        overwritten = self._sequence - capacity
+        if taken and taken[0][0] < overwritten:
+            kept = [(number, line) for number, line in taken if number >= overwritten]
+            subscriber.dropped_count += len(taken) - len(kept)
+            taken = kept
+        subscriber.sent_count += len(taken)
+        return [line for _, line in taken]
+
+    async def _next_batch(self, subscriber: Subscriber, receiver: asyncio.Future) -> Optional[bytes]:
+        """次に送る行をまとめて返す（終了時や購読者の切断時に送る行がなければ None）"""
+        while True:
+            if self._pending(subscriber) < self.batch_max and not self._closing:
+                await asyncio.sleep(self.batch_interval)
+            lines = self._take(subscriber)
+            if lines:
+                return b''.join(lines)
+            if self._closing and not self._pending(subscriber):
+                return None
+            if receiver.done():
+                # 切断された、または上限を超える行で読み出しを止めた。配信がなくても閉じる
+                return None
+
+    async def _handle_stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info('peername') or self.host
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER_SIZE)
+        subscriber = Subscriber(str(peer))
+        websocket = self.transport == 'ws'
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        try:
+            if websocket and not await self._ws_handshake(reader, writer, subscriber):
+                return
+            self._add(subscriber)
+            receiver = asyncio.ensure_future(self._receive_options(reader, writer, subscriber))
+            try:
+                while not receiver.done():
+                    batch = await self._next_batch(subscriber, receiver)
+                    if batch is None:
+                        break
+                    writer.write(ws_frame(batch) if websocket else batch)
+                    try:
+                        await asyncio.wait_for(writer.drain(), self.slow_timeout)
+                    except asyncio.TimeoutError:
+                        # 送れなかった行はドロップとして数える
+                        subscriber.dropped_count += min(self._pending(subscriber), self.queue_size)
+                        self.slow_disconnects += 1
+                        break
+                if websocket and self._closing:
+                    writer.write(ws_frame(b'', _WS_CLOSE))
+            finally:
+                receiver.cancel()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            # 切断や、長すぎる・壊れたハンドシェイクは接続を閉じて終わる
+            pass
+        finally:
+            self._remove(subscriber)
+            self._tasks.discard(task)
+            writer.close()
+
+    async def _receive_options(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                               subscriber: Subscriber):
+        """購読者から送られる間引きの設定を読む（切断されたら終了）"""
+        try:
+            while True:
+                if self.transport == 'ws':
+                    opcode, payload = await read_ws_frame(reader)
+                    if opcode == _WS_CLOSE:
+                        return
+                    if opcode == _WS_PING:
+                        writer.write(ws_frame(payload, _WS_PONG))
+                        continue
+                    if opcode != _WS_TEXT:
+                        continue
+                else:
+                    payload = await reader.readline()
+                    if not payload:
+                        return
+                _apply_options(subscriber, payload)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # ValueError は readline() が上限を超える行を受け取ったとき
+            return
+
+    async def _ws_handshake(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                            subscriber: Subscriber) -> bool:
+        request = await reader.readuntil(b'\r\n\r\n')
+        lines = request.decode('latin-1').split('\r\n')
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        key = headers.get('sec-websocket-key')
+        if key is None or 'websocket' not in headers.get('upgrade', '').lower():
+            writer.write(b'HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n')
+            return False
+        target = lines[0].split(' ')[1] if len(lines[0].split(' ')) > 1 else '/'
+        subscriber.configure(dict(parse_qsl(urlsplit(target).query)))
+        accept = base64.b64encode(hashlib.sha1(key.encode('latin-1') + _WS_GUID).digest())
+        writer.write(b'HTTP/1.1 101 Switching Protocols\r\n'
+                     b'Upgrade: websocket\r\nConnection: Upgrade\r\n'
+                     b'Sec-WebSocket-Accept: ' + accept + b'\r\n\r\n')
+        await writer.drain()
+        return True
+
+    async def _udp_sender(self, transport: asyncio.DatagramTransport):
+        while True:
+            if not self._closing:
+                await asyncio.sleep(self.batch_interval)
+            now = time.monotonic()
+            pending = False
+            for subscriber in self.subscribers:
+                if now - subscriber.last_seen > UDP_SUBSCRIPTION_TTL:
+                    self._remove(subscriber)
+                    continue
+                datagram: List[bytes] = []
+                size = 0
+                for line in self._take(subscriber):
+                    if datagram and size + len(line) > UDP_MAX_DATAGRAM:
+                        transport.sendto(b''.join(datagram), subscriber.address)
+                        datagram, size = [], 0
+                    datagram.append(line)
+                    size += len(line)
+                if datagram:
+                    transport.sendto(b''.join(datagram), subscriber.address)
+                pending = pending or self._pending(subscriber) > 0
+            if self._closing and not pending:
+                transport.close()
+                return
+
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    """受け取ったデータグラムの送信元を購読者として登録する"""
+
+    def __init__(self, publisher: Publisher):
+        self.publisher = publisher
+        self.by_address: Dict[Any, Subscriber] = {}
+
+    def datagram_received(self, data: bytes, addr: Any):
+        publisher = self.publisher
+        subscriber = self.by_address.get(addr)
+        if subscriber is None or subscriber not in publisher.subscribers:
+            subscriber = Subscriber(f"{addr[0]}:{addr[1]}")
+            subscriber.address = addr
+            self.by_address[addr] = subscriber
+            publisher._add(subscriber)
+        subscriber.last_seen = time.monotonic()
+        options = _apply_options(subscriber, data)
+        if options.get('unsubscribe'):
+            publisher._remove(subscriber)
+            del self.by_address[addr]
+
+
+def _apply_options(subscriber: Subscriber, payload: bytes) -> Dict[str, Any]:
+    try:
+        options = json.loads(payload) if payload.strip() else {}
+    except ValueError:
+        return {}
+    if isinstance(options, dict):
+        subscriber.configure(options)
+        return options
+    return {}
+
+
+async def iter_batches(endpoint: str, every: int = 1,
+                       max_hz: Optional[float] = None) -> AsyncIterator[bytes]:
+    """Publisher に接続し、受け取ったメッセージ（改行区切りのJSON行）を順に返す"""
+    transport, host, port = parse_endpoint(endpoint)
+    options = json.dumps({'every': every, 'max_hz': max_hz or 0}).encode('utf-8')
+    if transport == 'udp':
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        class Protocol(asyncio.DatagramProtocol):
+            def datagram_received(self, data, addr):
+                queue.put_nowait(data)
+
+        udp, _ = await loop.create_datagram_endpoint(Protocol, remote_addr=(host, port))
+        try:
+            udp.sendto(options)
+            renew_at = loop.time() + UDP_SUBSCRIPTION_TTL / 2
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), max(0.0, renew_at - loop.time()))
+                except asyncio.TimeoutError:
+                    udp.sendto(options)
+                    renew_at = loop.time() + UDP_SUBSCRIPTION_TTL / 2
+        finally:
+            udp.sendto(b'{"unsubscribe":true}')
+            udp.close()
+
+    if transport == 'unix':
+        reader, writer = await asyncio.open_unix_connection(host)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    try:
+        if transport == 'ws':
+            key = base64.b64encode(os.urandom(16))
+            query = f"every={every}" + (f"&max_hz={max_hz}" if max_hz else "")
+            writer.write(f"GET /?{query} HTTP/1.1\r\nHost: {host}:{port}\r\n".encode('latin-1') +
+                         b'Upgrade: websocket\r\nConnection: Upgrade\r\n'
+                         b'Sec-WebSocket-Key: ' + key + b'\r\nSec-WebSocket-Version: 13\r\n\r\n')
+            response = await reader.readuntil(b'\r\n\r\n')
+            if b' 101 ' not in response.split(b'\r\n', 1)[0]:
+                raise ConnectionError("WebSocket のハンドシェイクに失敗しました")
+            while True:
+                opcode, payload = await read_ws_frame(reader)
+                if opcode == _WS_CLOSE:
+                    return
+                if opcode == _WS_TEXT:
+                    yield payload
+        else:
+            writer.write(options + b'\n')
+            while True:
+                data = await reader.read(1 << 16)
+                if not data:
+                    return
+                # 行の途中で分かれた分は次のメッセージに回す
+                end = data.rfind(b'\n') + 1
+                while end == 0 or end < len(data):
+                    more = await reader.read(1 << 16)
+                    if not more:
+                        break
+                    data += more
+                    end = data.rfind(b'\n') + 1
+                yield data[:end]
+    finally:
+        writer.close()
+
+
+async def iter_records(endpoint: str, every: int = 1,
+                       max_hz: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Publisher に接続し、受け取ったレコードを1件ずつ返す"""
+    async for batch in iter_batches(endpoint, every, max_hz):
+        for line in batch.splitlines():
+            if line:
+                yield json.loads(line)
+
+
+async def _print_rate(endpoint: str, every: int, max_hz: Optional[float]):
+    count = 0
+    started = last = time.monotonic()
+    latest: Dict[str, Any] = {}
+    async for batch in iter_batches(endpoint, every, max_hz):
+        lines = batch.splitlines()
+        count += len(lines)
+        now = time.monotonic()
+        if now - last >= 1.0:
+            latest = json.loads(lines[-1])
+            accel = latest.get('accelerometer') or {}
+            print(f"{count:>10,} 件  {count / (now - started):8.1f} 件/s  "
+                  f"timestamp={latest.get('timestamp')}  "
+                  f"accel=({accel.get('x', 0):.2f}, {accel.get('y', 0):.2f}, {accel.get('z', 0):.2f})")
+            last = now
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publisher の配信を購読して受信レートを表示する")
+    parser.add_argument('endpoint', help="tcp://host:port / unix:///path / ws://host:port / udp://host:port")
+    parser.add_argument('--every', type=int, default=1, help="N 件に1件だけ受け取る (既定: 1)")
+    parser.add_argument('--max-hz', type=float, default=None, help="受け取る最大レート Hz")
+    args = parser.parse_args()
+    try:
+        parse_endpoint(args.endpoint)
+        asyncio.run(_print_rate(args.endpoint, args.every, args.max_hz))
+    except ValueError as e:
+        print(f"✗ {e}")
+    except (ConnectionError, OSError) as e:
+        print(f"✗ 接続できませんでした: {e}")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
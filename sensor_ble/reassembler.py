@@ -0,0 +1,204 @@
+"""
+分割送信されたJSONフレームの再構築
+
+app_for_m5 版のAndroidアプリは1サンプル分のJSONを244バイト以下の
+チャンクに分割してNotificationで送信します。FrameReassembler は
+受信したチャンク (bytes / bytearray / memoryview) を事前確保した
+bytearray に追記し、bytes.find / bytes.count と正規表現による一括走査で
+ブレースと文字列を追跡して、完成したJSONフレームを bytes として返します。
+
+- 走査はバイト単位で行うため、UTF-8の多バイト文字がチャンク境界で
+  分断されていても問題ありません（構造文字はすべてASCIIであり、
+  UTF-8の継続バイトと衝突しないため）。デコードは完成フレームに対して
+  一度だけ行います。
+- 文字列内のエスケープ（\\" や \\\\）はチャンクをまたいでも正しく扱います。
+"""
+
+import re
+from typing import List, Union
+
+# M5版用の設定（受信スクリプトと同じ既定値）
+MAX_BUFFER_SIZE = 2000   # 最大バッファサイズ
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+_BRACES = re.compile(rb'[{}]')
+# 文字列外で意味を持つ文字
+_TOKENS = re.compile(rb'[{}"]')
+# 文字列の残り（閉じ引用符まで）。group(1) は閉じ引用符
+_STRING_REST = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*(")?', re.DOTALL)
+
+_OPEN_BRACE = 0x7B   # '{'
+_CLOSE_BRACE = 0x7D  # '}'
+
+
+class FrameReassembler:
+    """チャンク列からJSONフレームを再構築するクラス"""
+
+    def __init__(self, max_size: int = MAX_BUFFER_SIZE):
+        self.max_size = max_size
+        self._buffer = bytearray(max_size)
+        self._length = 0      # バッファ内の有効バイト数
+        self._scanned = 0     # 走査済みの位置
+        self._depth = 0       # ブレースのネスト深さ
+        self._in_string = False
+        self._escape = False  # 直前がバックスラッシュ（文字列内）
+
+        # 統計
+        self.frame_count = 0
+        self.overflow_count = 0
+        self.discarded_bytes = 0
+
+    @property
+    def pending(self) -> int:
+        """未完成フレームとしてバッファに残っているバイト数"""
+        return self._length
+
+    def reset(self):
+        """バッファと走査状態をクリア"""
+        self._length = 0
+        self._scanned = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, data: BytesLike) -> List[bytes]:
+        """チャンクを追加し、完成したフレームのリストを返す"""
+        size = len(data)
+        if size == 0:
+            return []
+
+        if self._length + size > self.max_size:
+            self.overflow_count += 1
+            self.discarded_bytes += self._length
+            self.reset()
+            if size > self.max_size:
+                self.discarded_bytes += size
+                return []
+
+        buf = self._buffer
+        start = self._length
+        buf[start:start + size] = data
+        end = start + size
+
+        # NULL終端以降は無視
+        nul = buf.find(0, start, end)
+        if nul != -1:
+            self.discarded_bytes += end - nul
+            end = nul
+        self._length = end
+
+        return self._scan()
+
+    def _scan(self) -> List[bytes]:
+        """未走査の領域を走査し、完成フレームを取り出す"""
+        buf = self._buffer
+        frames: List[bytes] = []
+        pos = self._scanned
+        end = self._length
+
+        while pos < end:
+            if self._depth == 0:
+                # フレーム外: 次の'{'まで読み飛ばす
+                brace = buf.find(b'{', pos, end)
+                if brace == -1:
+                    self.discarded_bytes += end - pos
+                    self._length = 0
+                    pos = 0
+                    break
+                if brace > 0:
+                    self.discarded_bytes += brace
+                    self._compact(brace)
+                    end = self._length
+                    pos = 0
+                else:
+                    pos = brace
+                self._depth = 1
+                pos += 1
+                continue
+
+            if self._escape or buf.find(b'\\', pos, end) != -1:
+                pos = self._scan_escaped(pos, end)
+            else:
+                pos = self._scan_plain(pos, end)
+
+            if self._depth == 0:
+                frames.append(bytes(buf[0:pos]))
+                self.frame_count += 1
+                self._compact(pos)
+                end = self._length
+                pos = 0
+
+        self._scanned = pos
+        return frames
+
+    def _scan_plain(self, pos: int, end: int) -> int:
+        """エスケープを含まない区間の走査
+
+        ブレースだけを検索し、直前までの'"'の個数の偶奇で
+        文字列内かどうかを判定します。フレームが閉じた場合は
+        その直後の位置を返します。
+        """
+        buf = self._buffer
+        in_string = self._in_string
+        for match in _BRACES.finditer(buf, pos, end):
+            brace = match.start()
+            if buf.count(b'"', pos, brace) & 1:
+                in_string = not in_string
+            pos = brace + 1
+            if in_string:
+                continue
+            if buf[brace] == _OPEN_BRACE:
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._in_string = False
+                    return pos
+        if buf.count(b'"', pos, end) & 1:
+            in_string = not in_string
+        self._in_string = in_string
+        return end
+
+    def _scan_escaped(self, pos: int, end: int) -> int:
+        """エスケープを含む区間の走査（トークン単位）"""
+        buf = self._buffer
+        while pos < end:
+            if self._in_string:
+                if self._escape:
+                    # エスケープ: 次の1バイトは無条件に読み飛ばす
+                    self._escape = False
+                    pos += 1
+                    continue
+                match = _STRING_REST.match(buf, pos, end)
+                if match.group(1) is not None:
+                    self._in_string = False
+                    pos = match.end()
+                    continue
+                if match.end() < end:
+                    # 区間末尾が未完のエスケープ（'\\'の直後で分割された）
+                    self._escape = True
+                return end
+
+            match = _TOKENS.search(buf, pos, end)
+            if match is None:
+                return end
+            pos = match.end()
+            c = buf[match.start()]
+            if c == _OPEN_BRACE:
+                self._depth += 1
+            elif c == _CLOSE_BRACE:
+                self._depth -= 1
+                if self._depth == 0:
+                    return pos
+            else:
+                # 開始引用符: 文字列の残りを読む
+                self._in_string = True
+        return pos
+
+    def _compact(self, offset: int):
+        """offset より前のバイトを捨て、残りを先頭へ詰める"""
+        remaining = self._length - offset
+        if remaining > 0:
+            self._buffer[0:remaining] = self._buffer[offset:self._length]
+        self._length = remaining
@@ -0,0 +1,757 @@
+"""
+Sensor BLE - PC側データ受信
+
+bleakライブラリを使用してAndroidデバイスからBLE経由でセンサーデータを
+リアルタイムで受信し、保存・表示します。app 版（1 Notification = 1 JSON）と
+app_for_m5 版（MTUに合わせた分割送信）の違いはフレーミングだけなので、
+--framing で切り替えます。
+
+使用方法:
+    pip install .            # sensor-ble コマンドをインストール
+    sensor-ble [--framing json|m5] [--queue-size N] [--backpressure POLICY] ...
+    python3 -m sensor_ble [--framing json|m5] ...
+
+フレーミング:
+    - json: 1 Notification = 1 JSON（app フォルダのAndroidアプリ）
+    - m5:   分割送信されたJSONを終端マーカー（改行）・ブレースカウント・
+            タイムアウト（300ms）で再構築（app_for_m5 のAndroidアプリ）
+
+機能:
+    - BLEデバイスのスキャン
+    - センサーデータサービスの検索と接続
+    - リアルタイムでセンサーデータを受信 (Notification)
+    - JSONデータのパース（m5 は分割送信されたデータの再構築も）
+    - CSVファイルへの保存（まとめ書き・ファイル分割・gzip圧縮: sensor_ble.csv_sink）
+    - 列指向形式 (.npy / Parquet) での保存（--sink: sensor_ble.columnar）
+    - 複数デバイスへの同時接続（--multi: sensor_ble.supervisor）
+    - 複数デバイスのデコード・保存を複数プロセスで実行（--multi --workers N: sensor_ble.workers）
+    - 切断時の自動再接続と欠損区間の記録（sensor_ble.session）
+    - 受信Notificationのそのままの記録（--capture: sensor_ble.capture）
+    - スライディングウィンドウの特徴量計算（--features: sensor_ble.features）
+    - 姿勢推定 Madgwick / Mahony（--fusion: sensor_ble.fusion）
+    - 一定間隔の行へのリサンプリング（--resample: sensor_ble.resample）
+    - デッドバンド・間引き・スウィングドア圧縮による保存データの削減（--reduce: sensor_ble.reduction）
+    - 受信データのローカル配信 TCP / WebSocket / UDP / Unixソケット（--publish: sensor_ble.publisher）
+    - 段階ごとの処理時間の計測と Prometheus 形式での公開（--metrics: sensor_ble.metrics）
+    - 実機なしでの動作（--replay / --synthetic-rate: sensor_ble.fake_ble）
+    - コンソールへの表示（一定間隔で更新するダッシュボード: sensor_ble.dashboard、
+      --verbose で1件ずつ表示）
+    （再構築・パース・保存・表示はワーカースレッドで実行: sensor_ble.pipeline）
+
+起動を速くするため、bleak・NumPy・pyarrow と、オプションを指定したときだけ
+使うモジュールは必要になった時点で読み込みます。
+
+ほかの asyncio アプリケーションへの組み込み:
+    receiver = SensorDataReceiverBLE('out.csv', framing='m5', stages=[my_stage])
+    task = asyncio.ensure_future(receiver.run())   # task.cancel() で停止
+    # またはコマンドラインと同じ引数で: await main(['--framing', 'm5', '--sink', 'npy'])
+
+シンクは open() / write(data) / flush_if_due() / close() と segments・row_count を、
+ステージは write(data) と（必要なら）close() を持つ任意のオブジェクトです。
+コマンドラインのステージは register_stage() で追加できます。
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .ble import CHARACTERISTIC_UUID, SERVICE_UUID
+from .csv_sink import DEFAULT_FLUSH_INTERVAL, DEFAULT_FLUSH_ROWS, CsvSink
+from .dashboard import DEFAULT_REFRESH_HZ, Dashboard
+from .decoders import BUFFER_TIMEOUT_MS, ChunkedJsonDecoder, JsonDecoder
+from .pipeline import (BACKPRESSURE_POLICIES, DEFAULT_QUEUE_SIZE, DROP_OLDEST, WORKER_BLOCK_TIMEOUT,
+                       IngestPipeline)
+from .publisher import DEFAULT_QUEUE_SIZE as DEFAULT_PUBLISH_QUEUE_SIZE
+from .reassembler import MAX_BUFFER_SIZE
+from .schema import GROUP_BITS, as_sample
+from .session import ReconnectingSession, SessionLog
+from .sinks import SINK_EXTENSIONS, SINK_TYPES, create_sink, unsupported_options
+from .supervisor import DEFAULT_MAX_CONNECTIONS, MultiDeviceSupervisor, address_slug
+
+FRAMINGS = ('json', 'm5')
+# フレーミングごとの出力ファイル名の先頭と表示名
+OUTPUT_PREFIXES = {'json': 'sensor_data_ble', 'm5': 'sensor_data_ble_m5'}
+_TITLES = {'json': "", 'm5': " (M5Stack対応版)"}
+_APP_NAMES = {'json': "Androidアプリ", 'm5': "app_for_m5 アプリ"}
+WORKER_STATUS_INTERVAL = 5.0  # 秒。--workers 時に保存件数を表示する間隔
+# 秒。--verbose 時に計測値を表示する間隔（sensor_ble.metrics は --metrics のときだけ読み込む）
+DEFAULT_SUMMARY_INTERVAL = 10.0
+
+
+def make_decoder(framing: str) -> Callable[..., List[Dict[str, Any]]]:
+    """フレーミングに応じた新しいデコーダ（SensorSample を返す）"""
+    if framing not in FRAMINGS:
+        raise ValueError(f"未対応のフレーミングです: {framing}")
+    if framing == 'm5':
+        return ChunkedJsonDecoder(BUFFER_TIMEOUT_MS, MAX_BUFFER_SIZE, samples=True)
+    return JsonDecoder(samples=True)
+
+
+def _is_ble_error(error: Exception) -> bool:
+    """bleak の例外か（判定のためだけに bleak を読み込まない）"""
+    return type(error).__module__.split('.')[0] == 'bleak'
+
+
+class SensorDataReceiverBLE:
+    """BLEセンサーデータ受信クラス"""
+
+    def __init__(self, output_csv: str = "sensor_data_ble.csv",
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 backpressure: str = DROP_OLDEST,
+                 sink: Optional[Any] = None,
+                 session_log: Optional[SessionLog] = None,
+                 backend: Any = None,
+                 capture: Optional[Any] = None,
+                 verbose: bool = False,
+                 refresh_hz: float = DEFAULT_REFRESH_HZ,
+                 metrics: Optional[Any] = None,
+                 metrics_port: Optional[int] = None,
+                 metrics_interval: float = DEFAULT_SUMMARY_INTERVAL,
+                 stages: Iterable[Any] = (),
+                 stage_outputs: Iterable[Tuple[str, Any]] = (),
+                 framing: str = 'json'):
+        self.framing = framing
+        self.title = "Sensor BLE - データ受信スクリプト" + _TITLES[framing]
+        self.output_csv = output_csv
+        self.sink = sink or CsvSink(output_csv)
+        self.data_count = 0
+        self.display_count = 0
+        self.client: Optional[Any] = None
+        self.backend = backend
+        self.session_log = session_log or SessionLog()
+        self.capture = capture
+        self.metrics = metrics
+        self.metrics_port = metrics_port
+        self.metrics_interval = metrics_interval
+        self.metrics_server: Optional[Any] = None
+        # レコードから別の出力を作る処理（特徴量・姿勢・リサンプリング・配信）と、
+        # その出力先の (表示名, シンク)
+        self.stages = list(stages)
+        self.stage_outputs = list(stage_outputs)
+        # 既定では集計してダッシュボードに表示し、verbose のときだけ1件ずつ表示する
+        self.dashboard: Optional[Dashboard] = None
+        if not verbose:
+            self.dashboard = Dashboard(refresh_hz, stats_provider=lambda: self.pipeline.stats(),
+                                       metrics=metrics,
+                                       title="Sensor BLE" + _TITLES[framing])
+
+        # 受信コールバックから切り離したデコード・保存・表示パイプライン
+        self.decoder = make_decoder(framing)
+        self.pipeline = IngestPipeline(
+            self.decoder,
+            sinks=[self.save_record] + [stage.write for stage in self.stages],
+            displays=[self.display_data if verbose else self.dashboard.update],
+            queue_size=queue_size,
+            policy=backpressure,
+            capture=capture,
+            metrics=metrics,
+        )
+
+    def initialize_sink(self):
+        """出力ファイルを初期化（失敗時は RuntimeError を送出）"""
+        try:
+            self.sink.open()
+            print(f"✓ 出力ファイルを作成しました: {self.sink.segments[0]}")
+            if self.capture is not None:
+                self.capture.open()
+                print(f"✓ 受信データの記録ファイルを作成しました: {self.capture.path}")
+            for label, stage_sink in self.stage_outputs:
+                stage_sink.open()
+                print(f"✓ {label}の出力ファイルを作成しました: {stage_sink.segments[0]}")
+        except Exception as e:
+            raise RuntimeError(f"出力ファイル作成エラー: {e}") from e
+
+    def clear_buffer(self):
+        """バッファをクリア"""
+        self.decoder.reset()
+
+    def notification_handler(self, sender: int, data: bytearray):
+        """Notification受信時のコールバック（キューに積むだけ）
+
+        分割データの再構築・パースは decode ステージで行う
+        """
+        self.pipeline.submit(data)
+
+    def save_record(self, data: Dict[str, Any]):
+        """データを保存（まとめて書き込み）"""
+        try:
+            self.sink.write(data)
+            self.data_count += 1
+        except Exception as e:
+            print(f"書き込みエラー: {e}")
+
+    def display_data(self, data: Dict[str, Any]):
+        """データをコンソールに表示"""
+        self.display_count += 1
+        sample = as_sample(data)
+        dt = datetime.fromtimestamp(sample.timestamp / 1000.0)
+        device = f" [{sample.device}]" if sample.device is not None else ""
+        print(f"\n--- データ #{self.display_count}{device} ({dt.strftime('%H:%M:%S.%f')[:-3]}) ---")
+
+        present = sample.present
+        if present & GROUP_BITS['accelerometer']:
+            print(f"加速度: X={sample.accel_x:.3f}, Y={sample.accel_y:.3f}, Z={sample.accel_z:.3f} m/s²")
+
+        if present & GROUP_BITS['gyroscope']:
+            print(f"ジャイロ: X={sample.gyro_x:.3f}, Y={sample.gyro_y:.3f}, Z={sample.gyro_z:.3f} rad/s")
+
+        if present & GROUP_BITS['light']:
+            print(f"光: {sample.light_lux:.1f} lux")
+
+        if present & GROUP_BITS['gps']:
+            print(f"GPS: 緯度={sample.gps_lat:.6f}, 経度={sample.gps_lon:.6f}, 高度={sample.gps_alt:.1f}m")
+
+        if present & GROUP_BITS['magnetometer']:
+            print(f"磁気: X={sample.magnet_x:.3f}, Y={sample.magnet_y:.3f}, Z={sample.magnet_z:.3f} μT")
+
+        if present & GROUP_BITS['proximity']:
+            print(f"近接: {sample.proximity_distance:.1f} cm")
+
+        if present & GROUP_BITS['gravity']:
+            print(f"重力: X={sample.gravity_x:.3f}, Y={sample.gravity_y:.3f}, Z={sample.gravity_z:.3f} m/s²")
+
+    def on_connect(self, client: Any):
+        """接続（再接続を含む）のたびに呼ばれる"""
+        self.client = client
+        print(f"✓ デバイスに接続しました: {client.is_connected}")
+        if self.framing == 'm5':
+            # MTU情報を表示（可能であれば）
+            try:
+                mtu = client.mtu_size
+                print(f"✓ MTUサイズ: {mtu} bytes")
+            except AttributeError:
+                print("  MTUサイズ: 取得不可")
+
+        print(f"\nNotificationの購読を開始します (キャラクタリスティック: {CHARACTERISTIC_UUID})")
+
+    async def flush_periodically(self):
+        """データが途切れてもバッファが残らないよう定期的にフラッシュ"""
+        while True:
+            await asyncio.sleep(1)
+            self.sink.flush_if_due()
+            if self.capture is not None:
+                self.capture.flush_if_due()
+            for _, stage_sink in self.stage_outputs:
+                stage_sink.flush_if_due()
+
+    def start_metrics_server(self, stats_provider: Callable[[], Dict[str, int]]):
+        """--metrics-port 指定時に Prometheus 形式のエンドポイントを起動"""
+        if self.metrics is None or self.metrics_port is None:
+            return
+        try:
+            self.metrics_server = self.metrics.serve(self.metrics_port, stats_provider=stats_provider)
+            print(f"✓ 計測値を公開しています: http://127.0.0.1:{self.metrics_port}/metrics")
+        except OSError as e:
+            print(f"✗ 計測値のHTTPサーバーを起動できませんでした: {e}")
+
+    async def report_metrics_periodically(self):
+        """--verbose 時に計測値の要約を定期的に表示（ダッシュボード表示時は画面内に表示）"""
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            print("\n--- 計測 ---\n" + "\n".join(self.metrics.summary_lines()))
+
+    def stop_metrics(self):
+        """HTTPサーバーを止め、最終的な計測値を表示"""
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+            self.metrics_server = None
+        if self.metrics is not None:
+            print("\n計測値（開始からの累計の分位点）:")
+            for line in self.metrics.summary_lines():
+                print(f"  {line}")
+
+    async def run(self):
+        print("\n" + "="*60)
+        print(self.title)
+        print("="*60)
+        if self.framing == 'm5':
+            print("分割送信対応: 有効")
+            print(f"バッファタイムアウト: {BUFFER_TIMEOUT_MS}ms")
+            print(f"最大バッファサイズ: {MAX_BUFFER_SIZE} bytes")
+            print(f"受信キュー: {self.pipeline.raw_queue.maxsize} ({self.pipeline.raw_queue.policy})")
+
+        self.initialize_sink()
+        self.pipeline.start()
+        self.start_metrics_server(self.pipeline.stats)
+
+        session = ReconnectingSession(
+            self.notification_handler,
+            # 再接続時は途中まで再構築したデータを受信順を保ったまま捨てる
+            on_reconnect=self.pipeline.reset_decoder,
+            on_connect=self.on_connect,
+            session_log=self.session_log,
+            backend=self.backend,
+        )
+        self.session_log.open()
+        flusher = asyncio.ensure_future(self.flush_periodically())
+        dashboard_task: Optional[asyncio.Future] = None
+        reporter: Optional[asyncio.Future] = None
+        if self.metrics is not None and self.dashboard is None:
+            reporter = asyncio.ensure_future(self.report_metrics_periodically())
+
+        print("\nBLEデバイスをスキャンしています...")
+        try:
+            device = await session.find_device()
+
+            if device is None:
+                print(f"✗ センサーデバイスが見つかりませんでした (サービスUUID: {SERVICE_UUID})")
+                print(f"  {_APP_NAMES[self.framing]}がアドバタイズを開始しているか確認してください。")
+                return
+
+            print(f"✓ デバイスが見つかりました: {device.name} ({device.address})")
+            print("\nデータ受信を開始します（切断時は自動で再接続します）...")
+            print("終了するには Ctrl+C を押してください\n")
+            if self.dashboard is not None:
+                dashboard_task = asyncio.ensure_future(self.dashboard.run())
+            await session.run()
+
+        except Exception as e:
+            if _is_ble_error(e):
+                print(f"✗ BLEエラーが発生しました: {e}")
+            else:
+                print(f"✗ 予期せぬエラーが発生しました: {e}")
+        finally:
+            flusher.cancel()
+            if reporter is not None:
+                reporter.cancel()
+            if dashboard_task is not None:
+                dashboard_task.cancel()
+            if session.connect_count:
+                print("\n✓ デバイスから切断しました")
+            # キューに残っているデータを処理しきってから出力ファイルを閉じる
+            self.pipeline.stop()
+            self.sink.close()
+            if self.capture is not None:
+                self.capture.close()
+            for stage in self.stages:
+                # 保留中の行がある処理（Resampler）は残りを出力する
+                if hasattr(stage, 'close'):
+                    stage.close()
+            for _, stage_sink in self.stage_outputs:
+                stage_sink.close()
+            if dashboard_task is not None:
+                self.dashboard.draw()
+            stats = self.pipeline.stats()
+            print(f"\nデータ受信を停止しました。受信データ数: {self.data_count}")
+            print(f"受信Notification数: {stats['received']}, "
+                  f"ドロップ数: {stats['dropped_raw']}, "
+                  f"パースエラー数: {stats['parse_errors']}")
+            print(f"保存先: {', '.join(self.sink.segments)}")
+            if hasattr(self.sink, 'summary'):
+                print(self.sink.summary())
+            if self.capture is not None:
+                print(f"受信データの記録: {self.capture.path} ({self.capture.record_count} 件)")
+            for label, stage_sink in self.stage_outputs:
+                print(f"{label}: {', '.join(stage_sink.segments)} ({stage_sink.row_count} 行)")
+            for stage in self.stages:
+                # 出力ファイルを持たない処理（配信）は統計を表示する
+                if hasattr(stage, 'summary'):
+                    print(stage.summary())
+            summary = self.session_log.summary()
+            if summary['disconnects']:
+                print(f"切断回数: {summary['disconnects']}, "
+                      f"欠損時間: 合計 {summary['gap_total_s']:.2f} 秒 / 最大 {summary['gap_max_s']:.2f} 秒, "
+                      f"再接続: 平均 {summary['reconnect_latency_mean_s']:.2f} 秒, "
+                      f"最初のデータまで: 平均 {summary['first_sample_latency_mean_s']:.2f} 秒")
+            self.session_log.close()
+            self.stop_metrics()
+
+    async def run_multi(self, sink_factory: Callable[[str], Any],
+                        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                        capture_factory: Optional[Callable[[str], Any]] = None,
+                        pool: Optional[Any] = None):
+        """複数デバイスに同時接続して受信（デバイスごとに出力ファイルを分ける）
+
+        pool（sensor_ble.workers.WorkerPool）を指定すると、デコードと保存は
+        そのワーカープロセスで行い、このプロセスはNotificationの転送だけを行います。
+        """
+        print("\n" + "="*60)
+        print(f"{self.title} [複数デバイス]")
+        print("="*60)
+        print(f"最大同時接続数: {max_connections}")
+        if pool is not None:
+            try:
+                pool.start()
+            except (OSError, ValueError) as e:
+                raise RuntimeError(f"ワーカープロセスを起動できませんでした: {e}") from e
+            print(f"ワーカープロセス: {pool.workers}")
+        print("\nBLEデバイスをスキャンしています...")
+        print("終了するには Ctrl+C を押してください")
+
+        supervisor = MultiDeviceSupervisor(
+            lambda: make_decoder(self.framing),
+            sink_factory,
+            display=self.display_data if self.dashboard is None else self.dashboard.update,
+            max_connections=max_connections,
+            queue_size=self.pipeline.raw_queue.maxsize,
+            backpressure=self.pipeline.raw_queue.policy,
+            backend=self.backend,
+            capture_factory=capture_factory,
+            metrics=self.metrics,
+            session_factory=pool.session if pool is not None else None,
+        )
+
+        async def flush_sessions():
+            while True:
+                await asyncio.sleep(1)
+                for session in list(supervisor.sessions.values()):
+                    session.flush_if_due()
+
+        def session_stats() -> Dict[str, int]:
+            total: Dict[str, int] = {}
+            for session in supervisor.finished_sessions + list(supervisor.sessions.values()):
+                for key, value in session.stats().items():
+                    total[key] = total.get(key, 0) + value
+            return total
+
+        async def report_workers():
+            # 記録はワーカーで行うため、ダッシュボードの代わりに件数だけを表示する
+            last = 0
+            while True:
+                await asyncio.sleep(WORKER_STATUS_INTERVAL)
+                saved = sum(supervisor.stats().values())
+                print(f"保存: {saved:,} 件 ({(saved - last) / WORKER_STATUS_INTERVAL:,.0f} 件/秒), "
+                      f"接続中: {len(supervisor.sessions)} 台, "
+                      f"ドロップ数: {session_stats().get('dropped_raw', 0)}")
+                last = saved
+
+        self.start_metrics_server(session_stats)
+        flusher = asyncio.ensure_future(flush_sessions())
+        reporter: Optional[asyncio.Future] = None
+        if self.metrics is not None and self.dashboard is None:
+            reporter = asyncio.ensure_future(self.report_metrics_periodically())
+        dashboard_task: Optional[asyncio.Future] = None
+        if pool is not None:
+            reporter = asyncio.ensure_future(report_workers())
+        elif self.dashboard is not None:
+            self.dashboard.stats_provider = session_stats
+            dashboard_task = asyncio.ensure_future(self.dashboard.run())
+        try:
+            await supervisor.run()
+        finally:
+            # 各デバイスの出力はワーカーが閉じてから終了する
+            if pool is not None:
+                await asyncio.get_running_loop().run_in_executor(None, pool.stop)
+            flusher.cancel()
+            if reporter is not None:
+                reporter.cancel()
+            if dashboard_task is not None:
+                dashboard_task.cancel()
+                self.dashboard.draw()
+            print("\nデータ受信を停止しました。")
+            for address, count in supervisor.stats().items():
+                print(f"  {address}: {count} 件")
+            for session in supervisor.finished_sessions:
+                print(f"  保存先: {', '.join(session.segments)}")
+                if session.capture_path is not None:
+                    print(f"  受信データの記録: {session.capture_path}")
+                if session.summary:
+                    print('\n'.join(f"  {line}" for line in session.summary.splitlines()))
+            dropped = session_stats().get('dropped_raw', 0)
+            if pool is not None and dropped:
+                print(f"  ドロップ数: {dropped}")
+            self.stop_metrics()
+
+
+# --- コマンドライン ---
+
+# レコードから別の出力を作るステージ: (オプション名, args の属性名, 作成する関数, 引数を追加する関数)
+# 作成する関数は (args, 出力ファイル名の先頭, シンクを作る関数) を受け取り、
+# [(ステージ, (表示名, 出力シンク) または None), ...] を返す
+StageBuilder = Callable[[Any, str, Callable[[str], Any]], List[Tuple[Any, Optional[Tuple[str, Any]]]]]
+_STAGE_BUILDERS: List[Tuple[str, str, StageBuilder, Optional[Callable[[Any], None]]]] = []
+
+
+def register_stage(option: str, dest: str, build: StageBuilder,
+                   add_arguments: Optional[Callable[[Any], None]] = None):
+    """コマンドラインから使うステージを追加する
+
+    add_arguments は argparse.ArgumentParser を受け取ってオプションを追加する関数、
+    dest はステージを有効にするオプションの args 上の属性名です。
+    """
+    _STAGE_BUILDERS.append((option, dest, build, add_arguments))
+
+
+def _build_features(args, output_stem: str, make_sink: Callable[[str], Any]):
+    from .features import FeatureCsvSink, FeatureEngine
+    features = FeatureEngine(args.feature_window, args.feature_hop)
+    feature_sink = FeatureCsvSink(f"{output_stem}_features.csv", features.names)
+    features.outputs.append(feature_sink.write)
+    return [(features, ("特徴量", feature_sink))]
+
+
+def _build_fusion(args, output_stem: str, make_sink: Callable[[str], Any]):
+    from .features import FeatureCsvSink
+    from .fusion import FusionStage
+    fusion = FusionStage(args.fusion, args.fusion_gain)
+    fusion_sink = FeatureCsvSink(f"{output_stem}_orientation.csv", fusion.names)
+    fusion.outputs.append(fusion_sink.write)
+    return [(fusion, ("姿勢", fusion_sink))]
+
+
+def _build_resample(args, output_stem: str, make_sink: Callable[[str], Any]):
+    from .resample import Resampler
+    resampler = Resampler(args.resample)
+    resample_sink = make_sink(f"{output_stem}_resampled")
+    resampler.outputs.append(resample_sink.write)
+    return [(resampler, ("リサンプリング", resample_sink))]
+
+
+def _build_publishers(args, output_stem: str, make_sink: Callable[[str], Any]):
+    from .publisher import Publisher
+    publishers: List[Any] = []
+    try:
+        for endpoint in args.publish:
+            publisher = Publisher(endpoint, queue_size=args.publish_queue)
+            publisher.start()
+            print(f"✓ 配信を開始しました: {publisher.address}")
+            publishers.append(publisher)
+    except (ValueError, OSError) as e:
+        for publisher in publishers:
+            publisher.close()
+        raise RuntimeError(f"配信を開始できませんでした: {e}") from e
+    return [(publisher, None) for publisher in publishers]
+
+
+register_stage('--features', 'features', _build_features)
+register_stage('--fusion', 'fusion', _build_fusion)
+register_stage('--resample', 'resample', _build_resample)
+register_stage('--publish', 'publish', _build_publishers)
+
+
+def build_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sensor BLE - データ受信スクリプト")
+    parser.add_argument('--framing', choices=FRAMINGS, default='json',
+                        help="json: 1 Notification = 1 JSON (app) / m5: 分割送信の再構築 (app_for_m5) (既定: json)")
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"受信キューのサイズ (既定: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument('--backpressure', choices=BACKPRESSURE_POLICIES, default=DROP_OLDEST,
+                        help="受信キューが満杯のときの動作 (既定: drop-oldest)。--workers で block のときは、"
+                             f"1件あたり最大 {WORKER_BLOCK_TIMEOUT:g} 秒まで受信ループを止めて空きを待ち"
+                             "（その間は全デバイスの受信が止まる）、間に合わなければドロップとして数える")
+    parser.add_argument('--sink', choices=SINK_TYPES, default='csv',
+                        help="出力形式 csv / npy (列ごとの.npy) / parquet (既定: csv)")
+    parser.add_argument('--multi', action='store_true',
+                        help="見つかったすべてのデバイスに同時接続する")
+    parser.add_argument('--max-connections', type=int, default=DEFAULT_MAX_CONNECTIONS,
+                        help=f"--multi 時の最大同時接続数 (既定: {DEFAULT_MAX_CONNECTIONS})")
+    parser.add_argument('--workers', type=int, default=0, metavar='N',
+                        help="--multi 時に、デコードと保存を N 個のワーカープロセスで行う (既定: 0 = 使わない)")
+    parser.add_argument('--verbose', action='store_true',
+                        help="受信データを1件ずつ表示する（既定は一定間隔で更新するダッシュボード）")
+    parser.add_argument('--refresh-hz', type=float, default=DEFAULT_REFRESH_HZ,
+                        help=f"ダッシュボードの更新頻度 (既定: {DEFAULT_REFRESH_HZ:.0f} Hz)")
+    parser.add_argument('--features', action='store_true',
+                        help="加速度・ジャイロなどの特徴量を計算して *_features.csv に保存する (numpy が必要)")
+    parser.add_argument('--feature-window', type=int, default=256,
+                        help="特徴量のウィンドウのサンプル数 (既定: 256)")
+    parser.add_argument('--feature-hop', type=int, default=64,
+                        help="特徴量のウィンドウをずらすサンプル数 (既定: 64)")
+    parser.add_argument('--fusion', choices=('madgwick', 'mahony'),
+                        help="加速度・ジャイロ・磁気から姿勢を推定して *_orientation.csv に保存する (numpy が必要)")
+    parser.add_argument('--fusion-gain', type=float, default=None,
+                        help="姿勢推定のゲイン Madgwick の beta / Mahony の kp (既定: 0.1 / 1.0)")
+    parser.add_argument('--resample', type=float, metavar='HZ',
+                        help="一定間隔 HZ の行にそろえたデータを *_resampled に --sink の形式で保存する (numpy が必要)")
+    parser.add_argument('--reduce', nargs='?', const='default', metavar='SPEC',
+                        help="保存する値をセンサーごとに減らす (例: accelerometer=deadband:0.05,light=sdt:5。"
+                             "SPEC を省略すると既定の設定)")
+    parser.add_argument('--reduce-heartbeat', type=float, default=None, metavar='SEC',
+                        help="--reduce 時に、最後に保存してからこの秒数を超えたら必ず保存する (既定: 10)")
+    parser.add_argument('--publish', action='append', metavar='URL', default=[],
+                        help="受信データを配信する (tcp://127.0.0.1:8765, ws://..., udp://..., unix:///path、複数指定可)")
+    parser.add_argument('--publish-queue', type=int, default=DEFAULT_PUBLISH_QUEUE_SIZE,
+                        help=f"配信で購読者ごとに保持する最大行数 (既定: {DEFAULT_PUBLISH_QUEUE_SIZE})")
+    parser.add_argument('--metrics', action='store_true',
+                        help="段階ごとの処理時間と件数を計測する")
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help="計測値を http://127.0.0.1:PORT/metrics で公開する (--metrics を含む)")
+    parser.add_argument('--metrics-interval', type=float, default=DEFAULT_SUMMARY_INTERVAL,
+                        help=f"--verbose 時に計測値を表示する間隔 秒 (既定: {DEFAULT_SUMMARY_INTERVAL:.0f})")
+    parser.add_argument('--capture', action='store_true',
+                        help="受信したNotificationをそのまま .blecap ファイルに記録する")
+    parser.add_argument('--replay', metavar='PATH',
+                        help="BLEの代わりにNotification記録ファイルを再生する")
+    parser.add_argument('--replay-speed', type=float, default=1.0,
+                        help="再生速度の倍率。0 なら待たずに再生 (既定: 1.0)")
+    parser.add_argument('--synthetic-rate', type=float, metavar='HZ',
+                        help="BLEの代わりに合成データを指定レートで生成する")
+    parser.add_argument('--flush-rows', type=int, default=DEFAULT_FLUSH_ROWS,
+                        help=f"CSVをまとめて書き込む行数 (既定: {DEFAULT_FLUSH_ROWS})")
+    parser.add_argument('--flush-interval', type=float, default=DEFAULT_FLUSH_INTERVAL,
+                        help=f"CSVを書き込む最大間隔 秒 (既定: {DEFAULT_FLUSH_INTERVAL})")
+    parser.add_argument('--rotate-mb', type=float, default=None,
+                        help="指定サイズ (MB) ごとにCSVファイルを分割")
+    parser.add_argument('--rotate-hourly', action='store_true',
+                        help="1時間ごとにCSVファイルを分割")
+    parser.add_argument('--gzip', action='store_true',
+                        help="分割後に閉じたCSVファイルをgzip圧縮")
+    for _, _, _, add_arguments in _STAGE_BUILDERS:
+        if add_arguments is not None:
+            add_arguments(parser)
+    return parser
+
+
+def parse_args(argv: Optional[Sequence[str]] = None):
+    return build_parser().parse_args(argv)
+
+
+def make_backend(args):
+    """--replay / --synthetic-rate 指定時は実機の代わりに疑似デバイスを使う"""
+    if args.replay:
+        from .fake_ble import ReplayBackend
+        return ReplayBackend(args.replay, args.replay_speed)
+    if args.synthetic_rate:
+        from .fake_ble import FakeBackend
+        return FakeBackend(devices=args.max_connections if args.multi else 1,
+                           rate_hz=args.synthetic_rate, chunked=args.framing == 'm5')
+    return None
+
+
+async def main(argv: Optional[Sequence[str]] = None):
+    """コマンドラインと同じ引数で受信する（キャンセルされるか受信が終わるまで）"""
+    args = parse_args(argv)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    prefix = OUTPUT_PREFIXES[args.framing]
+    output_stem = f"{prefix}_{timestamp}"
+
+    sink_options = dict(
+        flush_interval=args.flush_interval,
+        flush_rows=args.flush_rows,
+        rotate_bytes=int(args.rotate_mb * 1024 * 1024) if args.rotate_mb else None,
+        rotate_hourly=args.rotate_hourly,
+        compress=args.gzip,
+    )
+
+    unsupported = unsupported_options(args.sink, **sink_options)
+    if unsupported:
+        print(f"✗ {' / '.join(unsupported)} は --sink csv のときだけ使用できます")
+        return
+
+    def make_sink(stem: str):
+        return create_sink(args.sink, stem, **sink_options)
+
+    # --reduce: 記録するシンクの前でデータを削減する（リサンプリングなどの出力には通さない）
+    reduce_options = None
+    if args.reduce:
+        from .reduction import DEFAULT_HEARTBEAT, Reducer, ReducingSink, parse_policy
+        heartbeat = args.reduce_heartbeat if args.reduce_heartbeat is not None else DEFAULT_HEARTBEAT
+        try:
+            if heartbeat <= 0:
+                raise ValueError("--reduce-heartbeat には正の値を指定してください")
+            reduce_options = dict(policy=parse_policy(args.reduce), heartbeat=heartbeat)
+            Reducer(**reduce_options)  # 受信を始める前に設定を確かめる
+        except ValueError as e:
+            print(f"✗ --reduce: {e}")
+            return
+
+    def make_record_sink(stem: str):
+        if reduce_options is None:
+            return make_sink(stem)
+        return ReducingSink(make_sink(stem), Reducer(**reduce_options))
+
+    # 受信したレコードから別の出力を作る処理（numpy などが必要なため、指定されたときだけ読み込む）
+    enabled = [(option, build) for option, dest, build, _ in _STAGE_BUILDERS if getattr(args, dest, None)]
+    if enabled and args.multi:
+        print(f"✗ {' / '.join(option for option, _ in enabled)} は --multi と同時には使用できません")
+        return
+    if args.workers:
+        if args.workers < 0:
+            print("✗ --workers には0以上を指定してください")
+            return
+        if not args.multi:
+            print("✗ --workers は --multi と一緒に指定してください")
+            return
+        if args.metrics or args.metrics_port is not None:
+            print("✗ --metrics は --workers と同時には使用できません")
+            return
+    # 1台用の出力（記録・受信データの記録・ステージ）。--multi ではデバイスごとに
+    # run_multi() の中で作るため、ここでは作らない
+    sink = None
+    session_log = None
+    capture = None
+    stages: List[Any] = []
+    stage_outputs: List[Tuple[str, Any]] = []
+    if not args.multi:
+        try:
+            for _, build in enabled:
+                for stage, output in build(args, output_stem, make_sink):
+                    stages.append(stage)
+                    if output is not None:
+                        stage_outputs.append(output)
+        except RuntimeError as e:
+            print(f"✗ {e}")
+            for stage in stages:
+                if hasattr(stage, 'close'):
+                    stage.close()
+            return
+        sink = make_record_sink(output_stem)
+        session_log = SessionLog(f"{output_stem}_session.jsonl")
+        if args.capture:
+            from .capture import CaptureWriter
+            capture = CaptureWriter(f"{output_stem}.blecap")
+    metrics = None
+    if args.metrics or args.metrics_port is not None:
+        from .metrics import Metrics
+        metrics = Metrics()
+
+    receiver = SensorDataReceiverBLE(
+        output_stem + SINK_EXTENSIONS[args.sink], args.queue_size, args.backpressure,
+        sink=sink,
+        session_log=session_log,
+        backend=make_backend(args),
+        capture=capture,
+        verbose=args.verbose,
+        refresh_hz=args.refresh_hz,
+        metrics=metrics,
+        metrics_port=args.metrics_port,
+        metrics_interval=args.metrics_interval,
+        stages=stages,
+        stage_outputs=stage_outputs,
+        framing=args.framing,
+    )
+    try:
+        if args.multi:
+            # 再接続のたびに別ファイルになるよう、接続時刻とアドレスをファイル名に含める
+            def device_stem(address: str) -> str:
+                return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{address_slug(address)}"
+
+            capture_factory = None
+            pool = None
+            if args.workers:
+                from .workers import WorkerPool
+                pool = WorkerPool(args.workers, device_stem, args.framing, args.sink, sink_options,
+                                  capture=args.capture, reduce_options=reduce_options,
+                                  queue_size=args.queue_size, backpressure=args.backpressure)
+            elif args.capture:
+                from .capture import CaptureWriter
+
+                def capture_factory(address: str):
+                    return CaptureWriter(f"{device_stem(address)}.blecap")
+
+            await receiver.run_multi(
+                lambda address: make_record_sink(device_stem(address)),
+                args.max_connections,
+                capture_factory=capture_factory,
+                pool=pool,
+            )
+        else:
+            await receiver.run()
+    except RuntimeError as e:
+        print(f"✗ {e}")
+        for stage in stages:
+            if hasattr(stage, 'close'):
+                stage.close()
+
+
+def cli(argv: Optional[Sequence[str]] = None):
+    """sensor-ble コマンドの入口"""
+    try:
+        asyncio.run(main(argv))
+    except KeyboardInterrupt:
+        print("\nプログラムを終了します")
+    except asyncio.CancelledError:
+        # main() は CancelledError を握りつぶさず、呼び出し元まで伝える
+        print("\nプログラムがキャンセルされました")
@@ -0,0 +1,629 @@
+"""
+受信データの削減（デッドバンド・間引き・スウィングドア圧縮）
+
+端末を置いたままの長時間の記録は、ほとんど同じ値の行が続きます。
+Reducer はデコードとシンクの間で、センサーのグループごとに次の方法で
+書き出す値を減らすストリーミング処理です（1件あたりの処理は O(1)）。
+
+    - raw:         すべて書く（指定しなかったグループ）
+    - deadband:T   直前に書いた値からいずれかのフィールドが T を超えて変わったときだけ書く
+                   （復元は直前の値の保持。誤差は T 以下）
+    - decimate:M   折り返し防止のローパスフィルタ（ハミング窓の sinc、4M+1 タップの
+                   線形位相 FIR）をかけて M 件に1件を書く（復元は線形補間）。
+                   フィルタは書く点でだけ計算するため、1件あたりの積和はフィールドごとに
+                   約4回です。書く点の時刻はフィルタの中心のサンプルの時刻なので遅れません。
+    - sdt:E        スウィングドア圧縮。最後に書いた点から、その後のすべての点を ±E 以内で
+                   通る直線が引ける間は書かず、引けなくなったら直前の点を書く（復元は線形補間）。
+                   書く点の値はその直線上に置く（元の値との差も E 以下）ため、復元した値と
+                   元の値の差は常に E 以下です。光・近接・GPS のようにゆっくり変わる
+                   センサー向けです。
+
+どの方法も、最後に書いてから heartbeat 秒（ペイロードの timestamp）を超えたら書きます
+（止まっている端末でも、記録が途切れたのと区別できるように）。書かないグループは
+空欄（CSV）/ NaN になり、どのグループも書かない行は出力しません。
+
+decimate と sdt は後ろのサンプルを見てから書くかを決めるため、決まるまで
+行を保留します（行の順序は変わりません）。保留は最大 max_delay 行で、
+それを超えると保留中の点を書いて先へ進みます。
+
+方法はグループごとに、しきい値はフィールドごとにも指定できます（'default' は DEFAULT_POLICY）:
+    accelerometer=deadband:0.05,gyroscope=decimate:4,gps=sdt:0.00001,gps.altitude=1
+    default,accelerometer=decimate:4
+
+使用方法（記録済みファイルの削減と、復元したときの誤差の確認。numpy が必要）:
+    python3 -m sensor_ble.reduction sensor_data_ble_*.csv [--policy SPEC] [--format csv|npy|parquet]
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+from collections import deque
+from operator import le, mul
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .schema import FIELD_NAMES, GROUP_BITS, SENSOR_SCHEMA, SensorSample, as_sample, sample_builder
+
+METHODS = ('raw', 'deadband', 'decimate', 'sdt')
+# しきい値の単位は SensorData.kt と同じ (m/s², rad/s, μT, lux, cm, 度, m, m/s)
+DEFAULT_POLICY = ('accelerometer=deadband:0.05,gyroscope=deadband:0.01,magnetometer=deadband:0.5,'
+                  'gravity=deadband:0.05,light=sdt:5,proximity=sdt:0.5,'
+                  'gps=sdt:0.00001,gps.altitude=1,gps.accuracy=1,gps.speed=0.2')
+DEFAULT_HEARTBEAT = 10.0  # 秒
+DEFAULT_MAX_DELAY = 1024  # 行
+
+_FIELDS = {key: tuple(field for field, _, _ in fields) for key, fields in SENSOR_SCHEMA}
+_COLUMNS = {key: tuple(column for _, column, _ in fields) for key, fields in SENSOR_SCHEMA}
+
+
+class GroupPolicy(NamedTuple):
+    """センサーのグループの削減方法"""
+    method: str
+    params: Tuple[float, ...]  # deadband / sdt: フィールドごとのしきい値、decimate: (M,)
+
+
+_RAW = GroupPolicy('raw', ())
+
+
+def _threshold(value: str, item: str) -> float:
+    try:
+        threshold = float(value)
+    except ValueError:
+        raise ValueError(f"'{item}' の値が数値ではありません") from None
+    if not threshold >= 0:
+        raise ValueError(f"'{item}' の値は0以上を指定してください")
+    return threshold
+
+
+def parse_policy(spec: str) -> Dict[str, GroupPolicy]:
+    """'accelerometer=deadband:0.05,gps.altitude=1' のような指定を読む
+
+    'default' は DEFAULT_POLICY に置き換え、同じグループは後の指定を使います
+    （'default,light=raw' は既定の設定から light だけを変える）。
+    """
+    items = [part.strip() for part in spec.split(',')]
+    items = [item for part in items for item in (DEFAULT_POLICY.split(',') if part == 'default' else [part])]
+    policy: Dict[str, GroupPolicy] = {}
+    overrides: Dict[str, List[Tuple[str, float, str]]] = {}
+    for item in filter(None, items):
+        name, sep, value = item.partition('=')
+        key, _, field = name.strip().partition('.')
+        if not sep:
+            raise ValueError(f"'{item}' はセンサー=方法 の形式で指定してください")
+        if key not in _FIELDS:
+            raise ValueError(f"未知のセンサーです: {key}")
+        if field:
+            if field not in _FIELDS[key]:
+                raise ValueError(f"{key} にフィールド {field} はありません")
+            overrides.setdefault(key, []).append((field, _threshold(value, item), item))
+            continue
+        method, _, param = value.strip().partition(':')
+        if method not in METHODS:
+            raise ValueError(f"未対応の方法です: {method} ({' / '.join(METHODS)})")
+        if method == 'raw':
+            params: Tuple[float, ...] = ()
+        elif method == 'decimate':
+            factor = _threshold(param, item)
+            if factor < 2 or factor != int(factor):
+                raise ValueError(f"'{item}' の間引きの倍率は2以上の整数を指定してください")
+            params = (int(factor),)
+        else:
+            params = (_threshold(param, item),) * len(_FIELDS[key])
+        policy[key] = GroupPolicy(method, params)
+        overrides.pop(key, None)
+    for key, fields in overrides.items():
+        group = policy.get(key)
+        if group is None or group.method not in ('deadband', 'sdt'):
+            raise ValueError(f"'{fields[0][2]}' は {key}=deadband または {key}=sdt と一緒に指定してください")
+        params = list(group.params)
+        for field, threshold, _ in fields:
+            params[_FIELDS[key].index(field)] = threshold
+        policy[key] = group._replace(params=tuple(params))
+    return policy
+
+
+class _Row:
+    """保留中の出力行"""
+
+    __slots__ = ('sample', 'keep', 'values', 'pending')
+
+    def __init__(self, sample: SensorSample):
+        self.sample = sample
+        self.keep = 0                                        # 書くグループの有無ビット
+        self.values: Optional[Dict[str, Tuple[float, ...]]] = None  # 元と違う値を書くグループ
+        self.pending = 0                                     # 書くかを決めていない方法の数
+
+    def write(self, key: str, values: Optional[Tuple[float, ...]] = None):
+        self.keep |= GROUP_BITS[key]
+        if values is not None:
+            if self.values is None:
+                self.values = {}
+            self.values[key] = values
+
+
+class _Method:
+    """1つのグループの削減方法（process() は受信順に呼ぶ）"""
+
+    bounded = False  # max_errors が実測値ではなく上限か
+
+    def __init__(self, key: str, name: str):
+        self.key = key
+        self.name = name
+        self.input_count = 0
+        self.output_count = 0
+        self.max_errors = [0.0] * len(_FIELDS[key])
+
+    def process(self, row: _Row, timestamp: float, values: Tuple[float, ...]):
+        self.input_count += 1
+        self.output_count += 1
+        row.write(self.key)
+
+    def release(self, row: _Row):
+        """row について保留中なら、いま決める"""
+
+    def finish(self):
+        """保留中の点をすべて決める"""
+
+
+class _Deadband(_Method):
+    def __init__(self, key: str, thresholds: Tuple[float, ...], heartbeat: float):
+        super().__init__(key, 'deadband')
+        self.thresholds = thresholds
+        self.heartbeat = heartbeat
+        self._last: Optional[Tuple[float, ...]] = None
+        self._last_time = 0.0
+
+    def process(self, row: _Row, timestamp: float, values: Tuple[float, ...]):
+        self.input_count += 1
+        last = self._last
+        if last is not None and timestamp - self._last_time <= self.heartbeat:
+            errors = [abs(value - previous) for value, previous in zip(values, last)]
+            # NaN になった・戻ったときは比較が偽になるので書く
+            if all(map(le, errors, self.thresholds)):
+                self.max_errors = list(map(max, self.max_errors, errors))
+                return
+        self._last = values
+        self._last_time = timestamp
+        self.output_count += 1
+        row.write(self.key)
+
+
+def lowpass_taps(length: int, cutoff: float) -> List[float]:
+    """ハミング窓の sinc による線形位相ローパス FIR の係数（cutoff はサンプリング周波数に対する比）"""
+    center = (length - 1) / 2
+    taps = []
+    for n in range(length):
+        x = n - center
+        sinc = 2 * cutoff if x == 0 else math.sin(2 * math.pi * cutoff * x) / (math.pi * x)
+        taps.append(sinc * (0.54 - 0.46 * math.cos(2 * math.pi * n / (length - 1))))
+    total = sum(taps)
+    return [tap / total for tap in taps]  # 直流の利得を1にする
+
+
+class _Decimator(_Method):
+    def __init__(self, key: str, factor: int):
+        super().__init__(key, f'decimate:{factor}')
+        self.factor = factor
+        self.delay = 2 * factor
+        length = 2 * self.delay + 1
+        # 新しいナイキスト周波数 (1 / 2M) より上を落とす
+        self.taps = lowpass_taps(length, 0.5 / factor)
+        self._values: Deque[Tuple[float, ...]] = deque(maxlen=length)
+        self._rows: Deque[Optional[_Row]] = deque(maxlen=length)
+        self._times: Deque[Optional[float]] = deque(maxlen=length)
+        self._count = 0    # 受け取ったサンプル数
+        self._decided = 0  # 書くかを決めたサンプル数
+        self._last_output: Optional[Tuple[int, float, Tuple[float, ...]]] = None  # (番号, 時刻, 値)
+
+    def process(self, row: _Row, timestamp: float, values: Tuple[float, ...]):
+        self.input_count += 1
+        if not self._values:
+            # 最初のサンプルの前は同じ値が続いていたものとしてフィルタをかける
+            for _ in range(self.delay):
+                self._push(None, None, values)
+        row.pending += 1
+        self._count += 1
+        self._push(row, timestamp, values)
+
+    def release(self, row: _Row):
+        if row in self._rows:
+            self.finish()
+
+    def finish(self):
+        if not self._values:
+            return
+        # 最後のサンプルの後も同じ値が続くものとして、残りのサンプルを決める
+        last = self._values[-1]
+        for _ in range(self.delay):
+            self._push(None, None, last)
+        self._values.clear()
+        self._rows.clear()
+        self._times.clear()
+        self._count = self._decided = 0
+        self._last_output = None
+
+    def _push(self, row: Optional[_Row], timestamp: Optional[float], values: Tuple[float, ...]):
+        self._values.append(values)
+        self._rows.append(row)
+        self._times.append(timestamp)
+        if len(self._values) == self._values.maxlen:
+            self._decide()
+
+    def _decide(self):
+        """フィルタの中心のサンプルを書くかを決める"""
+        delay = self.delay
+        row = self._rows[delay]
+        index = self._decided
+        self._decided += 1
+        # M 件に1件と、最後のサンプル（finish() の中でだけ中心に来る）を書く
+        if index % self.factor == 0 or index == self._count - 1:
+            taps = self.taps
+            output = tuple(sum(map(mul, taps, column)) for column in zip(*self._values))
+            timestamp = self._times[delay]
+            previous = self._last_output
+            if previous is not None:
+                # 前に書いた点からこの点までの元の値と、線形補間で復元した値の差
+                start_index, start, start_values = previous
+                span = timestamp - start
+                errors = self.max_errors
+                for position in range(delay - (index - start_index) + 1, delay + 1):
+                    fraction = (self._times[position] - start) / span if span else 1.0
+                    for i, value in enumerate(self._values[position]):
+                        error = abs(value - (start_values[i] + (output[i] - start_values[i]) * fraction))
+                        if error > errors[i]:
+                            errors[i] = error
+            self._last_output = (index, timestamp, output)
+            self.output_count += 1
+            row.write(self.key, output)
+        row.pending -= 1
+
+
+class _SwingingDoor(_Method):
+    bounded = True
+
+    def __init__(self, key: str, deviations: Tuple[float, ...], heartbeat: float):
+        super().__init__(key, 'sdt')
+        self.deviations = deviations
+        self.heartbeat = heartbeat
+        self.max_errors = list(deviations)
+        self._pivot: Optional[Tuple[float, Tuple[float, ...]]] = None  # 最後に書いた点
+        self._pivot_finite = False
+        self._low: List[float] = []   # フィールドごとの、すべての点を ±E で通る直線の傾きの範囲
+        self._high: List[float] = []
+        self._candidate: Optional[Tuple[_Row, float, Tuple[float, ...]]] = None
+
+    def process(self, row: _Row, timestamp: float, values: Tuple[float, ...]):
+        self.input_count += 1
+        pivot = self._pivot
+        if pivot is not None and (timestamp <= pivot[0] or not self._pivot_finite
+                                  or not all(map(math.isfinite, values))):
+            # 時刻が戻った・NaN や無限大を含むときは直線でつながない
+            self._archive()
+            pivot = None
+        if pivot is None:
+            self.output_count += 1
+            row.write(self.key)
+            self._start(timestamp, values)
+            return
+        bounds = self._narrow(timestamp, values)
+        if self._candidate is not None:
+            if bounds is None or timestamp - pivot[0] > self.heartbeat:
+                self._archive()
+                bounds = self._narrow(timestamp, values)
+            else:
+                self._candidate[0].pending -= 1  # 直前の点は書かない
+        self._low, self._high = bounds
+        row.pending += 1
+        self._candidate = (row, timestamp, values)
+
+    def release(self, row: _Row):
+        if self._candidate is not None and self._candidate[0] is row:
+            self._archive()
+
+    def finish(self):
+        self._archive()
+
+    def _start(self, timestamp: float, values: Tuple[float, ...]):
+        self._pivot = (timestamp, values)
+        self._pivot_finite = all(map(math.isfinite, values))
+        self._low = [-math.inf] * len(values)
+        self._high = [math.inf] * len(values)
+        self._candidate = None
+
+    def _narrow(self, timestamp: float, values: Tuple[float, ...]) -> Optional[Tuple[List[float], List[float]]]:
+        """点を加えたときの傾きの範囲（直線が引けなければ None）"""
+        start, start_values = self._pivot
+        span = timestamp - start
+        low = []
+        high = []
+        for value, origin, deviation, lower, upper in zip(values, start_values, self.deviations,
+                                                          self._low, self._high):
+            lower = max(lower, (value - origin - deviation) / span)
+            upper = min(upper, (value - origin + deviation) / span)
+            if lower > upper:
+                return None
+            low.append(lower)
+            high.append(upper)
+        return low, high
+
+    def _archive(self):
+        """保留中の点を、範囲内の直線上の値で書く"""
+        candidate = self._candidate
+        if candidate is None:
+            return
+        row, timestamp, values = candidate
+        start, start_values = self._pivot
+        span = timestamp - start
+        line = tuple(origin + min(max((value - origin) / span, lower), upper) * span
+                     for value, origin, lower, upper in zip(values, start_values, self._low, self._high))
+        self.output_count += 1
+        row.write(self.key, line)
+        row.pending -= 1
+        self._start(timestamp, line)
+
+
+def _make_method(key: str, policy: GroupPolicy, heartbeat: float) -> _Method:
+    if policy.method == 'deadband':
+        return _Deadband(key, policy.params, heartbeat)
+    if policy.method == 'decimate':
+        return _Decimator(key, int(policy.params[0]))
+    if policy.method == 'sdt':
+        return _SwingingDoor(key, policy.params, heartbeat)
+    return _Method(key, 'raw')
+
+
+def _ratio(before: int, after: int) -> str:
+    return f"{before / after:.1f} 倍" if after else "-"
+
+
+class Reducer:
+    """デコードしたレコードの値を減らすストリーミング処理
+
+    write() に受信順にレコードを渡すと、書く値が決まった行から順に
+    SensorSample で outputs の各関数に渡します。終了時に close() を呼ぶと
+    保留中の行を出力します。policy は parse_policy() の結果か指定の文字列です。
+    """
+
+    def __init__(self, policy: Any = DEFAULT_POLICY, heartbeat: float = DEFAULT_HEARTBEAT,
+                 max_delay: int = DEFAULT_MAX_DELAY,
+                 outputs: Iterable[Callable[[Any], None]] = ()):
+        if heartbeat <= 0 or max_delay < 1:
+            raise ValueError("heartbeat は正の値、max_delay は1以上を指定してください")
+        self.policy: Dict[str, GroupPolicy] = parse_policy(policy) if isinstance(policy, str) else dict(policy)
+        for key, group in self.policy.items():
+            # decimate:M はフィルタの中心まで 2M 行待つ
+            if group.method == 'decimate' and max_delay < 2 * group.params[0]:
+                raise ValueError(f"{key}=decimate:{group.params[0]} には max_delay {2 * group.params[0]} 以上が必要です")
+        self.heartbeat = heartbeat
+        self.max_delay = max_delay
+        self.outputs = list(outputs)
+        self._methods = [(key, GROUP_BITS[key], _make_method(key, self.policy.get(key, _RAW), heartbeat * 1000.0))
+                         for key, _ in SENSOR_SCHEMA]
+        self._rows: Deque[_Row] = deque()
+
+        # 統計
+        self.record_count = 0
+        self.row_count = 0
+
+    def write(self, data: Any):
+        """レコードを1件処理し、書く値が決まった行を出力する"""
+        sample = as_sample(data)
+        row = _Row(sample)
+        self._rows.append(row)
+        self.record_count += 1
+        timestamp = sample.timestamp
+        present = sample.present
+        for key, bit, method in self._methods:
+            if present & bit:
+                method.process(row, timestamp, sample.group(key))
+        self._emit_ready()
+
+    def close(self):
+        """保留中の点をすべて決めて出力する"""
+        for _, _, method in self._methods:
+            method.finish()
+        self._emit_ready()
+
+    def _emit_ready(self):
+        rows = self._rows
+        while rows:
+            row = rows[0]
+            if row.pending:
+                if len(rows) <= self.max_delay:
+                    return
+                for _, _, method in self._methods:
+                    method.release(row)
+            rows.popleft()
+            if row.keep:
+                self._emit(row)
+
+    def _emit(self, row: _Row):
+        sample = row.sample
+        keep = row.keep
+        if keep != sample.present or row.values is not None:
+            overrides = row.values or {}
+            values = [sample.timestamp]
+            for key, bit, _ in self._methods:
+                if keep & bit:
+                    values.extend(overrides.get(key) or sample.group(key))
+            output = sample_builder(keep)(values)
+            output.device = sample.device
+            sample = output
+        self.row_count += 1
+        for output_func in self.outputs:
+            output_func(sample)
+
+    def max_errors(self) -> Dict[str, float]:
+        """列ごとの最大誤差（sdt は上限。受け取ったグループのみ）"""
+        return {column: error
+                for key, _, method in self._methods if method.input_count
+                for column, error in zip(_COLUMNS[key], method.max_errors)}
+
+    def summary_lines(self) -> List[str]:
+        """行数・値の数の削減率と、グループごとの最大誤差"""
+        values_in = sum(method.input_count * len(_FIELDS[key]) for key, _, method in self._methods)
+        values_out = sum(method.output_count * len(_FIELDS[key]) for key, _, method in self._methods)
+        lines = [f"データ削減: {self.record_count:,} 行 → {self.row_count:,} 行 "
+                 f"({_ratio(self.record_count, self.row_count)}), "
+                 f"値 {values_in:,} → {values_out:,} ({_ratio(values_in, values_out)})"]
+        for key, _, method in self._methods:
+            if not method.input_count:
+                continue
+            errors = ', '.join(f"{field}={error:.3g}" for field, error in zip(_FIELDS[key], method.max_errors))
+            lines.append(f"  {key:<13} {method.name:<11} {method.input_count:>9,} → {method.output_count:<9,} "
+                         f"({_ratio(method.input_count, method.output_count)}) "
+                         f"最大誤差 {'≤ ' if method.bounded else ''}{errors}")
+        return lines
+
+
+class ReducingSink:
+    """sink の前で Reducer を通すシンク（sink と同じように使える）"""
+
+    def __init__(self, sink: Any, reducer: Reducer):
+        self.sink = sink
+        self.reducer = reducer
+        reducer.outputs.append(sink.write)
+
+    @property
+    def segments(self) -> List[str]:
+        return self.sink.segments
+
+    @property
+    def row_count(self) -> int:
+        return self.sink.row_count
+
+    def open(self):
+        self.sink.open()
+
+    def write(self, data: Any):
+        self.reducer.write(data)
+
+    def flush_if_due(self):
+        self.sink.flush_if_due()
+
+    def close(self):
+        """保留中の行を書いてからシンクを閉じる"""
+        self.reducer.close()
+        self.sink.close()
+
+    def summary(self) -> str:
+        return '\n'.join(self.reducer.summary_lines())
+
+
+# --- 記録済みファイルの削減と誤差の確認 (numpy が必要) ---
+
+def iter_samples(columns: Dict[str, Any]) -> Iterator[SensorSample]:
+    """列配列（sensor_ble.convert.load_columns の結果）の各行を SensorSample にする"""
+    import numpy as np
+
+    masks = np.zeros(len(columns['timestamp']), dtype=np.int64)
+    slices = []
+    start = 1
+    for key, _ in SENSOR_SCHEMA:
+        masks |= np.where(np.isnan(columns[_COLUMNS[key][0]]), 0, GROUP_BITS[key])
+        slices.append((GROUP_BITS[key], slice(start, start + len(_COLUMNS[key]))))
+        start += len(_COLUMNS[key])
+    table = np.column_stack([columns[name].astype(np.float64) for name in FIELD_NAMES]) if len(masks) else []
+    for timestamp, mask, row in zip(columns['timestamp'].tolist(), masks.tolist(), table):
+        values = [timestamp]
+        row = [0.0] + row.tolist()
+        for bit, columns_slice in slices:
+            if mask & bit:
+                values.extend(row[columns_slice])
+        yield sample_builder(mask)(values)
+
+
+def samples_to_columns(samples: Iterable[SensorSample]) -> Dict[str, Any]:
+    """SensorSample の列を列配列（無いグループは NaN）にする"""
+    import numpy as np
+
+    table = np.array([sample.row() for sample in samples], dtype=np.float64).reshape(-1, len(FIELD_NAMES) + 1)
+    columns = {'timestamp': table[:, 0].astype(np.int64)}
+    for i, name in enumerate(FIELD_NAMES):
+        columns[name] = table[:, i + 1]
+    return columns
+
+
+def reconstruction_errors(original: Dict[str, Any], reduced: Dict[str, Any],
+                          policy: Dict[str, GroupPolicy]) -> Dict[str, float]:
+    """削減した列配列から元の行の値を復元し、列ごとの最大誤差を返す
+
+    raw / deadband は直前に書いた値の保持、decimate / sdt は線形補間で復元します。
+    """
+    import numpy as np
+
+    times = original['timestamp'].astype(np.float64)
+    reduced_times = reduced['timestamp'].astype(np.float64)
+    errors: Dict[str, float] = {}
+    for key, _ in SENSOR_SCHEMA:
+        present = ~np.isnan(original[_COLUMNS[key][0]])
+        if not present.any():
+            continue
+        kept = ~np.isnan(reduced[_COLUMNS[key][0]])
+        kept_times = reduced_times[kept]
+        linear = policy.get(key, _RAW).method in ('decimate', 'sdt')
+        index = np.searchsorted(kept_times, times[present], side='right') - 1
+        for column in _COLUMNS[key]:
+            values = original[column][present].astype(np.float64)
+            kept_values = reduced[column][kept].astype(np.float64)
+            if not len(kept_values):
+                errors[column] = math.inf
+                continue
+            if linear:
+                restored = np.interp(times[present], kept_times, kept_values)
+            else:
+                restored = np.where(index >= 0, kept_values[np.maximum(index, 0)], np.nan)
+            difference = np.abs(values - restored)
+            errors[column] = float(np.nanmax(difference)) if not np.isnan(difference).all() else math.nan
+    return errors
+
+
+def main():
+    from .convert import load_columns
+    from .sinks import SINK_TYPES, create_sink
+
+    parser = argparse.ArgumentParser(description="記録済みデータの値を減らし、復元したときの誤差を表示する")
+    parser.add_argument('files', nargs='+', help="sensor_data_ble_*.csv または .npy ディレクトリ")
+    parser.add_argument('--policy', default='default',
+                        help="グループごとの方法 (例: accelerometer=deadband:0.05,light=sdt:5。既定: default)")
+    parser.add_argument('--heartbeat', type=float, default=DEFAULT_HEARTBEAT,
+                        help=f"最後に書いてからこの秒数を超えたら必ず書く (既定: {DEFAULT_HEARTBEAT:.0f})")
+    parser.add_argument('--format', choices=SINK_TYPES, default='csv', help="出力形式 (既定: csv)")
+    args = parser.parse_args()
+
+    try:
+        policy = parse_policy(args.policy)
+    except ValueError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+    for src in args.files:
+        start = time.perf_counter()
+        stem = os.path.splitext(src.rstrip(os.sep))[0] + '_reduced'
+        outputs: List[SensorSample] = []
+        try:
+            columns = load_columns(src)
+            sink = create_sink(args.format, stem)
+            reducer = Reducer(policy, args.heartbeat, outputs=[sink.write, outputs.append])
+            sink.open()
+            for sample in iter_samples(columns):
+                reducer.write(sample)
+            reducer.close()
+            sink.close()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"✗ 削減に失敗しました: {src}: {e}")
+            sys.exit(1)
+        elapsed = time.perf_counter() - start
+        print(f"✓ {src} -> {sink.segments[0]} ({sink.row_count} 行, {elapsed:.2f} s)")
+        if os.path.isfile(src) and os.path.isfile(sink.segments[0]):
+            before, after = os.path.getsize(src), os.path.getsize(sink.segments[0])
+            print(f"  ファイルサイズ: {before:,} → {after:,} バイト ({_ratio(before, after)})")
+        for line in reducer.summary_lines():
+            print(f"  {line}")
+        errors = reconstruction_errors(columns, samples_to_columns(outputs), policy)
+        print("  復元したときの最大誤差 (実測): " +
+              ', '.join(f"{name}={error:.3g}" for name, error in errors.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""
+一定間隔の時刻へのリサンプリング
+
+不規則な間隔で届き、センサーのグループ（gps / light / proximity など）が
+欠けることもあるレコードを、rate_hz の一定間隔の時刻（グリッド）の
+行にそろえます。グリッドは UNIX時刻の 1000 / rate_hz ミリ秒の倍数なので、
+別々に記録したファイルやデバイスの行も同じ時刻に並びます。
+
+    - 加速度・ジャイロ・磁気・重力: 前後の観測値から線形補間
+    - GPS・光・近接:               直前の観測値を保持 (sample-and-hold)
+
+前後の観測値の間隔が max_gap 秒を超える場合は補間せず直前の値を保持し、
+まだ一度も観測していないセンサーの値は欠損 (NaN / 空欄) のままにします。
+
+端末の timestamp が戻った（時計の修正など）ときは、それ以降の時刻を
+ずらして直前の正常な間隔で続いているものとして扱います（clock_jumps）。
+max_gap 秒を超えて進んだときは途切れとみなし、途切れた区間の行は
+作らずに次のレコードからグリッドを再開します（gaps）。
+
+Resampler は受信したレコードを1件ずつ処理し、補間に必要な後ろの
+観測値がそろったグリッドの行から順に outputs へ渡します。保持する
+行は最大でも max_gap 秒分です。resample_columns() は記録済みの列配列を
+NumPy の配列演算でまとめて処理し、Resampler と同じ結果を返します。
+
+使用方法（記録済みファイルから変換）:
+    python3 -m sensor_ble.resample sensor_data_ble_*.csv [--rate 50] [--format npy|parquet|csv]
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .columnar import COLUMNS
+from .convert import load_columns
+from .csv_sink import SENSOR_FIELDS
+from .schema import GROUP_BITS, as_sample, sample_builder
+from .sinks import SINK_TYPES, create_sink
+
+DEFAULT_RATE_HZ = 50.0
+DEFAULT_MAX_GAP = 0.5  # 秒
+
+# 線形補間するセンサー（それ以外は直前の値を保持）
+INTERPOLATED_SENSORS = ('accelerometer', 'gyroscope', 'magnetometer', 'gravity')
+
+# (JSONのキー, フィールド, 線形補間するか, 列の位置) の並び（列の順は COLUMNS[1:] と同じ）
+_GROUPS: List[Tuple[str, Tuple[str, ...], bool, slice]] = []
+_column = 0
+for _key, _fields in SENSOR_FIELDS:
+    _GROUPS.append((_key, _fields, _key in INTERPOLATED_SENSORS,
+                    slice(_column, _column + len(_fields))))
+    _column += len(_fields)
+_VALUE_COUNT = _column
+del _key, _fields, _column
+
+
+class Resampler:
+    """受信したレコードを一定間隔の行にそろえるストリーミング処理
+
+    IngestPipeline のシンクとして write() を登録し、グリッドの行を
+    SensorSample で outputs の各関数に渡します
+    （まだ観測していないセンサーのグループは含みません）。
+    終了時に close() を呼ぶと、保留中の行を直前の値で埋めて出力します。
+    """
+
+    def __init__(self, rate_hz: float = DEFAULT_RATE_HZ, max_gap: float = DEFAULT_MAX_GAP,
+                 outputs: Iterable[Callable[[Dict[str, Any]], None]] = ()):
+        if rate_hz <= 0 or max_gap <= 0:
+            raise ValueError("rate_hz と max_gap は正の値を指定してください")
+        self.rate_hz = rate_hz
+        self.period = 1000.0 / rate_hz
+        self.max_gap = max_gap * 1000.0
+        self.outputs = list(outputs)
+        self._interpolated = [i for i, group in enumerate(_GROUPS) if group[2]]
+        self._held = [i for i, group in enumerate(_GROUPS) if not group[2]]
+        # グループごとの直前の観測 (補正後の時刻, 値)
+        self._observed: List[Optional[Tuple[float, Tuple[float, ...]]]] = [None] * len(_GROUPS)
+        # 出力待ちの行 [グリッド時刻, 値のリスト] と、補間するグループごとの埋まった行数
+        self._pending: Deque[List[Any]] = deque()
+        self._filled = {i: 0 for i in self._interpolated}
+        self._next_index: Optional[int] = None
+        self._last_time: Optional[float] = None
+        self._offset = 0.0
+        self._interval = self.period
+
+        # 統計
+        self.record_count = 0
+        self.row_count = 0
+        self.clock_jumps = 0
+        self.gaps = 0
+
+    def write(self, data: Dict[str, Any]):
+        """レコードを1件処理し、そろった行を出力する"""
+        timestamp = data.get('timestamp')
+        if timestamp is None:
+            return
+        record = as_sample(data)
+        self.record_count += 1
+        now = timestamp + self._offset
+        last = self._last_time
+        if last is None:
+            self._next_index = math.ceil(now / self.period)
+        else:
+            step = now - last
+            if step < 0:
+                # 時計が戻った。直前の正常な間隔で続いているものとして扱う
+                self._offset += self._interval - step
+                now = last + self._interval
+                self.clock_jumps += 1
+            elif step > self.max_gap:
+                # 途切れた区間の行は作らない
+                self._fill_pending_with_last()
+                self._emit_ready()
+                self._next_index = math.ceil(now / self.period)
+                self.gaps += 1
+            elif step > 0:
+                self._interval = step
+        self._last_time = now
+
+        observed = self._observed
+        values: List[Optional[Tuple[float, ...]]] = []
+        for key, _, _, _ in _GROUPS:
+            sample = record.group(key)
+            if sample is not None and None in sample:
+                sample = None
+            values.append(sample)
+
+        # now までのグリッドの行を作り、保持するグループの値を入れる
+        period = self.period
+        index = self._next_index
+        while index * period <= now:
+            time_ms = index * period
+            row: List[Any] = [time_ms, [None] * _VALUE_COUNT]
+            for i in self._held:
+                sample = values[i] if time_ms == now and values[i] is not None else (
+                    observed[i][1] if observed[i] is not None else None)
+                if sample is not None:
+                    row[1][_GROUPS[i][3]] = sample
+            self._pending.append(row)
+            index += 1
+        self._next_index = index
+
+        for i in self._held:
+            if values[i] is not None:
+                observed[i] = (now, values[i])
+        for i in self._interpolated:
+            sample = values[i]
+            if sample is not None:
+                self._fill(i, now, sample)
+                observed[i] = (now, sample)
+            elif observed[i] is None or now - observed[i][0] > self.max_gap:
+                # 次の観測値を待っても補間しないので、直前の値で埋める
+                # （now ちょうどの行は、同じ timestamp の次のレコードで埋まることがある）
+                self._hold(i, before=now)
+        self._emit_ready()
+
+    def close(self):
+        """保留中の行を直前の値で埋めて出力する"""
+        self._fill_pending_with_last()
+        self._emit_ready()
+
+    def _fill(self, group: int, now: float, sample: Tuple[float, ...]):
+        """補間するグループの now までの保留中の行を、直前の観測値と sample から埋める"""
+        pending = self._pending
+        filled = self._filled[group]
+        observed = self._observed[group]
+        columns = _GROUPS[group][3]
+        while filled < len(pending):
+            time_ms, row = pending[filled]
+            if time_ms > now:
+                break
+            if time_ms == now:
+                row[columns] = sample
+            elif observed is None:
+                pass
+            elif now - observed[0] > self.max_gap:
+                row[columns] = observed[1]
+            else:
+                start, previous = observed
+                row[columns] = [v0 + (v1 - v0) * (time_ms - start) / (now - start)
+                                for v0, v1 in zip(previous, sample)]
+            filled += 1
+        self._filled[group] = filled
+
+    def _hold(self, group: int, before: Optional[float] = None):
+        """補間するグループの保留中の行（before より前）を直前の観測値で埋める"""
+        pending = self._pending
+        filled = self._filled[group]
+        observed = self._observed[group]
+        columns = _GROUPS[group][3]
+        while filled < len(pending):
+            time_ms, row = pending[filled]
+            if before is not None and time_ms >= before:
+                break
+            if observed is not None:
+                row[columns] = observed[1]
+            filled += 1
+        self._filled[group] = filled
+
+    def _fill_pending_with_last(self):
+        for i in self._interpolated:
+            self._hold(i)
+
+    def _emit_ready(self):
+        """すべてのグループが埋まった先頭の行から出力する"""
+        pending = self._pending
+        filled = self._filled
+        ready = min(filled.values())
+        if not ready:
+            return
+        for _ in range(ready):
+            time_ms, values = pending.popleft()
+            mask = 0
+            for key, _, _, columns in _GROUPS:
+                if values[columns.start] is not None:
+                    mask |= GROUP_BITS[key]
+            record = sample_builder(mask)(
+                (int(round(time_ms)),) + tuple(value for value in values if value is not None))
+            self.row_count += 1
+            for output in self.outputs:
+                output(record)
+        for i in filled:
+            filled[i] -= ready
+
+
+def _last_present(present: np.ndarray) -> np.ndarray:
+    """各位置以前で present が真の最後の位置（なければ -1）"""
+    index = np.where(present, np.arange(len(present)), -1)
+    np.maximum.accumulate(index, out=index)
+    return index
+
+
+def _next_present(present: np.ndarray) -> np.ndarray:
+    """各位置以降で present が真の最初の位置（なければ len(present)）"""
+    n = len(present)
+    index = np.where(present, np.arange(n), n)
+    return np.minimum.accumulate(index[::-1])[::-1]
+
+
+def resample_columns(columns: Dict[str, np.ndarray], rate_hz: float = DEFAULT_RATE_HZ,
+                     max_gap: float = DEFAULT_MAX_GAP) -> Dict[str, np.ndarray]:
+    """列配列（load_npy() や read_csv_chunks() の形式）を一定間隔の行にそろえる
+
+    戻り値は COLUMNS と同じ列名の配列（値はすべて float64、欠損は NaN）。
+    時計の補正・途切れの扱い・補間の規則は Resampler と同じです。
+    """
+    if rate_hz <= 0 or max_gap <= 0:
+        raise ValueError("rate_hz と max_gap は正の値を指定してください")
+    period = 1000.0 / rate_hz
+    gap = max_gap * 1000.0
+    raw = np.asarray(columns['timestamp'], dtype=np.float64)
+    n = len(raw)
+    names = [name for name, _ in COLUMNS[1:]]
+    if n == 0:
+        empty = {name: np.empty(0) for name in names}
+        empty['timestamp'] = np.empty(0, dtype=np.int64)
+        return empty
+
+    # 時計が戻った位置では、直前の正常な間隔だけ進んだものとしてずらす
+    step = np.diff(raw)
+    normal = np.where((step > 0) & (step <= gap), step, np.nan)
+    interval = np.concatenate([[period], normal])
+    index = np.where(np.isnan(interval), 0, np.arange(len(interval)))
+    np.maximum.accumulate(index, out=index)
+    interval = interval[index][:-1]
+    correction = np.where(step < 0, interval - step, 0.0)
+    times = raw + np.concatenate([[0.0], np.cumsum(correction)])
+
+    # 途切れで区切った区間ごとに、区間内のグリッドの時刻を並べる
+    breaks = np.flatnonzero(np.diff(times) > gap)
+    starts = times[np.concatenate([[0], breaks + 1])]
+    ends = times[np.concatenate([breaks, [n - 1]])]
+    first = np.ceil(starts / period)
+    last = np.floor(ends / period)
+    last = np.where((last + 1) * period <= ends, last + 1, last)
+    last = np.where(last * period > ends, last - 1, last)
+    counts = np.maximum(last - first + 1, 0).astype(np.int64)
+    total = int(counts.sum())
+    offsets = np.repeat(first - np.concatenate([[0], np.cumsum(counts)[:-1]]), counts)
+    grid = (offsets + np.arange(total)) * period
+
+    # 各グリッドの時刻に最初に届いたレコード（その時刻以降で最初）
+    record = np.searchsorted(times, grid, side='left')
+    exact = times[record] == grid
+    before = record - 1
+
+    out: Dict[str, np.ndarray] = {'timestamp': np.rint(grid).astype(np.int64)}
+    # 位置 -1 は「観測なし」を表し、末尾に置いた NaN を参照する
+    padded_times = np.append(times, np.nan)
+    for _, _, interpolated, group_columns in _GROUPS:
+        group_names = names[group_columns]
+        padded = []
+        for name in group_names:
+            column = np.empty(n + 1)
+            column[:n] = columns[name]
+            column[n] = np.nan
+            padded.append(column)
+        present = ~np.logical_or.reduce([np.isnan(column[:n]) for column in padded])
+        last_seen = np.append(_last_present(present), -1)
+        if not interpolated:
+            source = last_seen[np.where(exact, record, before)]
+            for name, column in zip(group_names, padded):
+                out[name] = column[source]
+            continue
+
+        # 値 = v0 + (v1 - v0) * num / den（Resampler と同じ順序で計算する）
+        previous = last_seen[before]
+        following = np.append(_next_present(present), -1)[record]
+        following[following == n] = -1
+        matched = padded_times[following] == grid
+        blend = ((previous >= 0) & (following >= 0) & ~matched &
+                 (padded_times[following] - padded_times[previous] <= gap))
+        source0 = np.where(matched, following, previous)
+        source1 = np.where(blend, following, source0)
+        num = np.where(blend, grid - padded_times[previous], 0.0)
+        den = np.where(blend, padded_times[following] - padded_times[previous], 1.0)
+        for name, column in zip(group_names, padded):
+            v0 = column[source0]
+            out[name] = v0 + (column[source1] - v0) * num / den
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="記録済みデータを一定間隔の行にそろえる")
+    parser.add_argument('files', nargs='+', help="sensor_data_ble_*.csv または .npy ディレクトリ")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE_HZ,
+                        help=f"出力する行の頻度 Hz (既定: {DEFAULT_RATE_HZ:.0f})")
+    parser.add_argument('--max-gap', type=float, default=DEFAULT_MAX_GAP,
+                        help=f"補間する観測値の最大間隔・途切れとみなす間隔 秒 (既定: {DEFAULT_MAX_GAP})")
+    parser.add_argument('--format', choices=SINK_TYPES, default='npy',
+                        help="出力形式 (既定: npy)")
+    args = parser.parse_args()
+
+    for src in args.files:
+        start = time.perf_counter()
+        stem = os.path.splitext(src.rstrip(os.sep))[0] + '_resampled'
+        try:
+            resampled = resample_columns(load_columns(src), args.rate, args.max_gap)
+            sink = create_sink(args.format, stem)
+            sink.open()
+            sink.write_columns(resampled)
+            sink.close()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"✗ リサンプリングに失敗しました: {src}: {e}")
+            sys.exit(1)
+        elapsed = time.perf_counter() - start
+        print(f"✓ {src} -> {sink.segments[0]} ({sink.row_count} 行, {elapsed:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+SensorData.kt のスキーマから組み立てる平坦なサンプル型とデコーダ
+
+json.loads の結果（入れ子の dict）をそのまま流すと、CSV・列指向・
+ダッシュボードなどの出力がそれぞれ7つのグループを data.get(...) で
+たどり直し、1サンプルごとに多くのオブジェクトを作ることになります。
+ここでは SensorData.kt と同じスキーマから、読み込み時に一度だけ
+次の処理の Python コードを生成します:
+    - SensorSample:     列ごとの値を __slots__ に持つ平坦なサンプル
+                        （present はセンサーの有無ビットマスク。binary_protocol と同じ並び）
+    - sample_from_dict: デコード済みの dict → SensorSample
+    - sample_builder:   値のタプル（バイナリフレームの unpack 結果）→ SensorSample
+    - SensorSample.to_json: 有無ビットマスクごとの書式で JSON に変換
+
+出力側は as_sample() でレコードを SensorSample にそろえ、属性・flat()・
+group() だけを使います。SensorSample は読み取り専用の Mapping としても
+振る舞うため（sample['accelerometer']['x'] など）、dict を前提にした
+処理もそのまま動きます（そのときだけグループの dict を作ります）。
+"""
+
+import json
+import math
+from collections.abc import Mapping
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+# SensorData.kt と同じ順に (JSONのキー, ((フィールド, 列名, Kotlinの型), ...)) を並べる
+SENSOR_SCHEMA = (
+    ('accelerometer', (('x', 'accel_x', 'Float'), ('y', 'accel_y', 'Float'), ('z', 'accel_z', 'Float'))),
+    ('gyroscope', (('x', 'gyro_x', 'Float'), ('y', 'gyro_y', 'Float'), ('z', 'gyro_z', 'Float'))),
+    ('light', (('lux', 'light_lux', 'Float'),)),
+    ('gps', (('latitude', 'gps_lat', 'Double'), ('longitude', 'gps_lon', 'Double'),
+             ('altitude', 'gps_alt', 'Double'), ('accuracy', 'gps_accuracy', 'Float'),
+             ('speed', 'gps_speed', 'Float'))),
+    ('magnetometer', (('x', 'magnet_x', 'Float'), ('y', 'magnet_y', 'Float'), ('z', 'magnet_z', 'Float'))),
+    ('proximity', (('distance', 'proximity_distance', 'Float'),)),
+    ('gravity', (('x', 'gravity_x', 'Float'), ('y', 'gravity_y', 'Float'), ('z', 'gravity_z', 'Float'))),
+)
+
+# センサーの値の列名（CSV の timestamp, datetime に続く列と同じ順）
+FIELD_NAMES = tuple(column for _, fields in SENSOR_SCHEMA for _, column, _ in fields)
+
+# JSONのキー → 有無ビット (bit0 = accelerometer ... bit6 = gravity)
+GROUP_BITS = {key: 1 << bit for bit, (key, _) in enumerate(SENSOR_SCHEMA)}
+ALL_GROUPS = (1 << len(SENSOR_SCHEMA)) - 1
+
+_flat = attrgetter(*FIELD_NAMES)
+_row = attrgetter('timestamp', *FIELD_NAMES)
+
+
+def _tuple_getter(columns: Tuple[str, ...]) -> Callable[[Any], Tuple[Any, ...]]:
+    """列の値を常にタプルで返す関数（attrgetter は1列だとタプルにならない）"""
+    if len(columns) > 1:
+        return attrgetter(*columns)
+    getter = attrgetter(columns[0])
+    return lambda sample: (getter(sample),)
+
+
+# JSONのキー → (有無ビット, フィールド名, 値をタプルで取り出す関数)
+_GROUPS: Dict[str, Tuple[int, Tuple[str, ...], Callable[[Any], Tuple[Any, ...]]]] = {
+    key: (GROUP_BITS[key], tuple(field for field, _, _ in fields),
+          _tuple_getter(tuple(column for _, column, _ in fields)))
+    for key, fields in SENSOR_SCHEMA
+}
+
+
+class SensorSample(Mapping):
+    """1サンプル分のセンサーデータ（列ごとの値を持つ平坦なレコード）
+
+    無いセンサーの列は NaN で、present のビットがセンサーの有無を表します。
+    device は複数デバイス受信時の送信元アドレス（なければ None）です。
+    """
+
+    __slots__ = ('timestamp', 'present', 'device') + FIELD_NAMES
+
+    def flat(self) -> Tuple[Any, ...]:
+        """センサーの値を FIELD_NAMES の順に並べたタプル"""
+        return _flat(self)
+
+    def row(self) -> Tuple[Any, ...]:
+        """timestamp とセンサーの値のタプル（列指向形式の1行）"""
+        return _row(self)
+
+    def group(self, key: str) -> Optional[Tuple[Any, ...]]:
+        """センサー key の値のタプル（なければ None）"""
+        bit, _, getter = _GROUPS[key]
+        return getter(self) if self.present & bit else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """デコード直後と同じ形の入れ子の dict"""
+        return {key: self[key] for key in self}
+
+    def to_json(self) -> str:
+        """空白なしのJSON（Android アプリと同じキーの並び）"""
+        template, getter = _json_layout(self.present)
+        text = template % getter(self)
+        if 'nan' in text or 'inf' in text:
+            # NaN / inf は json.dumps と同じ表記 (NaN / Infinity) にそろえる
+            return json.dumps(self.to_dict(), separators=(',', ':'))
+        if self.device is not None:
+            return text[:-1] + ',"device":' + json.dumps(self.device) + '}'
+        return text
+
+    # Mapping（dict と同じ読み取り方）
+    def __getitem__(self, key: str) -> Any:
+        if key == 'timestamp':
+            return self.timestamp
+        if key == 'device' and self.device is not None:
+            return self.device
+        entry = _GROUPS.get(key)
+        if entry is None or not self.present & entry[0]:
+            raise KeyError(key)
+        _, fields, getter = entry
+        return dict(zip(fields, getter(self)))
+
+    def __contains__(self, key: object) -> bool:
+        if key == 'timestamp':
+            return True
+        if key == 'device':
+            return self.device is not None
+        entry = _GROUPS.get(key)  # type: ignore[arg-type]
+        return entry is not None and bool(self.present & entry[0])
+
+    def __iter__(self) -> Iterator[str]:
+        yield 'timestamp'
+        for key, (bit, _, _) in _GROUPS.items():
+            if self.present & bit:
+                yield key
+        if self.device is not None:
+            yield 'device'
+
+    def __len__(self) -> int:
+        return 1 + bin(self.present).count('1') + (self.device is not None)
+
+    def __repr__(self) -> str:
+        groups = ', '.join(key for key, (bit, _, _) in _GROUPS.items() if self.present & bit)
+        device = f", device={self.device!r}" if self.device is not None else ""
+        return f"SensorSample(timestamp={self.timestamp!r}, [{groups}]{device})"
+
+
+_new_sample = object.__new__
+
+
+def _compile(name: str, lines) -> Callable:
+    """生成したコードから関数を作る"""
+    namespace = {'_new': _new_sample, '_cls': SensorSample, '_nan': math.nan}
+    exec('\n'.join(lines), namespace)
+    return namespace[name]
+
+
+def _compile_from_dict() -> Callable[[Dict[str, Any]], SensorSample]:
+    lines = [
+        'def sample_from_dict(data, _new=_new, _cls=_cls, _nan=_nan):',
+        '    sample = _new(_cls)',
+        "    sample.timestamp = data.get('timestamp', 0)",
+        "    sample.device = data.get('device')",
+        '    present = 0',
+    ]
+    for key, fields in SENSOR_SCHEMA:
+        lines += [
+            f'    group = data.get({key!r})',
+            '    if group:',
+            f'        present |= {GROUP_BITS[key]}',
+        ]
+        lines += [f'        sample.{column} = group.get({field!r}, _nan)' for field, column, _ in fields]
+        lines += [
+            '    else:',
+            '        ' + ' = '.join(f'sample.{column}' for _, column, _ in fields) + ' = _nan',
+        ]
+    lines += ['    sample.present = present', '    return sample']
+    return _compile('sample_from_dict', lines)
+
+
+sample_from_dict = _compile_from_dict()
+sample_from_dict.__doc__ = "デコード済みのセンサーデータ (dict) を SensorSample に変換"
+
+# 有無ビットマスクごとの生成済み関数（初回使用時に作成）
+_builders: Dict[Tuple[int, int], Callable[[Tuple[Any, ...]], SensorSample]] = {}
+_json_layouts: Dict[int, Tuple[str, Callable[[Any], Tuple[Any, ...]]]] = {}
+
+
+def sample_builder(mask: int, start: int = 0) -> Callable[[Tuple[Any, ...]], SensorSample]:
+    """値のタプルから SensorSample を作る関数
+
+    タプルは values[start] が timestamp で、続けて mask のビットが立っている
+    センサーの値が SENSOR_SCHEMA の順に並んでいるものとします
+    （binary_protocol のフレームを unpack した結果と同じ並び）。
+    """
+    builder = _builders.get((mask, start))
+    if builder is None:
+        lines = [
+            'def build(values, _new=_new, _cls=_cls, _nan=_nan):',
+            '    sample = _new(_cls)',
+            f'    sample.timestamp = values[{start}]',
+            f'    sample.present = {mask}',
+            '    sample.device = None',
+        ]
+        index = start + 1
+        missing = []
+        for key, fields in SENSOR_SCHEMA:
+            if mask & GROUP_BITS[key]:
+                for _, column, _ in fields:
+                    lines.append(f'    sample.{column} = values[{index}]')
+                    index += 1
+            else:
+                missing.extend(column for _, column, _ in fields)
+        if missing:
+            lines.append('    ' + ' = '.join(f'sample.{column}' for column in missing) + ' = _nan')
+        lines.append('    return sample')
+        builder = _builders[(mask, start)] = _compile('build', lines)
+    return builder
+
+
+def _json_layout(mask: int) -> Tuple[str, Callable[[Any], Tuple[Any, ...]]]:
+    """有無ビットマスクに対応する JSON の書式と値を取り出す関数"""
+    layout = _json_layouts.get(mask)
+    if layout is None:
+        parts = ['{"timestamp":%r']
+        columns = ['timestamp']
+        for key, fields in SENSOR_SCHEMA:
+            if mask & GROUP_BITS[key]:
+                parts.append(f',"{key}":{{' + ','.join(f'"{field}":%r' for field, _, _ in fields) + '}')
+                columns.extend(column for _, column, _ in fields)
+        parts.append('}')
+        layout = _json_layouts[mask] = (''.join(parts), attrgetter(*columns))
+    return layout
+
+
+def as_sample(record: Any) -> SensorSample:
+    """レコード（SensorSample または dict）を SensorSample にそろえる"""
+    if type(record) is SensorSample:
+        return record
+    return sample_from_dict(record)
@@ -0,0 +1,187 @@
+"""
+切断時の自動再接続
+
+ReconnectingSession は一度見つけたデバイスに接続し、切断されると
+指数バックオフで再接続を繰り返します。再接続ではスキャンを省略し、
+キャッシュしたデバイス（アドレス）へ直接接続します。連続して
+rescan_after 回失敗した場合だけ、改めてスキャンします。
+
+切断から再接続までの時間、再接続から最初のNotificationまでの時間、
+データが途切れていた区間（ギャップ）は SessionLog に記録されます。
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .ble import CHARACTERISTIC_UUID, SERVICE_UUID, BleakBackend
+
+DEFAULT_INITIAL_BACKOFF = 0.5  # 秒
+DEFAULT_MAX_BACKOFF = 30.0     # 秒
+DEFAULT_RESCAN_AFTER = 5       # 連続失敗回数
+
+
+class SessionLog:
+    """接続・切断・ギャップのイベントログ（path を指定すると JSON Lines で保存）"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._file = None
+        self.events: List[Dict[str, Any]] = []
+        self.gaps: List[Tuple[float, float]] = []       # (切断時刻, 最初のNotification時刻) monotonic
+        self.reconnect_latencies: List[float] = []      # 切断 → 接続完了
+        self.first_sample_latencies: List[float] = []   # 接続完了 → 最初のNotification
+
+    def open(self):
+        if self.path is not None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def record(self, event: str, **fields: Any):
+        entry = {'time': datetime.now().isoformat(timespec='milliseconds'), 'event': event}
+        entry.update(fields)
+        self.events.append(entry)
+        if self._file is not None:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._file.flush()
+
+    def summary(self) -> Dict[str, float]:
+        """切断回数・ギャップ合計・平均再接続時間などの集計"""
+        def mean(values: List[float]) -> float:
+            return sum(values) / len(values) if values else 0.0
+
+        return {
+            'disconnects': sum(1 for e in self.events if e['event'] == 'disconnected'),
+            'gap_total_s': sum(end - start for start, end in self.gaps),
+            'gap_max_s': max((end - start for start, end in self.gaps), default=0.0),
+            'reconnect_latency_mean_s': mean(self.reconnect_latencies),
+            'first_sample_latency_mean_s': mean(self.first_sample_latencies),
+        }
+
+
+class ReconnectingSession:
+    """切断されても再接続を続ける単一デバイスの接続ループ"""
+
+    def __init__(self, notification_handler: Callable[[Any, bytearray], None],
+                 on_reconnect: Optional[Callable[[], None]] = None,
+                 on_connect: Optional[Callable[[Any], None]] = None,
+                 session_log: Optional[SessionLog] = None,
+                 backend: Any = None,
+                 initial_backoff: float = DEFAULT_INITIAL_BACKOFF,
+                 max_backoff: float = DEFAULT_MAX_BACKOFF,
+                 rescan_after: int = DEFAULT_RESCAN_AFTER,
+                 scan_timeout: float = 10.0):
+        self.notification_handler = notification_handler
+        self.on_reconnect = on_reconnect
+        self.on_connect = on_connect
+        self.log = session_log or SessionLog()
+        self.backend = backend or BleakBackend()
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.rescan_after = rescan_after
+        self.scan_timeout = scan_timeout
+
+        self.device: Any = None
+        self.client: Any = None
+        self.connect_count = 0
+        self._connected_at: Optional[float] = None
+        self._disconnected_at: Optional[float] = None
+        self._awaiting_first_sample = False
+
+    async def find_device(self) -> Any:
+        """SERVICE_UUID をアドバタイズしているデバイスを探してキャッシュする"""
+        self.device = await self.backend.find_device(self.scan_timeout, SERVICE_UUID)
+        return self.device
+
+    async def run(self):
+        """接続・受信・再接続を繰り返す（キャンセルされるまで）"""
+        if self.device is None and await self.find_device() is None:
+            return
+        failures = 0
+        while True:
+            if failures and failures % self.rescan_after == 0:
+                print("再接続に繰り返し失敗したため、スキャンし直します...")
+                device = await self.backend.find_device(self.scan_timeout, SERVICE_UUID)
+                if device is not None:
+                    self.device = device
+            if await self._connect_once():
+                failures = 0
+            else:
+                failures += 1
+            if getattr(self.backend, 'exhausted', False):
+                # 記録ファイルの再生が終わった
+                return
+            delay = min(self.max_backoff, self.initial_backoff * (2 ** max(0, failures - 1)))
+            print(f"{delay:.1f} 秒後に再接続します...")
+            await asyncio.sleep(delay)
+
+    def _handle_notification(self, sender: Any, data: bytearray):
+        if self._awaiting_first_sample:
+            self._awaiting_first_sample = False
+            now = time.monotonic()
+            if self._connected_at is not None:
+                latency = now - self._connected_at
+                self.log.first_sample_latencies.append(latency)
+                self.log.record('first_sample', latency_s=round(latency, 4))
+            if self._disconnected_at is not None:
+                self.log.gaps.append((self._disconnected_at, now))
+                self.log.record('gap', duration_s=round(now - self._disconnected_at, 4))
+                self._disconnected_at = None
+        self.notification_handler(sender, data)
+
+    async def _connect_once(self) -> bool:
+        """1回接続して切断されるまで受信する。接続できたら True"""
+        loop = asyncio.get_running_loop()
+        disconnected = asyncio.Event()
+        address = self.device.address
+        self.client = client = self.backend.client(
+            self.device, disconnected_callback=lambda _: loop.call_soon_threadsafe(disconnected.set))
+        connected = False
+        cancelled = False
+        try:
+            await client.connect()
+            connected = True
+            self._connected_at = time.monotonic()
+            self.connect_count += 1
+            if self._disconnected_at is not None:
+                latency = self._connected_at - self._disconnected_at
+                self.log.reconnect_latencies.append(latency)
+                self.log.record('reconnected', address=address, latency_s=round(latency, 4))
+                print(f"✓ 再接続しました: {address} ({latency:.2f} 秒)")
+                if self.on_reconnect is not None:
+                    self.on_reconnect()
+            else:
+                self.log.record('connected', address=address)
+            if self.on_connect is not None:
+                self.on_connect(client)
+
+            self._awaiting_first_sample = True
+            await client.start_notify(CHARACTERISTIC_UUID, self._handle_notification)
+            await disconnected.wait()
+            print(f"✗ デバイスが切断されました: {address}")
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        except Exception as e:
+            print(f"✗ 接続エラー ({address}): {e}")
+            self.log.record('connect_failed', address=address, error=str(e))
+        finally:
+            if cancelled:
+                self.log.record('stopped', address=address)
+            elif connected:
+                if self._disconnected_at is None:
+                    self._disconnected_at = time.monotonic()
+                self.log.record('disconnected', address=address)
+            if client.is_connected:
+                try:
+                    await client.stop_notify(CHARACTERISTIC_UUID)
+                    await client.disconnect()
+                except Exception as e:
+                    print(f"✗ 切断中にエラーが発生しました: {e}")
+        return connected
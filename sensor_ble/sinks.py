@@ -0,0 +1,61 @@
+"""
+出力シンクの選択
+
+受信スクリプトの --sink オプションから出力形式を選びます。
+NumPy / pyarrow を使うシンクは選択されたときにだけ読み込むため、
+CSVだけを使う場合は追加の依存パッケージは不要です。
+
+どのシンクも open() / write(data) / flush_if_due() / close() と
+segments（出力ファイルのリスト）を持ちます。
+"""
+
+from typing import Any, List
+
+from .csv_sink import DEFAULT_FLUSH_INTERVAL, DEFAULT_FLUSH_ROWS, CsvSink
+
+SINK_TYPES = ('csv', 'npy', 'parquet')
+
+# 出力パスの拡張子（npy は列ごとの .npy を入れるディレクトリ）
+SINK_EXTENSIONS = {
+    'csv': '.csv',
+    'npy': '',
+    'parquet': '.parquet',
+}
+
+
+# CSVシンクだけが使うオプションと、指定されていないときの値
+CSV_ONLY_OPTIONS = {
+    'flush_rows': ('--flush-rows', DEFAULT_FLUSH_ROWS),
+    'rotate_bytes': ('--rotate-mb', None),
+    'rotate_hourly': ('--rotate-hourly', False),
+    'compress': ('--gzip', False),
+}
+
+
+def unsupported_options(kind: str, **csv_options: Any) -> List[str]:
+    """出力形式 kind では使われないオプション名のリスト"""
+    if kind == 'csv':
+        return []
+    return [option for name, (option, unset) in CSV_ONLY_OPTIONS.items()
+            if csv_options.get(name, unset) != unset]
+
+
+def create_sink(kind: str, stem: str,
+                flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                **csv_options: Any):
+    """出力形式 kind のシンクを作成する（stem は拡張子を除いたパス）
+
+    csv_options（flush_rows, rotate_bytes など）はCSVシンクにだけ渡し、
+    列指向シンクでは無視します（コマンドラインでは unsupported_options() で
+    指定を確かめて拒否します）。
+    """
+    if kind not in SINK_TYPES:
+        raise ValueError(f"未対応の出力形式です: {kind}")
+    path = stem + SINK_EXTENSIONS[kind]
+    if kind == 'csv':
+        return CsvSink(path, flush_interval=flush_interval, **csv_options)
+
+    from . import columnar
+    if kind == 'npy':
+        return columnar.NpySink(path, flush_interval=flush_interval)
+    return columnar.ParquetSink(path, flush_interval=flush_interval)
@@ -0,0 +1,229 @@
+"""
+複数デバイスの同時受信
+
+MultiDeviceSupervisor は定期的にスキャンし、SERVICE_UUID を
+アドバタイズしているデバイスに最大 max_connections 台まで同時に接続します。
+デバイスごとにデコーダ（分割データの再構築状態）・パイプライン・
+出力シンクを独立に持ち、各レコードには 'device' キーでデバイスの
+アドレスを付与します。切断されたデバイスは次のスキャンで再接続されます。
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, List, Optional
+
+from .ble import CHARACTERISTIC_UUID, SERVICE_UUID, BleakBackend
+from .pipeline import DEFAULT_QUEUE_SIZE, DROP_OLDEST, IngestPipeline, RawNotification
+
+DEFAULT_MAX_CONNECTIONS = 4
+DEFAULT_SCAN_INTERVAL = 5.0  # 秒
+DEFAULT_SCAN_TIMEOUT = 5.0   # 秒
+
+
+def address_slug(address: str) -> str:
+    """ファイル名に使えるようにアドレスを変換 (AA:BB:... -> AABB...)"""
+    return ''.join(c for c in address if c.isalnum())
+
+
+class DeviceSession:
+    """1台分の受信状態（デコーダ・パイプライン・シンク）"""
+
+    def __init__(self, device: Any, decoder: Callable[[RawNotification], List[Dict[str, Any]]],
+                 sink: Any, display: Optional[Callable[[Dict[str, Any]], None]],
+                 queue_size: int, backpressure: str, capture: Optional[Any] = None,
+                 metrics: Optional[Any] = None):
+        self.device = device
+        self.address = device.address
+        self.decoder = decoder
+        self.sink = sink
+        self.capture = capture
+        self.record_count = 0
+        if metrics is not None and hasattr(decoder, 'metrics'):
+            decoder.metrics = metrics
+        self.pipeline = IngestPipeline(
+            self._decode,
+            sinks=[self._save],
+            displays=[display] if display else [],
+            queue_size=queue_size,
+            policy=backpressure,
+            capture=capture,
+            metrics=metrics,
+        )
+
+    def _decode(self, raw: RawNotification) -> List[Dict[str, Any]]:
+        records = self.decoder(raw)
+        for record in records:
+            if isinstance(record, dict):
+                record['device'] = self.address
+            else:
+                record.device = self.address
+        return records
+
+    def _save(self, data: Dict[str, Any]):
+        self.sink.write(data)
+        self.record_count += 1
+
+    def notification_handler(self, sender: Any, data: bytearray):
+        """Notification受信時のコールバック（キューに積むだけ）"""
+        self.pipeline.submit(data)
+
+    def start(self):
+        self.sink.open()
+        if self.capture is not None:
+            self.capture.open()
+        self.pipeline.start()
+
+    def flush_if_due(self):
+        self.sink.flush_if_due()
+        if self.capture is not None:
+            self.capture.flush_if_due()
+
+    def close(self):
+        """パイプラインを停止し、残りを書き出してシンクを閉じる（ブロッキング）"""
+        self.pipeline.stop()
+        self.sink.close()
+        if self.capture is not None:
+            self.capture.close()
+
+    def stats(self) -> Dict[str, int]:
+        return self.pipeline.stats()
+
+    @property
+    def segments(self) -> List[str]:
+        return self.sink.segments
+
+    @property
+    def capture_path(self) -> Optional[str]:
+        return self.capture.path if self.capture is not None else None
+
+    @property
+    def summary(self) -> Optional[str]:
+        """シンクの統計（--reduce のデータ削減など。なければ None）"""
+        return self.sink.summary() if hasattr(self.sink, 'summary') else None
+
+
+class MultiDeviceSupervisor:
+    """複数デバイスへ同時に接続して受信するスーパーバイザ
+
+    decoder_factory はデバイスごとに新しいデコーダを返す関数、
+    sink_factory はアドレスを受け取ってそのデバイス用のシンクを返す関数です。
+    capture_factory を指定すると、デバイスごとに受信Notificationも記録します。
+    metrics を指定すると、全デバイスの処理時間を1つの Metrics にまとめて記録します。
+    session_factory を指定すると、DeviceSession の代わりにその戻り値
+    （DeviceSession と同じメソッドを持つオブジェクト。sensor_ble.workers の
+    ForwardingSession など）で各デバイスを受信します。
+    """
+
+    def __init__(self, decoder_factory: Callable[[], Callable[[RawNotification], List[Dict[str, Any]]]],
+                 sink_factory: Callable[[str], Any],
+                 display: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 scan_interval: float = DEFAULT_SCAN_INTERVAL,
+                 scan_timeout: float = DEFAULT_SCAN_TIMEOUT,
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 backpressure: str = DROP_OLDEST,
+                 backend: Any = None,
+                 capture_factory: Optional[Callable[[str], Any]] = None,
+                 metrics: Optional[Any] = None,
+                 session_factory: Optional[Callable[[Any], Any]] = None):
+        self.decoder_factory = decoder_factory
+        self.sink_factory = sink_factory
+        self.capture_factory = capture_factory
+        self.metrics = metrics
+        self.session_factory = session_factory
+        self.display = display
+        self.max_connections = max_connections
+        self.scan_interval = scan_interval
+        self.scan_timeout = scan_timeout
+        self.queue_size = queue_size
+        self.backpressure = backpressure
+        self.backend = backend or BleakBackend()
+        self.sessions: Dict[str, DeviceSession] = {}
+        self.finished_sessions: List[DeviceSession] = []
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def run(self, duration: Optional[float] = None):
+        """スキャンと接続を繰り返す（duration 秒経過するかキャンセルされるまで）"""
+        loop = asyncio.get_running_loop()
+        deadline = None if duration is None else loop.time() + duration
+        try:
+            while deadline is None or loop.time() < deadline:
+                if len(self._tasks) < self.max_connections:
+                    await self._scan_and_connect()
+                wait = self.scan_interval
+                if deadline is not None:
+                    wait = max(0.0, min(wait, deadline - loop.time()))
+                await asyncio.sleep(wait)
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        """すべての接続を切断し、各デバイスの出力を閉じる"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        """デバイスごとの保存件数（接続中・切断済みの両方）"""
+        counts: Dict[str, int] = {}
+        for session in self.finished_sessions + list(self.sessions.values()):
+            counts[session.address] = counts.get(session.address, 0) + session.record_count
+        return counts
+
+    async def _scan_and_connect(self):
+        try:
+            devices = await self.backend.discover(self.scan_timeout, SERVICE_UUID)
+        except Exception as e:
+            print(f"✗ スキャン中にエラーが発生しました: {e}")
+            return
+        for device in devices:
+            if len(self._tasks) >= self.max_connections:
+                break
+            if device.address in self._tasks:
+                continue
+            self._tasks[device.address] = asyncio.ensure_future(self._run_session(device))
+
+    def _create_session(self, device: Any) -> Any:
+        if self.session_factory is not None:
+            return self.session_factory(device)
+        capture = self.capture_factory(device.address) if self.capture_factory else None
+        return DeviceSession(device, self.decoder_factory(), self.sink_factory(device.address),
+                             self.display, self.queue_size, self.backpressure, capture,
+                             self.metrics)
+
+    async def _run_session(self, device: Any):
+        loop = asyncio.get_running_loop()
+        disconnected = asyncio.Event()
+        session = self._create_session(device)
+        client = self.backend.client(
+            device, disconnected_callback=lambda _: loop.call_soon_threadsafe(disconnected.set))
+        started = False
+        try:
+            await client.connect()
+            print(f"✓ デバイスに接続しました: {getattr(device, 'name', None)} ({device.address})")
+            # 接続できなかったときに空の出力ファイルが残らないよう、接続してから開く
+            started = True
+            session.start()
+            self.sessions[device.address] = session
+            await client.start_notify(CHARACTERISTIC_UUID, session.notification_handler)
+            await disconnected.wait()
+            print(f"✗ デバイスが切断されました: {device.address}")
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"✗ {device.address} でエラーが発生しました: {e}")
+        finally:
+            if client.is_connected:
+                try:
+                    await client.stop_notify(CHARACTERISTIC_UUID)
+                    await client.disconnect()
+                except Exception as e:
+                    print(f"✗ 切断中にエラーが発生しました: {e}")
+            if started:
+                # パイプラインの停止はスレッドの join（ワーカー使用時は出力の終了待ち）を
+                # 伴うため、イベントループを止めない
+                await loop.run_in_executor(None, session.close)
+                self.sessions.pop(device.address, None)
+                self.finished_sessions.append(session)
+            self._tasks.pop(device.address, None)
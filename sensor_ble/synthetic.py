@@ -0,0 +1,49 @@
+"""
+合成センサーデータ
+
+実機なしで受信処理を動かすための、Androidアプリと同じ形式の
+センサーデータを生成します。
+"""
+
+import json
+import math
+import random
+from typing import Any, Dict, List
+
+# app_for_m5 の送信側と同じ分割サイズ
+M5_CHUNK_SIZE = 244
+
+
+def make_sample(index: int, rng: random.Random, rate_hz: float = 50.0,
+                start_ms: int = 1678886400000) -> Dict[str, Any]:
+    """index 番目の合成サンプル（GPSは1秒に1回だけ含める）
+
+    キーの並びは Gson が SensorData.kt を変換したときと同じです。
+    """
+    t = index / rate_hz
+    data: Dict[str, Any] = {
+        'timestamp': start_ms + int(t * 1000),
+        'accelerometer': {'x': math.sin(t) + rng.gauss(0, 0.05),
+                          'y': math.cos(t) + rng.gauss(0, 0.05),
+                          'z': 9.8 + rng.gauss(0, 0.05)},
+        'gyroscope': {'x': rng.gauss(0, 0.01), 'y': rng.gauss(0, 0.01), 'z': 0.1 * math.cos(t)},
+        'light': {'lux': 150.0 + rng.uniform(-1, 1)},
+    }
+    if index % max(1, int(rate_hz)) == 0:
+        data['gps'] = {'latitude': 35.6895, 'longitude': 139.6917, 'altitude': 50.0,
+                       'accuracy': 10.0, 'speed': 0.5}
+    data['magnetometer'] = {'x': 12.34 + rng.gauss(0, 0.2), 'y': -23.45 + rng.gauss(0, 0.2),
+                            'z': 45.67 + rng.gauss(0, 0.2)}
+    data['proximity'] = {'distance': 5.0}
+    data['gravity'] = {'x': 0.12, 'y': 0.34, 'z': 9.78}
+    return data
+
+
+def encode_json(data: Dict[str, Any]) -> bytes:
+    """Androidアプリ (Gson) と同様に空白なしのJSONへ変換"""
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def split_chunks(payload: bytes, chunk_size: int = M5_CHUNK_SIZE) -> List[bytes]:
+    """app_for_m5 と同じく chunk_size バイトごとに分割"""
+    return [payload[i:i + chunk_size] for i in range(0, len(payload), chunk_size)]
@@ -0,0 +1,486 @@
+"""
+複数プロセスでの受信処理（--multi --workers N）
+
+多数のデバイスを高いレートで受信すると、1つのプロセスで全デバイスの
+再構築・デコード・保存を行うため GIL がボトルネックになります。
+--workers を指定すると、BLE の受信を行うプロセス（イベントループ）は
+Notificationのバイト列を共有メモリのリングバッファに書くだけにし、
+デコードと保存はワーカープロセスで行います。
+
+    BLE I/O プロセス                                  ワーカープロセス (N個)
+    notification ──> [SharedRing (共有メモリ)] ──> decode ──> sink / capture
+                      ワーカーごとに1つ
+
+- デバイスは最初に接続したときにワーカーへ割り当て、再接続しても同じ
+  ワーカーで処理します。1つのワーカーは自分のリングバッファを受信順に
+  処理するため、デバイスごとの出力は受信順のまま保たれます。
+- 接続・切断・終了の通知も同じリングバッファで送るため、
+  データとの順序が崩れません。
+- リングバッファは固定長スロットと2つのセマフォ（空き・使用中）による
+  単一プロデューサ・単一コンシューマのキューです。読み書きの位置は
+  各プロセスが自分で持ち、共有メモリにはスロットの中身だけを置きます。
+  満杯のときは背圧ポリシーが block なら最大 BLOCK_TIMEOUT 秒まで空きを待ち、
+  それ以外（drop-oldest / drop-newest）は待たずに、書こうとしたNotificationを
+  捨てて数えます（書き込み済みのスロットはワーカーが読むため、古い方は
+  捨てられません）。待つのはイベントループの中なので、block でも無制限には
+  待たず、担当のワーカーが終了していればそれ以降は待たずに捨てます。
+- Ctrl+C の SIGINT はワーカーでは無視します。I/O プロセスが
+  KeyboardInterrupt で受信を止めると、切断・終了の通知を受け取った
+  ワーカーが残りを処理して出力を閉じてから終了します（I/O プロセスが
+  先に異常終了した場合も、それを検出して出力を閉じます）。
+"""
+
+import json
+import multiprocessing
+import os
+import signal
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .pipeline import BLOCK, DEFAULT_QUEUE_SIZE, DROP_OLDEST, RawNotification
+from .pipeline import WORKER_BLOCK_TIMEOUT as BLOCK_TIMEOUT
+
+# スロットの先頭: (種類, デバイス番号, 長さ, 受信時刻 time.monotonic())
+SLOT_HEADER = struct.Struct('<BHHd')
+MAX_NOTIFICATION_SIZE = 512  # BLE の属性値の最大長
+DEFAULT_SLOT_SIZE = 528      # SLOT_HEADER + MAX_NOTIFICATION_SIZE を切り上げ
+
+# スロットの種類
+DATA = 0
+OPEN = 1    # 中身は {"address": ..., "stem": ...} の JSON
+CLOSE = 2
+STOP = 3
+
+# ワーカーを起動する方法（fork はイベントループやスレッドを持つプロセスでは安全でない）
+DEFAULT_START_METHOD = 'spawn'
+REPORT_INTERVAL = 0.5    # 秒。ワーカーが件数を報告し、出力のフラッシュを確認する間隔
+CONTROL_TIMEOUT = 5.0    # 秒。接続・切断の通知をリングバッファに書くまで待つ最大時間
+CLOSE_TIMEOUT = 30.0     # 秒。切断したデバイスの出力が閉じられるまで待つ最大時間
+
+
+class SharedRing:
+    """共有メモリ上の固定長スロットのリングバッファ（1対1）
+
+    put() は I/O プロセス（複数スレッドから呼んでよい）、get() は
+    ワーカープロセスの1スレッドから呼びます。ワーカーへは Process の
+    引数として渡し、ワーカー側で attach() してから使います。
+    """
+
+    def __init__(self, slots: int = DEFAULT_QUEUE_SIZE, slot_size: int = DEFAULT_SLOT_SIZE,
+                 context: Any = None):
+        if slots <= 0:
+            raise ValueError("スロット数は1以上を指定してください")
+        if slot_size <= SLOT_HEADER.size:
+            raise ValueError(f"スロットサイズは {SLOT_HEADER.size} バイトより大きくしてください")
+        context = context or multiprocessing.get_context(DEFAULT_START_METHOD)
+        self.slots = slots
+        self.slot_size = slot_size
+        self.max_payload = slot_size - SLOT_HEADER.size
+        self._shm: Optional[shared_memory.SharedMemory] = shared_memory.SharedMemory(
+            create=True, size=slots * slot_size)
+        self.name = self._shm.name
+        self._buffer = self._shm.buf
+        self._owner = True
+        self._free = context.Semaphore(slots)
+        self._filled = context.Semaphore(0)
+        self._lock = threading.Lock()
+        self._position = 0  # このプロセスで次に書く（読む）スロット
+
+        # 統計（I/O プロセス側）
+        self.put_count = 0
+        self.dropped_count = 0
+
+    def __getstate__(self):
+        return {'name': self.name, 'slots': self.slots, 'slot_size': self.slot_size,
+                'free': self._free, 'filled': self._filled}
+
+    def __setstate__(self, state):
+        self.name = state['name']
+        self.slots = state['slots']
+        self.slot_size = state['slot_size']
+        self.max_payload = self.slot_size - SLOT_HEADER.size
+        self._free = state['free']
+        self._filled = state['filled']
+        self._shm = None
+        self._buffer = None
+        self._owner = False
+        self._lock = threading.Lock()
+        self._position = 0
+        self.put_count = 0
+        self.dropped_count = 0
+
+    def attach(self):
+        """ワーカープロセス側で共有メモリを開く"""
+        if self._shm is None:
+            # resource_tracker は I/O プロセスと共有のため、削除は作成した側だけが行う
+            self._shm = shared_memory.SharedMemory(name=self.name)
+            self._buffer = self._shm.buf
+
+    def put(self, kind: int, device: int, data: bytes, received_at: float,
+            timeout: Optional[float] = 0.0) -> bool:
+        """スロットに1件書く。timeout 秒待っても空きがなければ捨てて False
+
+        timeout=0 なら待たず、None なら空くまで待ちます。
+        """
+        if len(data) > self.max_payload:
+            self.dropped_count += 1
+            return False
+        if timeout == 0.0:
+            acquired = self._free.acquire(False)
+        else:
+            acquired = self._free.acquire(True, timeout)
+        if not acquired:
+            self.dropped_count += 1
+            return False
+        # 位置の確保・書き込み・使用中の通知は書き込み順と読み出し順が一致するよう一度に行う
+        with self._lock:
+            offset = self._position * self.slot_size
+            SLOT_HEADER.pack_into(self._buffer, offset, kind, device, len(data), received_at)
+            start = offset + SLOT_HEADER.size
+            self._buffer[start:start + len(data)] = data
+            self._position = (self._position + 1) % self.slots
+            self.put_count += 1
+            self._filled.release()
+        return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Tuple[int, int, bytes, float]]:
+        """1件取り出す（timeout 秒以内になければ None）: (種類, デバイス番号, 中身, 受信時刻)"""
+        if not self._filled.acquire(True, timeout):
+            return None
+        offset = self._position * self.slot_size
+        kind, device, length, received_at = SLOT_HEADER.unpack_from(self._buffer, offset)
+        start = offset + SLOT_HEADER.size
+        data = bytes(self._buffer[start:start + length])
+        self._position = (self._position + 1) % self.slots
+        self._free.release()
+        return kind, device, data, received_at
+
+    def close(self):
+        """共有メモリを閉じる（作成したプロセスでは削除も行う）"""
+        if self._shm is None:
+            return
+        self._buffer = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
+
+
+# --- ワーカープロセス ---
+
+class _WorkerDevice:
+    """ワーカー内の1台分の状態（デコーダ・シンク・記録ファイル）"""
+
+    def __init__(self, address: str, stem: str, config: Dict[str, Any]):
+        from .receiver import make_decoder
+        from .sinks import create_sink
+
+        self.address = address
+        self.decoder = make_decoder(config['framing'])
+        self.sink = create_sink(config['sink'], stem, **config['sink_options'])
+        if config['reduce_options'] is not None:
+            from .reduction import Reducer, ReducingSink
+            self.sink = ReducingSink(self.sink, Reducer(**config['reduce_options']))
+        self.capture = None
+        if config['capture']:
+            from .capture import CaptureWriter
+            self.capture = CaptureWriter(f"{stem}.blecap")
+        self.record_count = 0
+        self.error_count = 0
+
+    def open(self):
+        self.sink.open()
+        if self.capture is not None:
+            self.capture.open()
+
+    def process(self, raw: RawNotification):
+        if self.capture is not None:
+            self.capture.write(raw.received_at, raw.data)
+        try:
+            for record in self.decoder(raw):
+                record.device = self.address
+                self.sink.write(record)
+                self.record_count += 1
+        except Exception:
+            self.error_count += 1
+
+    def flush_if_due(self):
+        self.sink.flush_if_due()
+        if self.capture is not None:
+            self.capture.flush_if_due()
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            'records': self.record_count,
+            'parse_errors': getattr(self.decoder, 'error_count', 0),
+            'decode_errors': self.error_count,
+        }
+
+    def close(self) -> Dict[str, Any]:
+        """残りを書き出して閉じ、最終的な件数と出力ファイルを返す"""
+        info: Dict[str, Any] = self.counts()
+        try:
+            self.sink.close()
+            if self.capture is not None:
+                self.capture.close()
+        except Exception as e:
+            info['error'] = f"出力ファイルを閉じられませんでした: {e}"
+        info['segments'] = list(self.sink.segments)
+        info['capture'] = self.capture.path if self.capture is not None else None
+        if hasattr(self.sink, 'summary'):
+            info['summary'] = self.sink.summary()
+        return info
+
+
+def _worker_main(index: int, ring: SharedRing, config: Dict[str, Any], results: Any, parent_pid: int):
+    """ワーカープロセスの本体: リングバッファを受信順に処理する"""
+    # Ctrl+C は端末のプロセスグループ全体に届くため、終了は I/O プロセスからの通知で行う
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    ring.attach()
+    devices: Dict[int, _WorkerDevice] = {}
+    last_report = time.monotonic()
+    try:
+        while True:
+            item = ring.get(REPORT_INTERVAL)
+            if item is not None:
+                kind, device_id, data, received_at = item
+                if kind == DATA:
+                    device = devices.get(device_id)
+                    if device is not None:
+                        device.process(RawNotification(received_at, data))
+                elif kind == OPEN:
+                    info = json.loads(data)
+                    try:
+                        device = _WorkerDevice(info['address'], info['stem'], config)
+                        device.open()
+                    except Exception as e:
+                        results.put(('closed', device_id, {'error': f"出力ファイル作成エラー: {e}"}))
+                    else:
+                        devices[device_id] = device
+                elif kind == CLOSE:
+                    device = devices.pop(device_id, None)
+                    results.put(('closed', device_id, device.close() if device is not None else {}))
+                elif kind == STOP:
+                    break
+            elif os.getppid() != parent_pid:
+                break  # I/O プロセスが終了した
+            now = time.monotonic()
+            if now - last_report >= REPORT_INTERVAL:
+                last_report = now
+                for device in devices.values():
+                    device.flush_if_due()
+                if devices:
+                    results.put(('progress', index,
+                                 {device_id: device.counts() for device_id, device in devices.items()}))
+    finally:
+        for device_id, device in devices.items():
+            results.put(('closed', device_id, device.close()))
+        ring.close()
+        results.put(('stopped', index, None))
+
+
+# --- I/O プロセス側 ---
+
+class ForwardingSession:
+    """1台分の受信状態（MultiDeviceSupervisor の DeviceSession の代わり）
+
+    Notificationは担当ワーカーのリングバッファに書くだけで、
+    件数と出力ファイルはワーカーからの報告で更新します。
+    """
+
+    def __init__(self, pool: "WorkerPool", device: Any, device_id: int, ring: SharedRing, stem: str,
+                 process: Any):
+        self.pool = pool
+        self.device = device
+        self.address = device.address
+        self.device_id = device_id
+        self.ring = ring
+        self.stem = stem
+        self.process = process  # 担当のワーカープロセス
+        # イベントループから呼ばれるため、block でも待つ時間には上限を設ける
+        self.timeout = BLOCK_TIMEOUT if pool.backpressure == BLOCK else 0.0
+        self.record_count = 0
+        self.forwarded_count = 0
+        self.dropped_count = 0
+        self.segments: List[str] = []
+        self.capture_path: Optional[str] = None
+        self.summary: Optional[str] = None
+        self._counts: Dict[str, int] = {}
+        self._closed = threading.Event()
+
+    def notification_handler(self, sender: Any, data: bytearray):
+        """Notification受信時のコールバック（リングバッファに書くだけ）"""
+        if self.ring.put(DATA, self.device_id, data, time.monotonic(), self.timeout):
+            self.forwarded_count += 1
+            return
+        self.dropped_count += 1
+        # 待っても空かなかったときだけ、ワーカーが終了していないか確かめる
+        if self.timeout and not self.process.is_alive():
+            self.timeout = 0.0
+            print(f"✗ {self.address}: {self.process.name} が終了したため、以降のNotificationは捨てます")
+
+    def start(self):
+        if not self.process.is_alive():
+            raise RuntimeError(f"{self.process.name} が終了しています")
+        payload = json.dumps({'address': self.address, 'stem': self.stem}).encode('utf-8')
+        if not self.ring.put(OPEN, self.device_id, payload, time.monotonic(), CONTROL_TIMEOUT):
+            raise RuntimeError("ワーカープロセスが応答しません")
+
+    def flush_if_due(self):
+        """出力のフラッシュはワーカーが行う"""
+
+    def close(self):
+        """切断をワーカーに通知し、出力が閉じられるまで待つ（ブロッキング）"""
+        if not self.process.is_alive() or not self.ring.put(CLOSE, self.device_id, b'', time.monotonic(),
+                                                            CONTROL_TIMEOUT):
+            print(f"✗ {self.address}: ワーカープロセスが応答しません")
+            return
+        deadline = time.monotonic() + CLOSE_TIMEOUT
+        while not self._closed.wait(REPORT_INTERVAL):
+            # ワーカーが途中で終了した場合は上限まで待たない
+            if not self.process.is_alive() or time.monotonic() >= deadline:
+                print(f"✗ {self.address}: ワーカーの終了処理を待てませんでした")
+                return
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'received': self.forwarded_count + self.dropped_count,
+            'dropped_raw': self.dropped_count,
+            'parse_errors': self._counts.get('parse_errors', 0),
+            'decode_errors': self._counts.get('decode_errors', 0),
+        }
+
+    def _update(self, counts: Dict[str, Any]):
+        self._counts = counts
+        self.record_count = counts.get('records', self.record_count)
+
+    def _finish(self, info: Dict[str, Any]):
+        self._update(info)
+        self.segments = info.get('segments', [])
+        self.capture_path = info.get('capture')
+        self.summary = info.get('summary')
+        if 'error' in info:
+            print(f"✗ {self.address}: {info['error']}")
+        self._closed.set()
+
+
+class WorkerPool:
+    """デバイスごとのデコード・保存を行うワーカープロセスの集まり
+
+    stem はアドレスから出力ファイルのパス（拡張子を除く）を作る関数で、
+    接続のたびに I/O プロセスで呼びます。sink と sink_options は
+    sensor_ble.sinks.create_sink() の引数で、ワーカー内でデバイスごとの
+    シンクを作るのに使います（プロセスをまたいで渡すため、関数ではなく
+    設定で指定します）。reduce_options を指定すると、その引数で作った
+    sensor_ble.reduction.Reducer をシンクの前に通します。session() は
+    MultiDeviceSupervisor の session_factory として使えます。
+    """
+
+    def __init__(self, workers: int, stem: Callable[[str], str], framing: str = 'json', sink: str = 'csv',
+                 sink_options: Optional[Dict[str, Any]] = None, capture: bool = False,
+                 reduce_options: Optional[Dict[str, Any]] = None,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, backpressure: str = DROP_OLDEST,
+                 slot_size: int = DEFAULT_SLOT_SIZE, start_method: str = DEFAULT_START_METHOD):
+        if workers <= 0:
+            raise ValueError("ワーカー数は1以上を指定してください")
+        self.workers = workers
+        self.stem = stem
+        self.backpressure = backpressure
+        self.config = {'framing': framing, 'sink': sink,
+                       'sink_options': dict(sink_options or {}), 'capture': capture,
+                       'reduce_options': reduce_options}
+        self.queue_size = queue_size
+        self.slot_size = slot_size
+        self._context = multiprocessing.get_context(start_method)
+        self.rings: List[SharedRing] = []
+        self.processes: List[Any] = []
+        self._results: Any = None
+        self._reader: Optional[threading.Thread] = None
+        self._assigned: Dict[str, int] = {}   # アドレス -> ワーカー番号
+        self._load = [0] * workers           # ワーカーごとの割り当て済みデバイス数
+        self._sessions: Dict[int, ForwardingSession] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        """ワーカープロセスを起動する"""
+        self._results = self._context.Queue()
+        try:
+            for index in range(self.workers):
+                ring = SharedRing(self.queue_size, self.slot_size, self._context)
+                self.rings.append(ring)
+                process = self._context.Process(
+                    target=_worker_main, name=f"sensor-ble-worker-{index}",
+                    args=(index, ring, self.config, self._results, os.getpid()), daemon=True)
+                process.start()
+                self.processes.append(process)
+        except Exception:
+            self.stop()
+            raise
+        self._reader = threading.Thread(target=self._read_results, name='sensor-ble-results', daemon=True)
+        self._reader.start()
+
+    def session(self, device: Any) -> ForwardingSession:
+        """device の受信状態を作る"""
+        with self._lock:
+            index = self._assigned.get(device.address)
+            if index is None:
+                # 新しいデバイスは担当の少ないワーカーへ（以後は同じワーカーで処理する）
+                index = min(range(self.workers), key=self._load.__getitem__)
+                self._assigned[device.address] = index
+                self._load[index] += 1
+            device_id = self._next_id
+            self._next_id = (self._next_id + 1) % (1 << 16)
+            session = ForwardingSession(self, device, device_id, self.rings[index],
+                                        self.stem(device.address), self.processes[index])
+            self._sessions[device_id] = session
+        return session
+
+    def stop(self, timeout: float = CLOSE_TIMEOUT):
+        """ワーカーに終了を通知し、残りの処理と出力の終了を待つ"""
+        for ring, process in zip(self.rings, self.processes):
+            if process.is_alive():
+                ring.put(STOP, 0, b'', time.monotonic(), CONTROL_TIMEOUT)
+        deadline = time.monotonic() + timeout
+        for process in self.processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                print(f"✗ {process.name} が終了しないため強制終了します")
+                process.terminate()
+                process.join()
+        if self._reader is not None:
+            self._results.put(None)
+            self._reader.join()
+            self._reader = None
+        for ring in self.rings:
+            ring.close()
+        self.rings = []
+        self.processes = []
+
+    def stats(self) -> Dict[str, int]:
+        """リングバッファ全体の転送数とドロップ数"""
+        return {
+            'forwarded': sum(ring.put_count for ring in self.rings),
+            'dropped_raw': sum(ring.dropped_count for ring in self.rings),
+        }
+
+    def _read_results(self):
+        """ワーカーからの報告を受け取り、各デバイスの受信状態に反映する"""
+        while True:
+            message = self._results.get()
+            if message is None:
+                return
+            kind, key, value = message
+            if kind == 'progress':
+                for device_id, counts in value.items():
+                    session = self._sessions.get(device_id)
+                    if session is not None:
+                        session._update(counts)
+            elif kind == 'closed':
+                session = self._sessions.pop(key, None)
+                if session is not None:
+                    session._finish(value)
+
@@ -0,0 +1,88 @@
+"""sensor_ble.capture のテスト"""
+
+import random
+
+import pytest
+
+from sensor_ble.capture import (MAGIC, RECORD_HEADER, CaptureFormatError, CaptureReader, CaptureWriter,
+                                iter_capture, write_capture)
+
+
+def notifications(count, seed=0, start=1678886400.0):
+    rng = random.Random(seed)
+    return [(start + i * 0.01, bytes(rng.randrange(256) for _ in range(rng.randrange(0, 200))))
+            for i in range(count)]
+
+
+def read_all(path):
+    with CaptureReader(path) as reader:
+        records = [(received_at, bytes(view)) for received_at, view in reader]
+        assert not reader.truncated
+    return records
+
+
+def test_writer_and_reader_round_trip(tmp_path):
+    path = str(tmp_path / 'notify.blecap')
+    expected = notifications(300)
+    # 小さいバッファで何度も書き出させ、バッファより大きいレコードも混ぜる
+    expected.insert(150, (expected[150][0] - 0.005, bytes(range(256)) * 4))
+    writer = CaptureWriter(path, buffer_size=512)
+    writer.open()
+    for received_at, data in expected:
+        writer.write(received_at, data)
+    writer.close()
+
+    assert writer.record_count == len(expected)
+    assert writer.flush_count > 1
+    assert writer.byte_count == sum(RECORD_HEADER.size + len(data) for _, data in expected)
+    assert read_all(path) == expected
+    assert list(iter_capture(path)) == expected
+
+
+def test_writer_appends_to_existing_file(tmp_path):
+    path = str(tmp_path / 'notify.blecap')
+    first, second = notifications(50, seed=1), notifications(50, seed=2, start=1678886500.0)
+    assert write_capture(path, first) == len(first)
+
+    writer = CaptureWriter(path)
+    writer.open()
+    for received_at, data in second:
+        writer.write(received_at, data)
+    writer.close()
+
+    with open(path, 'rb') as f:
+        assert f.read().count(MAGIC) == 1
+    assert read_all(path) == first + second
+
+
+def test_write_capture_replaces_existing_file(tmp_path):
+    path = str(tmp_path / 'notify.blecap')
+    write_capture(path, notifications(20, seed=1))
+    expected = notifications(5, seed=2)
+    assert write_capture(path, expected) == 5
+    assert list(iter_capture(path)) == expected
+
+
+def test_truncated_file_reads_complete_records(tmp_path):
+    path = tmp_path / 'notify.blecap'
+    expected = notifications(10)
+    write_capture(str(path), expected)
+    path.write_bytes(path.read_bytes()[:-3])
+
+    with CaptureReader(str(path)) as reader:
+        records = [(received_at, bytes(view)) for received_at, view in reader]
+        assert reader.truncated
+    assert records == expected[:-1]
+
+
+@pytest.mark.parametrize('content', [b'', b'SBLE', b'NOTACAPTUREFILE'])
+def test_bad_magic_is_rejected(tmp_path, content):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(content)
+    with pytest.raises(CaptureFormatError):
+        CaptureReader(str(path))
+    if content:
+        # 別の形式のファイルに追記して壊さない
+        with pytest.raises(CaptureFormatError):
+            CaptureWriter(str(path)).open()
+        assert path.read_bytes() == content
@@ -0,0 +1,105 @@
+"""sensor_ble.catalog のテスト"""
+
+import os
+import random
+
+import numpy as np
+import pytest
+
+from sensor_ble.catalog import INDEX_SUFFIX, Catalog, FileIndex, build_index
+from sensor_ble.convert import load_columns
+from sensor_ble.csv_sink import CsvSink
+from sensor_ble.synthetic import make_sample
+
+BLOCK_ROWS = 64
+START_MS = 1678886400000
+
+
+def write_csv(path, count=1000, rate_hz=50.0):
+    """GPS は最初の200行だけにある合成データのCSV"""
+    rng = random.Random(2)
+    sink = CsvSink(str(path))
+    sink.open()
+    for i in range(count):
+        data = make_sample(i, rng, rate_hz=rate_hz, start_ms=START_MS)
+        if i >= 200:
+            data.pop('gps', None)
+        sink.write(data)
+    sink.close()
+    return path.read_bytes()
+
+
+def index_state(index):
+    return index.size, index.rows, index.blocks, index.present
+
+
+def test_appended_file_index_matches_rebuild(tmp_path):
+    full = tmp_path / 'full.csv'
+    content = write_csv(full)
+    path = tmp_path / 'sensor_data_ble_test.csv'
+    # 書き込み途中の行で終わるファイルの索引を作ってから、残りを追記する
+    split = content.index(b'\n', len(content) // 3) + 20
+    path.write_bytes(content[:split])
+    first, status = build_index(str(path), BLOCK_ROWS)
+    assert status == 'created'
+    assert first.size < split
+
+    with open(path, 'ab') as f:
+        f.write(content[split:])
+    updated, status = build_index(str(path), BLOCK_ROWS)
+    assert status == 'updated'
+    assert build_index(str(path), BLOCK_ROWS)[1] == 'unchanged'
+
+    os.remove(str(path) + INDEX_SUFFIX)
+    rebuilt, status = build_index(str(path), BLOCK_ROWS)
+    assert status == 'created'
+    assert index_state(updated) == index_state(rebuilt)
+    assert index_state(FileIndex.load(str(path))) == index_state(rebuilt)
+    assert rebuilt.rows == 1000
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    write_csv(tmp_path / 'sensor_data_ble_a.csv')
+    catalog = Catalog([str(tmp_path)], BLOCK_ROWS)
+    assert catalog.update()['created'] == 1
+    return catalog
+
+
+def expected_rows(columns, start, end, names):
+    """load_columns() の結果から Catalog.query() と同じ条件の行を選ぶ"""
+    keep = np.ones(len(columns['timestamp']), dtype=bool)
+    if start is not None:
+        keep &= columns['timestamp'] >= start
+    if end is not None:
+        keep &= columns['timestamp'] <= end
+    if names:
+        keep &= np.logical_or.reduce([~np.isnan(columns[name]) for name in names])
+    wanted = ['timestamp'] + names if names else list(columns)
+    return {name: columns[name][keep] for name in wanted}
+
+
+@pytest.mark.parametrize('start, end, names', [
+    (None, None, None),
+    (START_MS + 3000, START_MS + 9000, None),
+    (START_MS + 1234, START_MS + 15000, ['gyro_x', 'gyro_y']),
+    (None, None, ['gps_lat', 'gps_lon']),   # 値のあるブロックだけを読む
+    (START_MS + 10000, None, ['gps_lat']),  # 該当なし
+])
+def test_query_matches_full_load(catalog, start, end, names):
+    columns = load_columns(catalog.indexes[0].path)
+    result = catalog.query(start, end, names)
+    expected = expected_rows(columns, start, end, names)
+
+    assert set(result) == set(expected) | {'session'}
+    for name, values in expected.items():
+        assert result[name].dtype == values.dtype
+        np.testing.assert_array_equal(result[name], values, err_msg=name)
+    assert (result['session'] == 0).all()
+
+
+def test_blocks_without_requested_columns_are_skipped(catalog):
+    index = catalog.indexes[0]
+    selected = sum(stop - first for first, stop in index.select_blocks(names=['gps_lat']))
+    # GPS は 0, 50, 100, 150 行目だけにある（64行ずつの最初の3ブロック）
+    assert selected == 3 < len(index.blocks)
@@ -0,0 +1,12 @@
+"""sensor_ble.csv_sink のテスト"""
+
+from sensor_ble.csv_sink import CSV_HEADER, record_to_row, sample_to_row
+from sensor_ble.schema import as_sample
+
+
+def test_missing_field_is_blank_like_dict_rows():
+    record = {'timestamp': 1678886400000, 'accelerometer': {'x': 0.1, 'z': 9.8}, 'light': {'lux': 150.0}}
+    row = sample_to_row(as_sample(record))
+    assert row == record_to_row(record)
+    assert row[CSV_HEADER.index('accel_y')] == ''
+    assert row[CSV_HEADER.index('gyro_x')] == ''
@@ -0,0 +1,38 @@
+"""sensor_ble.decoders のテスト"""
+
+import json
+
+from sensor_ble.binary_protocol import encode_frame, is_binary
+from sensor_ble.decoders import ChunkedJsonDecoder
+from sensor_ble.pipeline import RawNotification
+
+
+def feed(decoder, chunks, interval=0.01):
+    records = []
+    for i, chunk in enumerate(chunks):
+        records.extend(decoder(RawNotification(i * interval, chunk)))
+    return records
+
+
+def test_multibyte_character_straddling_chunk_boundary():
+    # 'ば' (U+3070) は E3 81 B0。継続バイト B0 はバイナリのマジックと同じ範囲
+    record = {'timestamp': 1678886400000, 'light': {'lux': 150.0}, 'label': 'ばば'}
+    payload = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    split = payload.index('ば'.encode('utf-8')) + 2
+    chunks = [payload[:split], payload[split:]]
+    assert is_binary(chunks[1])
+
+    decoder = ChunkedJsonDecoder()
+    assert feed(decoder, chunks) == [record]
+    assert decoder.error_count == 0
+
+
+def test_binary_frame_between_json_frames():
+    record = {'timestamp': 1678886400000, 'light': {'lux': 150.0}}
+    payload = json.dumps(record, separators=(',', ':')).encode('utf-8')
+    frame = encode_frame({'timestamp': 1678886400010, 'light': {'lux': 151.0}})
+
+    decoder = ChunkedJsonDecoder()
+    records = feed(decoder, [payload[:10], payload[10:], frame, payload])
+    assert [r['timestamp'] for r in records] == [1678886400000, 1678886400010, 1678886400000]
+    assert decoder.error_count == 0
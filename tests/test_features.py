@@ -0,0 +1,29 @@
+"""sensor_ble.features のテスト"""
+
+import random
+
+import numpy as np
+import pytest
+
+from sensor_ble.features import FeatureEngine, compute_windows
+from sensor_ble.reduction import samples_to_columns
+from sensor_ble.schema import as_sample
+from sensor_ble.synthetic import make_sample
+
+
+@pytest.mark.parametrize('window, hop', [(64, 16), (64, 24), (50, 64), (32, 1)])
+def test_streaming_matches_batch(window, hop):
+    rng = random.Random(0)
+    records = [make_sample(i, rng, rate_hz=100.0) for i in range(500)]
+    # window が hop で割り切れなくても、一括計算と同じ位置のウィンドウになる
+    expected = compute_windows(samples_to_columns(as_sample(r) for r in records), window, hop)
+
+    rows = []
+    engine = FeatureEngine(window, hop, outputs=[rows.append])
+    for record in records:
+        engine.write(record)
+
+    assert len(rows) == len(expected['timestamp']) > 0
+    for name, values in expected.items():
+        np.testing.assert_allclose([row[name] for row in rows], values, rtol=1e-9, equal_nan=True,
+                                   err_msg=name)
@@ -0,0 +1,44 @@
+"""sensor_ble.fusion のテスト"""
+
+import random
+
+import numpy as np
+import pytest
+
+from sensor_ble.fusion import FUSION_COLUMNS, FusionStage, fuse_columns
+from sensor_ble.reduction import samples_to_columns
+from sensor_ble.schema import as_sample
+from sensor_ble.synthetic import make_sample
+
+
+def records(count=600, rate_hz=50.0):
+    """磁気・ジャイロの欠け、timestamp の逆行と途切れを含む合成データ"""
+    rng = random.Random(0)
+    out = []
+    for i in range(count):
+        data = make_sample(i, rng, rate_hz=rate_hz)
+        if i % 7 == 3:
+            del data['magnetometer']
+        if i % 50 == 25:
+            del data['gyroscope']
+        if i >= 300:
+            data['timestamp'] += 5000  # 途切れ（再接続）
+        if i == 400:
+            data['timestamp'] -= 100   # 逆行
+        out.append(data)
+    return out
+
+
+@pytest.mark.parametrize('algorithm, gain', [('madgwick', None), ('mahony', None), ('mahony', 0.5)])
+def test_streaming_matches_offline(algorithm, gain):
+    data = records()
+    rows = []
+    stage = FusionStage(algorithm, gain, outputs=[rows.append])
+    for record in data:
+        stage.write(record)
+    expected = fuse_columns(samples_to_columns(as_sample(r) for r in data), algorithm, gain)
+
+    assert len(rows) == len(expected['timestamp']) == stage.row_count < len(data)
+    for name in FUSION_COLUMNS:
+        np.testing.assert_allclose([row[name] for row in rows], expected[name], rtol=1e-9, atol=1e-9,
+                                   err_msg=name)
@@ -0,0 +1,104 @@
+"""sensor_ble.publisher のテスト"""
+
+import base64
+import json
+import os
+import socket
+import time
+
+import pytest
+
+from sensor_ble.publisher import Publisher
+
+OVERSIZED = 200000  # StreamReader の既定の上限（64KiB）を超える長さ
+
+
+@pytest.fixture
+def publisher(request):
+    publisher = Publisher(f"{request.param}://127.0.0.1:0", batch_interval=0.01)
+    publisher.start()
+    yield publisher
+    publisher.close()
+
+
+def connect(publisher):
+    sock = socket.create_connection(('127.0.0.1', publisher.port), timeout=5.0)
+    if publisher.transport == 'ws':
+        key = base64.b64encode(os.urandom(16))
+        sock.sendall(b'GET / HTTP/1.1\r\nHost: 127.0.0.1\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                     b'Sec-WebSocket-Key: ' + key + b'\r\nSec-WebSocket-Version: 13\r\n\r\n')
+        response = b''
+        while b'\r\n\r\n' not in response:
+            response += sock.recv(4096)
+        assert response.startswith(b'HTTP/1.1 101 ')
+    return sock
+
+
+def send_oversized(publisher):
+    """上限を超えるハンドシェイク（ws）または設定の行（tcp）を送り、閉じられるまで読む"""
+    sock = socket.create_connection(('127.0.0.1', publisher.port), timeout=5.0)
+    if publisher.transport == 'ws':
+        data = b'GET / HTTP/1.1\r\nX-Padding: ' + b'a' * OVERSIZED
+    else:
+        data = b'{"every": 1, "padding": "' + b'a' * OVERSIZED
+    try:
+        sock.sendall(data)
+        while sock.recv(4096):
+            pass
+    except ConnectionError:
+        pass
+    finally:
+        sock.close()
+
+
+def wait_for_subscribers(publisher, count):
+    deadline = time.monotonic() + 5.0
+    while publisher.stats()['subscribers'] != count:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.mark.parametrize('publisher', ['ws', 'tcp'], indirect=True)
+def test_oversized_request_closes_only_that_connection(publisher):
+    good = connect(publisher)
+    try:
+        wait_for_subscribers(publisher, 1)
+        # 送り手の接続だけが閉じられ、配信スレッドも他の購読者もそのまま
+        send_oversized(publisher)
+        later = connect(publisher)
+        try:
+            wait_for_subscribers(publisher, 2)
+            publisher.write({'timestamp': 1, 'light': {'lux': 150.0}})
+            for sock in (good, later):
+                data = b''
+                while b'"timestamp":1' not in data:
+                    chunk = sock.recv(4096)
+                    assert chunk
+                    data += chunk
+        finally:
+            later.close()
+    finally:
+        good.close()
+    stats = publisher.stats()
+    assert stats['records'] == 1
+    assert stats['connections'] == (2 if publisher.transport == 'ws' else 3)
+
+
+def test_received_lines_are_json():
+    publisher = Publisher('tcp://127.0.0.1:0', batch_interval=0.01)
+    publisher.start()
+    try:
+        sock = connect(publisher)
+        wait_for_subscribers(publisher, 1)
+        records = [{'timestamp': i, 'proximity': {'distance': i / 2}} for i in range(10)]
+        for record in records:
+            publisher.write(record)
+        data = b''
+        while data.count(b'\n') < len(records):
+            chunk = sock.recv(4096)
+            assert chunk
+            data += chunk
+        sock.close()
+    finally:
+        publisher.close()
+    assert [json.loads(line) for line in data.splitlines()] == records
@@ -0,0 +1,118 @@
+"""sensor_ble.reduction のテスト"""
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from sensor_ble.reduction import (Reducer, ReducingSink, iter_samples, parse_policy, reconstruction_errors,
+                                  samples_to_columns)
+from sensor_ble.schema import as_sample
+from sensor_ble.synthetic import make_sample
+
+START_MS = 1678886400000
+
+
+def signals(count=3000, rate_hz=100.0, seed=0):
+    """ゆっくり変わる値・段差・ノイズを含む合成データ"""
+    rng = random.Random(seed)
+    records = []
+    walk = 0.0
+    for i in range(count):
+        t = i / rate_hz
+        data = make_sample(i, rng, rate_hz=rate_hz, start_ms=START_MS)
+        walk += rng.gauss(0, 0.02)
+        data['light'] = {'lux': 150.0 + 40 * math.sin(t / 3) + (60.0 if 10 <= t < 12 else 0.0)
+                         + rng.gauss(0, 0.5)}
+        data['proximity'] = {'distance': 5.0 + walk}
+        records.append(data)
+    return records
+
+
+def reduce(records, policy, **kwargs):
+    outputs = []
+    reducer = Reducer(policy, outputs=[outputs.append], **kwargs)
+    for record in records:
+        reducer.write(record)
+    reducer.close()
+    return reducer, outputs
+
+
+@pytest.mark.parametrize('spec', ['light=sdt:5,proximity=sdt:0.1', 'light=sdt:0.5,proximity=sdt:0.01'])
+def test_swinging_door_stays_within_deviation(spec):
+    records = [{key: record[key] for key in ('timestamp', 'light', 'proximity')} for record in signals()]
+    policy = parse_policy(spec)
+    reducer, outputs = reduce(records, policy)
+    assert len(outputs) < len(records)
+
+    original = samples_to_columns(as_sample(r) for r in records)
+    reduced = samples_to_columns(outputs)
+    errors = reconstruction_errors(original, reduced, policy)
+    for key, column in (('light', 'light_lux'), ('proximity', 'proximity_distance')):
+        deviation = policy[key].params[0]
+        # 線形補間で復元した値も、書いた点の値も元の値から deviation 以内
+        assert errors[column] <= deviation * (1 + 1e-9)
+        assert reducer.max_errors()[column] <= deviation * (1 + 1e-9)
+        by_time = dict(zip(original['timestamp'].tolist(), original[column].tolist()))
+        for timestamp, value in zip(reduced['timestamp'].tolist(), reduced[column].tolist()):
+            if not math.isnan(value):
+                assert abs(value - by_time[timestamp]) <= deviation * (1 + 1e-9)
+
+
+def test_streaming_matches_whole_array():
+    # 受信したレコードを1件ずつ ReducingSink に渡した結果と、記録済みの列配列を
+    # まとめて Reducer に通した結果（python -m sensor_ble.reduction と同じ）が同じ
+    records = signals(count=1500)
+    spec = 'default,accelerometer=decimate:4,gyroscope=decimate:8'
+
+    class ListSink:
+        def __init__(self):
+            self.rows = []
+            self.segments = []
+            self.row_count = 0
+
+        def write(self, sample):
+            self.rows.append(sample)
+
+    sink = ListSink()
+    streaming = ReducingSink(sink, Reducer(parse_policy(spec)))
+    emitted_before_close = []
+    for i, record in enumerate(records):
+        streaming.write(record)
+        if i == len(records) // 2:
+            emitted_before_close = list(sink.rows)
+    streaming.reducer.close()
+
+    _, batch = reduce(iter_samples(samples_to_columns(as_sample(r) for r in records)), spec)
+
+    # 保留は max_delay 行までなので、途中でも出力が進んでいる
+    assert 0 < len(emitted_before_close) < len(sink.rows)
+    assert sink.rows[:len(emitted_before_close)] == emitted_before_close
+    assert [sample.present for sample in sink.rows] == [sample.present for sample in batch]
+    expected = samples_to_columns(batch)
+    for name, values in samples_to_columns(sink.rows).items():
+        np.testing.assert_array_equal(values, expected[name], err_msg=name)
+
+
+def deadband_written(values, threshold, times=None):
+    records = [{'timestamp': START_MS + (times[i] if times else i * 10), 'light': {'lux': value}}
+               for i, value in enumerate(values)]
+    _, outputs = reduce(records, f'light=deadband:{threshold}')
+    return [sample.light_lux for sample in outputs]
+
+
+def test_deadband_threshold_is_inclusive():
+    # 変化がしきい値ちょうどなら書かず、超えたら書く
+    assert deadband_written([0.0, 0.5, -0.5, 0.5], 0.5) == [0.0]
+    assert deadband_written([0.0, 0.5, 0.5000001], 0.5) == [0.0, 0.5000001]
+
+
+def test_deadband_compares_with_last_written_value():
+    # 1件ずつはしきい値以下でも、最後に書いた値からの変化が超えたら書く
+    assert deadband_written([0.0, 0.3, 0.6, 0.9, 1.2], 0.5) == [0.0, 0.6, 1.2]
+
+
+def test_deadband_writes_after_heartbeat():
+    # 既定の heartbeat は10秒。ちょうど10秒後は書かず、それを超えたら同じ値でも書く
+    assert deadband_written([1.0, 1.0, 1.0, 1.0], 0.5, times=[0, 5000, 10000, 10001]) == [1.0, 1.0]
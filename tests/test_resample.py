@@ -0,0 +1,48 @@
+"""sensor_ble.resample のテスト"""
+
+import random
+
+import numpy as np
+import pytest
+
+from sensor_ble.reduction import samples_to_columns
+from sensor_ble.resample import Resampler, resample_columns
+from sensor_ble.schema import as_sample
+from sensor_ble.synthetic import make_sample
+
+
+def records(count=800, rate_hz=47.0):
+    """間隔のゆらぎ・グループの欠け・途切れ・時計の逆行を含む合成データ"""
+    rng = random.Random(1)
+    out = []
+    timestamp = 1678886400003
+    for i in range(count):
+        data = make_sample(i, rng, rate_hz=rate_hz)
+        timestamp += int(1000 / rate_hz) + rng.randint(-5, 5)
+        if i == 300:
+            timestamp += 2000  # max_gap を超える途切れ
+        if i == 500:
+            timestamp -= 300   # 時計の逆行
+        data['timestamp'] = timestamp
+        if i % 5 == 2:
+            del data['gyroscope']
+        if i < 40:
+            data.pop('magnetometer', None)  # 最初はまだ観測していないセンサー
+        out.append(data)
+    return out
+
+
+@pytest.mark.parametrize('rate_hz, max_gap', [(50.0, 0.5), (20.0, 0.5), (100.0, 0.1)])
+def test_streaming_matches_batch(rate_hz, max_gap):
+    data = records()
+    rows = []
+    resampler = Resampler(rate_hz, max_gap, outputs=[rows.append])
+    for record in data:
+        resampler.write(record)
+    resampler.close()
+    expected = resample_columns(samples_to_columns(as_sample(r) for r in data), rate_hz, max_gap)
+
+    actual = samples_to_columns(rows)
+    assert len(rows) == len(expected['timestamp']) > 0
+    for name, values in expected.items():
+        np.testing.assert_allclose(actual[name], values, rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=name)
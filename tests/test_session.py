@@ -0,0 +1,98 @@
+"""sensor_ble.session のテスト（FakeBackend の切断で再接続を模擬）"""
+
+import asyncio
+
+import pytest
+
+from sensor_ble import session as session_module
+from sensor_ble.fake_ble import FakeBackend
+from sensor_ble.session import ReconnectingSession
+
+SAMPLES = 5
+
+
+class FlakyBackend(FakeBackend):
+    """最初の failures 回の接続だけが失敗するバックエンド（スキャン回数も数える）"""
+
+    def __init__(self, failures, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures
+        self.connect_attempts = 0
+        self.scans = 0
+
+    async def find_device(self, timeout=10.0, service_uuid=""):
+        self.scans += 1
+        return await super().find_device(timeout, service_uuid)
+
+    def client(self, device, disconnected_callback=None):
+        client = super().client(device, disconnected_callback)
+        connect = client.connect
+
+        async def flaky_connect():
+            self.connect_attempts += 1
+            if self.connect_attempts <= self.failures:
+                raise OSError("接続できません")
+            await connect()
+        client.connect = flaky_connect
+        return client
+
+
+async def run_for(session, seconds):
+    try:
+        await asyncio.wait_for(session.run(), seconds)
+    except asyncio.TimeoutError:
+        pass
+
+
+def test_reconnects_after_disconnect():
+    # 各接続は SAMPLES 件を送ると切断される
+    backend = FakeBackend(devices=1, rate_hz=200.0, samples=SAMPLES)
+    received = []
+    reconnects = []
+    session = ReconnectingSession(lambda sender, data: received.append(bytes(data)),
+                                  on_reconnect=lambda: reconnects.append(session.connect_count),
+                                  backend=backend, initial_backoff=0.1, max_backoff=1.0)
+    asyncio.run(run_for(session, 0.8))
+
+    assert session.connect_count >= 3
+    assert reconnects == list(range(2, session.connect_count + 1))
+    # スキャンは最初の1回だけで、キャッシュしたデバイスへ直接再接続する
+    assert len(backend.clients) == session.connect_count
+    assert {client.address for client in backend.clients} == {backend.devices[0].address}
+    assert len(received) >= SAMPLES * (session.connect_count - 1)
+
+    log = session.log
+    assert log.summary()['disconnects'] >= session.connect_count - 1
+    assert len(log.reconnect_latencies) == session.connect_count - 1
+    # 接続できたらバックオフは初期値に戻るので、再接続までの時間は毎回同じくらい
+    assert all(0.1 <= latency < 0.5 for latency in log.reconnect_latencies)
+    assert len(log.gaps) >= session.connect_count - 2
+    assert all(start < end for start, end in log.gaps)
+
+
+def test_backoff_doubles_and_rescans_after_repeated_failures(monkeypatch):
+    backend = FlakyBackend(5, devices=1, rate_hz=200.0)
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay, *args, **kwargs):
+        if delay > 0:
+            delays.append(delay)
+        await real_sleep(0)
+
+    def on_connect(client):
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr(session_module.asyncio, 'sleep', sleep)
+    session = ReconnectingSession(lambda sender, data: None, on_connect=on_connect, backend=backend,
+                                  initial_backoff=0.01, max_backoff=0.04, rescan_after=3)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(session.run())
+
+    assert delays == pytest.approx([0.01, 0.02, 0.04, 0.04, 0.04])
+    assert backend.connect_attempts == 6
+    assert session.connect_count == 1
+    # 最初のスキャンと、3回続けて失敗した後のスキャン
+    assert backend.scans == 2
+    events = [event['event'] for event in session.log.events]
+    assert events == ['connect_failed'] * 5 + ['connected', 'stopped']
@@ -0,0 +1,108 @@
+"""sensor_ble.supervisor のテスト（FakeBackend で複数デバイスを模擬）"""
+
+import asyncio
+import csv
+import time
+
+from sensor_ble.csv_sink import CsvSink
+from sensor_ble.fake_ble import FakeBackend
+from sensor_ble.receiver import make_decoder
+from sensor_ble.supervisor import MultiDeviceSupervisor, address_slug
+
+SAMPLES = 30
+
+
+class ListSink:
+    """書き込まれたレコードと open / close の時刻を記録するシンク"""
+
+    def __init__(self, address):
+        self.address = address
+        self.records = []
+        self.opened_at = None
+        self.closed_at = None
+        self.segments = []
+
+    def open(self):
+        self.opened_at = time.monotonic()
+
+    def write(self, data):
+        self.records.append(data)
+
+    def flush_if_due(self):
+        pass
+
+    def close(self):
+        self.closed_at = time.monotonic()
+
+
+class FailingBackend(FakeBackend):
+    """failing のアドレスへの接続だけが失敗するバックエンド"""
+
+    def __init__(self, failing, **kwargs):
+        super().__init__(**kwargs)
+        self.failing = failing
+
+    def client(self, device, disconnected_callback=None):
+        client = super().client(device, disconnected_callback)
+        if device.address == self.failing:
+            async def connect():
+                raise OSError("接続できません")
+            client.connect = connect
+        return client
+
+
+def run_supervisor(backend, sink_factory, duration=1.0):
+    supervisor = MultiDeviceSupervisor(lambda: make_decoder('json'), sink_factory,
+                                       scan_interval=0.05, scan_timeout=0.0, backend=backend)
+    asyncio.run(supervisor.run(duration))
+    return supervisor
+
+
+def test_devices_are_received_concurrently():
+    backend = FakeBackend(devices=3, rate_hz=100.0, samples=SAMPLES)
+    sinks = []
+
+    def sink_factory(address):
+        sinks.append(ListSink(address))
+        return sinks[-1]
+
+    supervisor = run_supervisor(backend, sink_factory)
+
+    assert sorted(sink.address for sink in sinks) == [device.address for device in backend.devices]
+    # 全デバイスの出力が、どれかが閉じられる前に開かれている（同時に受信している）
+    assert max(sink.opened_at for sink in sinks) < min(sink.closed_at for sink in sinks)
+    for sink in sinks:
+        assert len(sink.records) == SAMPLES
+        assert {record.device for record in sink.records} == {sink.address}
+    assert supervisor.stats() == {device.address: SAMPLES for device in backend.devices}
+
+
+def test_outputs_are_named_per_device(tmp_path):
+    backend = FakeBackend(devices=2, rate_hz=100.0, samples=SAMPLES)
+    supervisor = run_supervisor(
+        backend, lambda address: CsvSink(str(tmp_path / f"out_{address_slug(address)}.csv")))
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['out_FAKE00000000.csv', 'out_FAKE00000001.csv']
+    for session in supervisor.finished_sessions:
+        with open(session.segments[0], newline='', encoding='utf-8') as f:
+            assert len(list(csv.reader(f))) == SAMPLES + 1
+
+
+def test_failing_device_does_not_stop_others():
+    failing = 'FA:KE:00:00:00:01'
+    backend = FailingBackend(failing, devices=3, rate_hz=100.0, samples=SAMPLES)
+    sinks = []
+
+    def sink_factory(address):
+        sinks.append(ListSink(address))
+        return sinks[-1]
+
+    supervisor = run_supervisor(backend, sink_factory)
+
+    assert supervisor.stats() == {'FA:KE:00:00:00:00': SAMPLES, 'FA:KE:00:00:00:02': SAMPLES}
+    failed = [sink for sink in sinks if sink.address == failing]
+    # スキャンのたびに再接続を試み、接続できなかった出力は開かれない
+    assert len(failed) > 1
+    assert all(sink.opened_at is None and sink.closed_at is None for sink in failed)
+    assert failing not in {session.address for session in supervisor.finished_sessions}
+    assert not supervisor.sessions
@@ -0,0 +1,149 @@
+"""sensor_ble.workers のテスト"""
+
+import asyncio
+import csv
+import time
+import types
+
+import pytest
+
+from sensor_ble.fake_ble import FakeBackend
+from sensor_ble.pipeline import BLOCK, DROP_NEWEST
+from sensor_ble.receiver import make_decoder
+from sensor_ble.supervisor import MultiDeviceSupervisor, address_slug
+from sensor_ble.workers import (BLOCK_TIMEOUT, CLOSE, CLOSE_TIMEOUT, DATA, ForwardingSession, SharedRing,
+                                WorkerPool)
+
+
+@pytest.fixture
+def ring():
+    ring = SharedRing(2)
+    yield ring
+    ring.close()
+
+
+def attach_reader(ring):
+    """ワーカープロセスと同じように、読み出し側のリングバッファを作る"""
+    reader = SharedRing.__new__(SharedRing)
+    reader.__setstate__(ring.__getstate__())
+    reader.attach()
+    return reader
+
+
+class FakeProcess:
+    """ワーカープロセスの代わり（is_alive() を alive 回だけ True にする）"""
+
+    name = 'fake-worker'
+
+    def __init__(self, alive=None):
+        self.alive = alive
+
+    def is_alive(self):
+        if self.alive is None:
+            return True
+        self.alive -= 1
+        return self.alive >= 0
+
+
+def make_session(ring, backpressure, process):
+    pool = types.SimpleNamespace(backpressure=backpressure)
+    return ForwardingSession(pool, types.SimpleNamespace(address='AA:BB'), 7, ring, 'stem', process)
+
+
+def test_ring_round_trip(ring):
+    reader = attach_reader(ring)
+    try:
+        # スロット数を超えて書いても、読み出した分だけ空きができる
+        for i in range(5):
+            assert ring.put(DATA, i, f'{{"timestamp": {i}}}'.encode(), i / 2)
+            assert reader.get(0.1) == (DATA, i, f'{{"timestamp": {i}}}'.encode(), i / 2)
+        assert ring.put(CLOSE, 3, b'', 13.0)
+        assert reader.get(0.1) == (CLOSE, 3, b'', 13.0)
+        assert reader.get(0.01) is None
+        assert ring.put_count == 6
+    finally:
+        reader.close()
+
+
+def test_oversized_notification_is_dropped(ring):
+    assert not ring.put(DATA, 0, bytes(ring.max_payload + 1), 0.0)
+    assert ring.dropped_count == 1
+
+
+@pytest.mark.parametrize('backpressure, min_wait, max_wait', [
+    (BLOCK, BLOCK_TIMEOUT * 0.9, BLOCK_TIMEOUT * 3),
+    (DROP_NEWEST, 0.0, 0.05),
+])
+def test_full_ring(ring, backpressure, min_wait, max_wait):
+    session = make_session(ring, backpressure, FakeProcess())
+    for _ in range(ring.slots):
+        session.notification_handler(None, bytearray(b'x'))
+
+    start = time.monotonic()
+    session.notification_handler(None, bytearray(b'x'))
+    assert min_wait <= time.monotonic() - start < max_wait
+    assert session.stats()['dropped_raw'] == 1
+    assert session.stats()['received'] == ring.slots + 1
+
+
+def test_block_stops_waiting_after_worker_exits(ring):
+    session = make_session(ring, BLOCK, FakeProcess(alive=0))
+    for _ in range(ring.slots):
+        session.notification_handler(None, bytearray(b'x'))
+    session.notification_handler(None, bytearray(b'x'))
+
+    start = time.monotonic()
+    for _ in range(10):
+        session.notification_handler(None, bytearray(b'x'))
+    assert time.monotonic() - start < BLOCK_TIMEOUT
+    assert session.dropped_count == 11
+
+
+def test_close_returns_when_worker_exits_while_waiting(ring):
+    # 切断の通知は書けたが、出力を閉じる前にワーカーが終了した
+    session = make_session(ring, DROP_NEWEST, FakeProcess(alive=1))
+    start = time.monotonic()
+    session.close()
+    assert time.monotonic() - start < CLOSE_TIMEOUT / 10
+    reader = attach_reader(ring)
+    try:
+        assert reader.get(0.1)[0] == CLOSE
+    finally:
+        reader.close()
+
+
+def test_close_returns_early_after_worker_process_exits(tmp_path):
+    pool = WorkerPool(1, lambda address: str(tmp_path / address_slug(address)), queue_size=4,
+                      backpressure=BLOCK)
+    pool.start()
+    try:
+        session = pool.session(types.SimpleNamespace(address='AA:BB'))
+        session.start()
+        pool.processes[0].kill()
+        pool.processes[0].join()
+        start = time.monotonic()
+        session.close()
+        assert time.monotonic() - start < 1.0
+    finally:
+        pool.stop()
+
+
+def test_pool_keeps_per_device_order(tmp_path):
+    samples = 200
+    backend = FakeBackend(devices=3, rate_hz=400.0, samples=samples, chunked=True)
+    pool = WorkerPool(2, lambda address: str(tmp_path / address_slug(address)), framing='m5',
+                      queue_size=64, backpressure=BLOCK)
+    supervisor = MultiDeviceSupervisor(lambda: make_decoder('m5'), None, scan_interval=0.05,
+                                       scan_timeout=0.0, backend=backend, session_factory=pool.session)
+    pool.start()
+    try:
+        asyncio.run(supervisor.run(2.0))
+    finally:
+        pool.stop()
+
+    assert supervisor.stats() == {device.address: samples for device in backend.devices}
+    for device in backend.devices:
+        with open(tmp_path / f"{address_slug(device.address)}.csv", newline='', encoding='utf-8') as f:
+            timestamps = [int(row['timestamp']) for row in csv.DictReader(f)]
+        assert len(timestamps) == samples
+        assert timestamps == sorted(timestamps) and len(set(timestamps)) == samples